@@ -1,13 +1,25 @@
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import messagebox, simpledialog, ttk
 import os
 import csv
 import cv2
 import qrcode
-import pickle
-from datetime import datetime
+import sys
 import threading
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from attendance_store import open_store, GUI_FIELDS
+from attendance_writer import AttendanceWriter
+from roster import Roster
+from face_pipeline import FacePipeline
+from face_shards import check_shards, list_shards, shard_path
+from metrics import Metrics
+from qr_attendance import scan_qr
+from recognition_pool import ModelLoader, model_face_size
+from session_recorder import open_attendance_store, open_camera, session_path
+from stage_timer import StageTimer, latency_path
+from config import LATENCY_OVERLAY, RECORD_DIR, REPLAY_FILE, REPLAY_REALTIME
+
 #  Paths 
 STUDENTS_CSV = "smart_attendance/data/students.csv"
 ATTENDANCE_CSV = "smart_attendance/data/attendance.csv"
@@ -46,44 +58,152 @@ BUTTON_HOVER = "#1976D2"  # Darker Blue
 
 # Helper Functions
 
+# Shared state, created by open_attendance() when the GUI starts rather
+# than at import: recognition workers are spawned and re-import this
+# module, and must not open the store or start a writer thread
+roster = None
+attendance_store = None
+attendance_writer = None
+metrics = None
+
+def open_attendance():
+    global roster, attendance_store, attendance_writer, metrics
+    # students.csv is cached and only re-read when its mtime/size change
+    roster = Roster(STUDENTS_CSV)
+    # All attendance reads and writes go through the configured storage backend
+    attendance_store = open_store(ATTENDANCE_CSV, fields=GUI_FIELDS, header=True)
+    # Camera sessions queue marks here; a background thread writes them in batches
+    attendance_writer = AttendanceWriter(attendance_store)
+    # Prometheus endpoint fed by the camera sessions (ATTENDANCE_METRICS_PORT)
+    metrics = Metrics()
+    metrics.writer = attendance_writer
+
 def load_students():
-    if not os.path.isfile(STUDENTS_CSV):
-        return {}
-    students = {}
     try:
-        with open(STUDENTS_CSV, newline="", encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            # Check if required columns exist
-            if reader.fieldnames is None or 'student_id' not in reader.fieldnames or 'name' not in reader.fieldnames:
-                print("ERROR: students.csv is missing required columns (student_id, name)")
-                print(f"Found columns: {reader.fieldnames}")
-                return {}
-            
-            for row in reader:
-                if row.get("student_id") and row.get("name"):
-                    students[row["student_id"].strip()] = {
-                        'name': row["name"].strip(),
-                        'course': row.get("course", "").strip(),
-                        'email': row.get("email", "").strip()
-                    }
+        return roster.refresh()
     except Exception as e:
         print(f"ERROR loading students.csv: {e}")
         return {}
-    return students
 
-def mark_attendance(student_id, student_data):
-    if not os.path.isfile(ATTENDANCE_CSV):
-        with open(ATTENDANCE_CSV, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["student_id","name","course","email","date","time"])
-    now = datetime.now()
-    name = student_data['name'] if isinstance(student_data, dict) else student_data
-    course = student_data.get('course', '') if isinstance(student_data, dict) else ''
-    email = student_data.get('email', '') if isinstance(student_data, dict) else ''
+def mark_attendance(student_id, student_data, method="", writer=None):
+    """Queue an attendance mark; returns False if the student is already marked today"""
+    new = (writer or attendance_writer).mark(student_id, method, student_data)
+    metrics.mark(method, new)
+    return new
+
+class VirtualTable:
+    """Treeview that only ever holds the visible rows of a records view.
+
+    Rows are fetched from the view (see src/attendance_view.py) one page at
+    a time, with PREFETCH rows cached on each side so small scrolls don't
+    touch the disk. The scrollbar is driven by the view's row count.
+    """
+    PREFETCH = 50
+    ROW_HEIGHT = 20
+    LAYOUTS = {
+        6: (('student_id', 'Student ID', 100), ('name', 'Name', 150), ('course', 'Course', 150),
+            ('email', 'Email', 180), ('date', 'Date', 120), ('time', 'Time', 100)),
+        # Old format without course and email
+        4: (('student_id', 'Student ID', 120), ('name', 'Name', 250),
+            ('date', 'Date', 150), ('time', 'Time', 150)),
+    }
+    
+    def __init__(self, parent):
+        frame = tk.Frame(parent, bg=BG_COLOR)
+        frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+        
+        self.scrollbar = tk.Scrollbar(frame, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.tree = ttk.Treeview(frame, show='headings')
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<MouseWheel>', lambda e: self.scroll_by(-3 if e.delta > 0 else 3))
+        self.tree.bind('<Button-4>', lambda e: self.scroll_by(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll_by(3))
+        
+        self.view = None
+        self.layout = None
+        self.top = 0
+        self.visible = 20
+        self.cache_start = 0
+        self.cache = []
+    
+    def set_view(self, view):
+        if self.view is not None and self.view is not view:
+            self.view.close()
+        self.view = view
+        
+        layout = self.LAYOUTS[6 if 'course' in view.fields else 4]
+        if layout != self.layout:
+            self.layout = layout
+            self.tree['columns'] = tuple(key for key, _, _ in layout)
+            for key, heading, width in layout:
+                self.tree.column(key, anchor=tk.W, width=width)
+                self.tree.heading(key, text=heading, anchor=tk.W)
+        
+        self.top = 0
+        self.cache = []
+        self.render()
+    
+    def total(self):
+        return len(self.view) if self.view is not None else 0
+    
+    def rows(self, start, stop):
+        stop = min(stop, self.total())
+        if start < self.cache_start or stop > self.cache_start + len(self.cache):
+            self.cache_start = max(0, start - self.PREFETCH)
+            self.cache = self.view.fetch(self.cache_start, stop + self.PREFETCH)
+        return self.cache[start - self.cache_start:stop - self.cache_start]
     
-    with open(ATTENDANCE_CSV, "a", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([student_id, name, course, email, now.strftime("%Y-%m-%d"), now.strftime("%H:%M:%S")])
+    def render(self):
+        total = self.total()
+        self.top = max(0, min(self.top, total - self.visible))
+        
+        self.tree.delete(*self.tree.get_children())
+        if total:
+            keys = [key for key, _, _ in self.layout]
+            for row in self.rows(self.top, self.top + self.visible):
+                self.tree.insert('', tk.END, values=tuple(row.get(k, '') for k in keys))
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+    
+    def on_resize(self, event):
+        visible = max(1, event.height // self.ROW_HEIGHT - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+    
+    def on_scroll(self, *args):
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * self.total())
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            self.top += step * self.visible if args[2] == 'pages' else step
+        self.render()
+    
+    def scroll_by(self, rows):
+        self.top += rows
+        self.render()
+        return "break"
+    
+    def refresh(self):
+        """Pick up appended records; stays pinned to the end if already there"""
+        if self.view is None:
+            return False
+        at_bottom = self.top + self.visible >= self.total()
+        if not self.view.refresh():
+            return False
+        self.cache = []
+        if at_bottom:
+            self.top = self.total()
+        self.render()
+        return True
+    
+    def close(self):
+        if self.view is not None:
+            self.view.close()
 
 # this shows the GUI Application
 
@@ -91,11 +211,19 @@ class SmartAttendanceGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Smart Attendance System")
+        if REPLAY_FILE:
+            # Camera sessions play a recording instead; make that impossible to miss
+            self.root.title(f"Smart Attendance System - REPLAY {os.path.basename(REPLAY_FILE)}")
         self.root.geometry("600x500")
         self.root.configure(bg=BG_COLOR)
         
         self.camera_active = False
         
+        # The face model loads in the background so Face Attendance starts at once
+        self.face_model = ModelLoader(FACE_MODEL_PATH, LABEL_MAP_PATH)
+        if os.path.isfile(FACE_MODEL_PATH) and os.path.isfile(LABEL_MAP_PATH):
+            self.face_model.start()
+        
         # Check and fix students.csv if needed
         self.check_students_csv()
         
@@ -130,7 +258,29 @@ class SmartAttendanceGUI:
             fg=TEXT_COLOR
         )
         self.status_label.pack(pady=20)
+        if REPLAY_FILE:
+            self.update_status(f"Replay mode: camera sessions play {REPLAY_FILE} (marks are not saved)")
         
+    def session_writer(self):
+        """Writer for one camera session: the attendance log, or while replaying
+        a recording (ATTENDANCE_REPLAY) a throwaway log, so a replay never
+        marks anyone present"""
+        if not REPLAY_FILE:
+            return attendance_writer
+        return AttendanceWriter(open_attendance_store(ATTENDANCE_CSV, REPLAY_FILE, fields=GUI_FIELDS,
+                                                      header=True, roster_path=STUDENTS_CSV))
+    
+    def end_session(self, mode, cap, writer):
+        """Release what a camera session holds; safe to call again from a
+        finally block, so an error mid-session never leaves the camera open"""
+        cap.release()
+        cv2.destroyAllWindows()
+        metrics.detach(mode)
+        if writer is not None:
+            writer.timer = None
+            if writer is not attendance_writer:
+                writer.close()
+    
     def create_button(self, parent, text, command, row):
         btn = tk.Button(
             parent,
@@ -268,9 +418,8 @@ class SmartAttendanceGUI:
                 id_entry.focus()
                 return
             
-            # Check if student ID already exists
-            existing_students = load_students()
-            if student_id in existing_students:
+            # Check if student ID already exists (cached roster, no re-parse)
+            if student_id in load_students():
                 validation_label.config(text="❌ Student ID already registered!")
                 id_entry.focus()
                 return
@@ -474,8 +623,11 @@ class SmartAttendanceGUI:
         self.update_status("QR Attendance Active - Show QR codes to camera")
         
         def run_qr_attendance():
+            cap = writer = None
             try:
-                cap = cv2.VideoCapture(0)
+                # ATTENDANCE_RECORD_DIR saves the session, ATTENDANCE_REPLAY plays one back
+                record = session_path(RECORD_DIR, "qr") if RECORD_DIR else None
+                cap = open_camera(0, record, REPLAY_FILE, REPLAY_REALTIME)
                 
                 if not cap.isOpened():
                     messagebox.showerror("Error", "Cannot access camera!")
@@ -483,8 +635,14 @@ class SmartAttendanceGUI:
                     self.update_status("Camera access failed")
                     return
                 
+                writer = self.session_writer()
                 marked = set()
                 detector = cv2.QRCodeDetector()
+                metrics.attach("qr", cap)
+                # Per-stage latencies; press L to show them on the preview
+                timer = StageTimer(metrics=metrics)
+                writer.timer = timer
+                show_latency = LATENCY_OVERLAY
                 
                 # Add text overlay helper
                 def add_text_overlay(frame, text, position=(10, 30), color=(0, 255, 0)):
@@ -498,7 +656,8 @@ class SmartAttendanceGUI:
                 print("="*50 + "\n")
                 
                 while self.camera_active:
-                    ret, frame = cap.read()
+                    with timer.stage("capture"):
+                        ret, frame = cap.read()
                     if not ret:
                         break
                     
@@ -506,20 +665,20 @@ class SmartAttendanceGUI:
                     add_text_overlay(frame, "Show QR Code Here", (10, 30), (255, 255, 255))
                     add_text_overlay(frame, f"Marked: {len(marked)}", (10, 60), (0, 255, 0))
                     
-                    data, bbox, _ = detector.detectAndDecode(frame)
+                    with timer.stage("detectAndDecode"):
+                        student_id, bbox = scan_qr(detector, frame)
                     
-                    if data:
-                        student_id = data.strip()
-                        
+                    if student_id:
                         # Draw bounding box if QR detected
                         if bbox is not None:
                             bbox = bbox.astype(int)
                             cv2.polylines(frame, [bbox], True, (0, 255, 0), 3)
                         
                         if student_id in students:
-                            if student_id not in marked:
-                                student_info = students[student_id]
-                                mark_attendance(student_id, student_info)
+                            student_info = students[student_id]
+                            with timer.stage("mark"):
+                                new_mark = student_id not in marked and mark_attendance(student_id, student_info, "QR", writer)
+                            if new_mark:
                                 marked.add(student_id)
                                 
                                 name = student_info['name']
@@ -533,15 +692,30 @@ class SmartAttendanceGUI:
                             add_text_overlay(frame, "Unknown Student!", (10, 100), (0, 0, 255))
                             print(f"✗ UNKNOWN ID: {student_id}")
                     
-                    cv2.imshow("QR Attendance - Press Q to Quit", frame)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                    # Marks the writer could not save can be scanned again
+                    for record, _ in writer.take_failed():
+                        marked.discard(record["student_id"])
+                        self.update_status(f"Attendance NOT saved for {record['student_id']}")
+                    
+                    if show_latency:
+                        timer.overlay(frame)
+                    with timer.stage("imshow"):
+                        cv2.imshow("QR Attendance - Press Q to Quit", frame)
+                        key = cv2.waitKey(1) & 0xFF
+                    if key == ord('q'):
                         break
+                    if key == ord('l'):
+                        show_latency = not show_latency
                 
-                cap.release()
-                cv2.destroyAllWindows()
+                self.end_session("qr", cap, writer)
+                latency_file = timer.dump(latency_path(ATTENDANCE_CSV, "qr"), frames=cap.stats(),
+                                          writer=writer.stats())
                 
                 print("\n" + "="*50)
                 print(f"QR ATTENDANCE ENDED - Total Marked: {len(marked)}")
+                print(f"Attendance writer: {writer.stats()}")
+                print(f"Frames: {cap.stats()}")
+                print(f"Latency summary: {latency_file}")
                 print("="*50 + "\n")
                 
                 messagebox.showinfo("Attendance Complete", 
@@ -552,6 +726,8 @@ class SmartAttendanceGUI:
             except Exception as e:
                 messagebox.showerror("Error", f"QR Attendance failed:\n{str(e)}")
             finally:
+                if cap is not None:
+                    self.end_session("qr", cap, writer)
                 self.camera_active = False
                 self.update_status("QR Attendance Stopped")
         
@@ -589,17 +765,42 @@ class SmartAttendanceGUI:
             messagebox.showwarning("Warning", "No students registered!")
             return
         
+        # With per-course shards, only the selected class is searched
+        model = FACE_MODEL_PATH
+        shards = list_shards(os.path.dirname(FACE_MODEL_PATH))
+        if shards:
+            course = simpledialog.askstring(
+                "Course",
+                "Course for this session (blank = all students):\n" + ", ".join(shards),
+                parent=self.root
+            )
+            if course is None:
+                return
+            if course.strip():
+                model = [shard_path(os.path.dirname(FACE_MODEL_PATH), course)]
+                if not os.path.isfile(model[0]):
+                    messagebox.showerror("Error", f"No face model for course: {course}")
+                    return
+        
+        # A model trained at another face size, or a stale course shard,
+        # is reported here rather than after the camera has opened
+        try:
+            model_face_size(LABEL_MAP_PATH)
+            if isinstance(model, list):
+                check_shards(model)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        
         self.camera_active = True
         self.update_status("Face Attendance Active - Press Q to stop")
+        # No-op when the preloaded model is current; reloads after retraining
+        # or when another course is selected (recent shards stay cached)
+        self.face_model.select(model)
         
         def run_face_attendance():
+            cap = writer = None
             try:
-                recognizer = cv2.face.LBPHFaceRecognizer_create()
-                recognizer.read(FACE_MODEL_PATH)
-                
-                with open(LABEL_MAP_PATH, "rb") as f:
-                    label_map = pickle.load(f)
-                
                 face_cascade = cv2.CascadeClassifier(HAAR_PATH)
                 
                 if face_cascade.empty():
@@ -608,7 +809,9 @@ class SmartAttendanceGUI:
                     self.update_status("Haar cascade load failed")
                     return
                 
-                cap = cv2.VideoCapture(0)
+                pipeline = None
+                record = session_path(RECORD_DIR, "face") if RECORD_DIR else None
+                cap = open_camera(0, record, REPLAY_FILE, REPLAY_REALTIME)
                 
                 if not cap.isOpened():
                     messagebox.showerror("Error", "Cannot access camera!")
@@ -616,40 +819,81 @@ class SmartAttendanceGUI:
                     self.update_status("Camera access failed")
                     return
                 
+                writer = self.session_writer()
                 marked = set()
+                metrics.attach("face", cap)
+                # Per-stage latencies; press L to show them on the preview
+                timer = StageTimer(metrics=metrics)
+                writer.timer = timer
+                show_latency = LATENCY_OVERLAY
                 
                 while self.camera_active:
-                    ret, frame = cap.read()
+                    with timer.stage("capture"):
+                        ret, frame = cap.read()
                     if not ret:
                         break
                     
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                    faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+                    if pipeline is None:
+                        if self.face_model.loading():
+                            # Live preview while the model finishes loading
+                            cv2.putText(frame, "Loading face model...", (10, 30),
+                                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+                            cv2.imshow("Face Attendance - Press Q to Quit", frame)
+                            if cv2.waitKey(1) & 0xFF == ord('q'):
+                                break
+                            continue
+                        pipeline = FacePipeline(face_cascade, self.face_model.get(), timer=timer,
+                                                metrics=metrics)
                     
-                    for (x, y, w, h) in faces:
-                        face_img = gray[y:y+h, x:x+w]
-                        label, confidence = recognizer.predict(face_img)
-                        
-                        if confidence < 70:
-                            student_id = label_map.get(label, None)
-                            if student_id and student_id in students:
-                                if student_id not in marked:
-                                    student_info = students[student_id]
-                                    mark_attendance(student_id, student_info)
-                                    marked.add(student_id)
-                                    print(f"Marked: {student_id} - {student_info['name']}")
+                    with timer.stage("cvtColor"):
+                        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                    
+                    # Tracked faces keep their voted identity between frames
+                    for track in pipeline.process(gray):
+                        x, y, w, h = track.box
+                        student_id = track.identity
+                        if student_id and student_id in students and not track.marked:
+                            track.marked = True
+                            student_info = students[student_id]
+                            with timer.stage("mark"):
+                                new_mark = student_id not in marked and mark_attendance(student_id, student_info, "FACE", writer)
+                            if new_mark:
+                                marked.add(student_id)
+                                print(f"Marked: {student_id} - {student_info['name']}")
                         
                         cv2.rectangle(frame, (x,y), (x+w,y+h), (0,255,0), 2)
                     
-                    cv2.imshow("Face Attendance - Press Q to Quit", frame)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                    # Marks the writer could not save can be scanned again
+                    for record, _ in writer.take_failed():
+                        marked.discard(record["student_id"])
+                        self.update_status(f"Attendance NOT saved for {record['student_id']}")
+                        for track in pipeline.tracker.tracks:
+                            if track.identity == record["student_id"]:
+                                track.marked = False
+                    
+                    if show_latency:
+                        timer.overlay(frame)
+                    with timer.stage("imshow"):
+                        cv2.imshow("Face Attendance - Press Q to Quit", frame)
+                        key = cv2.waitKey(1) & 0xFF
+                    if key == ord('q'):
                         break
+                    if key == ord('l'):
+                        show_latency = not show_latency
                 
-                cap.release()
-                cv2.destroyAllWindows()
+                self.end_session("face", cap, writer)
+                predictions = pipeline.tracker.predictions if pipeline is not None else 0
+                latency_file = timer.dump(latency_path(ATTENDANCE_CSV, "face"), frames=cap.stats(),
+                                          writer=writer.stats(), predictions=predictions)
+                print(f"Attendance writer: {writer.stats()}")
+                print(f"Frames: {cap.stats()}")
+                print(f"Recognition calls: {predictions}")
+                print(f"Latency summary: {latency_file}")
             except Exception as e:
                 messagebox.showerror("Error", f"Face Attendance failed: {str(e)}")
             finally:
+                if cap is not None:
+                    self.end_session("face", cap, writer)
                 self.camera_active = False
                 self.update_status("Face Attendance Stopped")
         
@@ -658,7 +902,7 @@ class SmartAttendanceGUI:
         thread.start()
         
     def view_attendance(self):
-        if not os.path.isfile(ATTENDANCE_CSV):
+        if not attendance_store.exists():
             messagebox.showinfo("Info", "No attendance records found!")
             return
         
@@ -683,7 +927,7 @@ class SmartAttendanceGUI:
         refresh_btn = tk.Button(
             title_frame,
             text="🔄 Refresh",
-            command=lambda: self.refresh_attendance_view(tree),
+            command=lambda: self.refresh_attendance_view(table, count_label),
             font=("Arial", 10),
             bg=BUTTON_BG,
             fg=BUTTON_FG,
@@ -691,6 +935,31 @@ class SmartAttendanceGUI:
         )
         refresh_btn.pack(side=tk.RIGHT, padx=20)
         
+        # Filters (served from the on-disk row index, not a rescan)
+        filter_frame = tk.Frame(view_window, bg=BG_COLOR)
+        filter_frame.pack(pady=5)
+        
+        filter_entries = {}
+        for key, label in (('date', 'Date (YYYY-MM-DD):'), ('student_id', 'Student ID:'), ('course', 'Course:')):
+            tk.Label(filter_frame, text=label, font=("Arial", 10), bg=BG_COLOR).pack(side=tk.LEFT, padx=(10, 2))
+            entry = tk.Entry(filter_frame, font=("Arial", 10), width=14)
+            entry.pack(side=tk.LEFT)
+            filter_entries[key] = entry
+        
+        def apply_filters():
+            filters = {key: entry.get().strip() for key, entry in filter_entries.items()}
+            self.load_attendance_data(table, count_label, **filters)
+        
+        def clear_filters():
+            for entry in filter_entries.values():
+                entry.delete(0, tk.END)
+            self.load_attendance_data(table, count_label)
+        
+        tk.Button(filter_frame, text="Filter", command=apply_filters, font=("Arial", 10),
+                  bg=BUTTON_BG, fg=BUTTON_FG, cursor="hand2").pack(side=tk.LEFT, padx=(10, 2))
+        tk.Button(filter_frame, text="Clear", command=clear_filters, font=("Arial", 10),
+                  bg="#757575", fg=BUTTON_FG, cursor="hand2").pack(side=tk.LEFT, padx=2)
+        
         # Record count label
         count_label = tk.Label(
             view_window,
@@ -701,19 +970,18 @@ class SmartAttendanceGUI:
         )
         count_label.pack()
         
-        # Create Treeview
-        tree_frame = tk.Frame(view_window, bg=BG_COLOR)
-        tree_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+        # Virtualized table: only the visible page of rows lives in the widget
+        table = VirtualTable(view_window)
         
-        scrollbar = tk.Scrollbar(tree_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        def close_window():
+            self.stop_auto_refresh()
+            table.close()
+            view_window.destroy()
         
-        tree = ttk.Treeview(tree_frame, yscrollcommand=scrollbar.set)
-        tree.pack(fill=tk.BOTH, expand=True)
-        scrollbar.config(command=tree.yview)
+        view_window.protocol("WM_DELETE_WINDOW", close_window)
         
         # Load data
-        self.load_attendance_data(tree, count_label)
+        self.load_attendance_data(table, count_label)
         
         # Add export button
         btn_frame = tk.Frame(view_window, bg=BG_COLOR)
@@ -722,7 +990,7 @@ class SmartAttendanceGUI:
         tk.Button(
             btn_frame,
             text="📂 Open Attendance Folder",
-            command=lambda: self.open_folder(os.path.dirname(os.path.abspath(ATTENDANCE_CSV))),
+            command=lambda: self.open_folder(os.path.dirname(os.path.abspath(attendance_store.path))),
             font=("Arial", 11),
             bg=BUTTON_BG,
             fg=BUTTON_FG,
@@ -732,91 +1000,40 @@ class SmartAttendanceGUI:
         tk.Button(
             btn_frame,
             text="🔄 Auto-Refresh (ON)",
-            command=lambda: self.toggle_auto_refresh(view_window, tree, count_label),
+            command=lambda: self.toggle_auto_refresh(view_window, table, count_label),
             font=("Arial", 11),
             bg="#4CAF50",
             fg=BUTTON_FG,
             cursor="hand2"
         ).pack(side=tk.LEFT, padx=5)
     
-    def load_attendance_data(self, tree, count_label=None):
-        """Load attendance data into the treeview"""
-        # Clear existing data
-        for item in tree.get_children():
-            tree.delete(item)
-        
+    def load_attendance_data(self, table, count_label=None, **filters):
+        """Point the table at a (filtered) view of the attendance records"""
         try:
-            with open(ATTENDANCE_CSV, newline="", encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                fieldnames = reader.fieldnames or []
-                
-                # Setup columns based on what's available
-                if 'course' in fieldnames and 'email' in fieldnames:
-                    tree['columns'] = ('ID', 'Name', 'Course', 'Email', 'Date', 'Time')
-                    tree.column('#0', width=0, stretch=tk.NO)
-                    tree.column('ID', anchor=tk.W, width=100)
-                    tree.column('Name', anchor=tk.W, width=150)
-                    tree.column('Course', anchor=tk.W, width=150)
-                    tree.column('Email', anchor=tk.W, width=180)
-                    tree.column('Date', anchor=tk.W, width=120)
-                    tree.column('Time', anchor=tk.W, width=100)
-                    
-                    tree.heading('ID', text='Student ID', anchor=tk.W)
-                    tree.heading('Name', text='Name', anchor=tk.W)
-                    tree.heading('Course', text='Course', anchor=tk.W)
-                    tree.heading('Email', text='Email', anchor=tk.W)
-                    tree.heading('Date', text='Date', anchor=tk.W)
-                    tree.heading('Time', text='Time', anchor=tk.W)
-                else:
-                    # Old format without course and email
-                    tree['columns'] = ('ID', 'Name', 'Date', 'Time')
-                    tree.column('#0', width=0, stretch=tk.NO)
-                    tree.column('ID', anchor=tk.W, width=120)
-                    tree.column('Name', anchor=tk.W, width=250)
-                    tree.column('Date', anchor=tk.W, width=150)
-                    tree.column('Time', anchor=tk.W, width=150)
-                    
-                    tree.heading('ID', text='Student ID', anchor=tk.W)
-                    tree.heading('Name', text='Name', anchor=tk.W)
-                    tree.heading('Date', text='Date', anchor=tk.W)
-                    tree.heading('Time', text='Time', anchor=tk.W)
-                
-                # Load data
-                f.seek(0)  # Reset file pointer
-                reader = csv.DictReader(f)
-                row_count = 0
-                for row in reader:
-                    if 'course' in fieldnames and 'email' in fieldnames:
-                        tree.insert('', tk.END, values=(
-                            row.get('student_id', ''),
-                            row.get('name', ''),
-                            row.get('course', ''),
-                            row.get('email', ''),
-                            row.get('date', ''),
-                            row.get('time', '')
-                        ))
-                    else:
-                        tree.insert('', tk.END, values=(
-                            row.get('student_id', ''),
-                            row.get('name', ''),
-                            row.get('date', ''),
-                            row.get('time', '')
-                        ))
-                    row_count += 1
-                
-                # Update count label if provided
-                if count_label:
-                    count_label.config(text=f"Total Records: {row_count}")
-                
+            table.set_view(attendance_store.view(**filters))
+            self.update_attendance_count(table, count_label, any(filters.values()))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load attendance records:\n{str(e)}")
     
-    def refresh_attendance_view(self, tree, count_label=None):
+    def update_attendance_count(self, table, count_label, filtered=False):
+        if count_label:
+            prefix = "Matching Records" if filtered else "Total Records"
+            count_label.config(text=f"{prefix}: {table.total()}")
+    
+    def append_attendance_data(self, table, count_label=None):
+        """Index and show only the records added since the last load"""
+        try:
+            if table.refresh():
+                self.update_attendance_count(table, count_label, any(table.view.filters.values()))
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load attendance records:\n{str(e)}")
+    
+    def refresh_attendance_view(self, table, count_label=None):
         """Manually refresh the attendance view"""
-        self.load_attendance_data(tree, count_label)
+        self.append_attendance_data(table, count_label)
         self.update_status("Attendance records refreshed")
     
-    def toggle_auto_refresh(self, window, tree, count_label):
+    def toggle_auto_refresh(self, window, table, count_label):
         """Toggle auto-refresh for attendance view"""
         if not hasattr(self, 'auto_refresh_active'):
             self.auto_refresh_active = False
@@ -824,11 +1041,11 @@ class SmartAttendanceGUI:
         self.auto_refresh_active = not self.auto_refresh_active
         
         if self.auto_refresh_active:
-            self.start_auto_refresh(window, tree, count_label)
+            self.start_auto_refresh(window, table, count_label)
         else:
             self.stop_auto_refresh()
         
-    def toggle_auto_refresh(self, window, tree, count_label):
+    def toggle_auto_refresh(self, window, table, count_label):
         """Toggle auto-refresh for attendance view"""
         if not hasattr(self, 'auto_refresh_active'):
             self.auto_refresh_active = False
@@ -836,18 +1053,18 @@ class SmartAttendanceGUI:
         self.auto_refresh_active = not self.auto_refresh_active
         
         if self.auto_refresh_active:
-            self.start_auto_refresh(window, tree, count_label)
+            self.start_auto_refresh(window, table, count_label)
         else:
             self.stop_auto_refresh()
     
-    def start_auto_refresh(self, window, tree, count_label):
+    def start_auto_refresh(self, window, table, count_label):
         """Start auto-refreshing the attendance view every 3 seconds"""
         if hasattr(self, 'refresh_job'):
             self.root.after_cancel(self.refresh_job)
         
         def refresh_loop():
             if self.auto_refresh_active and window.winfo_exists():
-                self.load_attendance_data(tree, count_label)
+                self.append_attendance_data(table, count_label)
                 self.refresh_job = self.root.after(3000, refresh_loop)  # Refresh every 3 seconds
         
         refresh_loop()
@@ -861,11 +1078,24 @@ class SmartAttendanceGUI:
         if self.camera_active:
             messagebox.showwarning("Warning", "Please stop camera operations first!")
             return
+        attendance_writer.close()
+        self.face_model.close()
+        metrics.close()
         self.root.quit()
 
 # Main 
 
 if __name__ == "__main__":
+    open_attendance()
     root = tk.Tk()
     app = SmartAttendanceGUI(root)
-    root.mainloop()
\ No newline at end of file
+    # The window's close button goes through the same shutdown as Exit
+    root.protocol("WM_DELETE_WINDOW", app.exit_app)
+    metrics.start()
+    try:
+        root.mainloop()
+    finally:
+        # Flush any queued marks however the main loop ended
+        attendance_writer.close()
+        app.face_model.close()
+        metrics.close()
\ No newline at end of file
@@ -0,0 +1,297 @@
+import csv
+import os
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+from attendance_store import AttendanceStore, RECORD_FIELDS
+from roster import Roster
+
+MAGIC = b"SATTLOG1"
+HEADER_SIZE = 16
+# 16-byte fixed-width record; student IDs are stored as integers
+RECORD_DTYPE = np.dtype([
+    ("student_id", "<u4"),
+    ("method", "u1"),
+    ("pad", "V3"),
+    ("ts", "<i8"),
+])
+METHOD_CODES = {"": 0, "QR": 1, "FACE": 2}
+METHOD_NAMES = {code: name for name, code in METHOD_CODES.items()}
+
+
+def encode_id(student_id):
+    student_id = str(student_id).strip()
+    if not student_id.isdigit() or int(student_id) >= 2 ** 32:
+        return None
+    return int(student_id)
+
+
+def decode_id(value):
+    # Registered IDs are 8 digits, so restore any leading zeros
+    return f"{int(value):08d}"
+
+
+def day_bounds(date_str):
+    """Local-time [start, end) epoch seconds of a YYYY-MM-DD day"""
+    start = datetime.strptime(date_str, "%Y-%m-%d")
+    return int(start.timestamp()), int((start + timedelta(days=1)).timestamp())
+
+
+class BinaryAttendanceStore(AttendanceStore):
+    """Fixed-width binary attendance log read through mmap.
+
+    The file is a 16-byte header followed by RECORD_DTYPE records, so the
+    whole log maps as a NumPy structured array without parsing. Records
+    are appended in time order, which lets day and date-range lookups
+    binary-search the ts column; out-of-order appends (e.g. batch imports)
+    fall back to a vectorized mask. Roster fields are joined on read.
+    """
+
+    def __init__(self, path, roster_path=None):
+        self.path = path
+        self.roster = Roster(roster_path) if roster_path else None
+        self.lock = threading.Lock()
+        self.array = np.zeros(0, RECORD_DTYPE)
+        self.mapped_size = None
+        self.is_sorted = True
+
+        if not os.path.isfile(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as f:
+                f.write(MAGIC.ljust(HEADER_SIZE, b"\0"))
+        else:
+            with open(path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(f"{path} is not a binary attendance log")
+
+    def mapped(self):
+        """Zero-copy structured array over every complete record"""
+        size = os.path.getsize(self.path)
+        if size == self.mapped_size:
+            return self.array
+        count = (size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        old = self.array
+        if count:
+            array = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r",
+                              offset=HEADER_SIZE, shape=(count,))
+        else:
+            array = np.zeros(0, RECORD_DTYPE)
+
+        # Keep the sortedness flag current by checking only the new tail
+        start = len(old) if 0 < len(old) <= count else 0
+        if start == 0:
+            self.is_sorted = True
+        if self.is_sorted and count > 1:
+            ts = array["ts"][max(start - 1, 0):]
+            self.is_sorted = bool(np.all(ts[1:] >= ts[:-1]))
+
+        self.array = array
+        self.mapped_size = size
+        return array
+
+    def select(self, start_ts=None, end_ts=None):
+        """Records with start_ts <= ts < end_ts (a view when the log is sorted)"""
+        array = self.mapped()
+        ts = array["ts"]
+        if self.is_sorted:
+            lo = 0 if start_ts is None else np.searchsorted(ts, start_ts, "left")
+            hi = len(array) if end_ts is None else np.searchsorted(ts, end_ts, "left")
+            return array[lo:hi]
+        mask = np.ones(len(array), dtype=bool)
+        if start_ts is not None:
+            mask &= ts >= start_ts
+        if end_ts is not None:
+            mask &= ts < end_ts
+        return array[mask]
+
+    def select_dates(self, start_date=None, end_date=None):
+        """Records from start_date through end_date inclusive (YYYY-MM-DD)"""
+        start_ts = day_bounds(start_date)[0] if start_date else None
+        end_ts = day_bounds(end_date)[1] if end_date else None
+        return self.select(start_ts, end_ts)
+
+    def counts_by_student(self, start_date=None, end_date=None):
+        """student_id -> number of attendance records in the date range"""
+        with self.lock:
+            ids, counts = np.unique(self.select_dates(start_date, end_date)["student_id"],
+                                    return_counts=True)
+        return {decode_id(i): int(c) for i, c in zip(ids, counts)}
+
+    def _marked_on(self, sid, date):
+        return bool(np.any(self.select(*day_bounds(date))["student_id"] == sid))
+
+    def is_marked(self, student_id, date=None):
+        sid = encode_id(student_id)
+        if sid is None:
+            return False
+        with self.lock:
+            return self._marked_on(sid, date or datetime.now().strftime("%Y-%m-%d"))
+
+    def mark_many(self, records):
+        results = []
+        out = np.zeros(len(records), RECORD_DTYPE)
+        count = 0
+        seen = set()
+        with self.lock:
+            for record in records:
+                sid = encode_id(record["student_id"])
+                if sid is None:
+                    print(f"WARNING: binary log only stores numeric IDs, skipping {record['student_id']!r}")
+                    results.append(False)
+                    continue
+                key = (sid, record["date"])
+                if key in seen or self._marked_on(*key):
+                    results.append(False)
+                    continue
+                seen.add(key)
+                out["student_id"][count] = sid
+                out["method"][count] = METHOD_CODES.get(record.get("method", ""), 0)
+                out["ts"][count] = int(datetime.strptime(
+                    f"{record['date']} {record['time']}", "%Y-%m-%d %H:%M:%S").timestamp())
+                count += 1
+                results.append(True)
+            if count:
+                with open(self.path, "ab") as f:
+                    f.write(out[:count].tobytes())
+        return results
+
+    def to_records(self, array):
+        students = self.roster.refresh() if self.roster is not None else {}
+        for sid, method, ts in zip(array["student_id"], array["method"], array["ts"]):
+            student_id = decode_id(sid)
+            student = students.get(student_id, {})
+            when = datetime.fromtimestamp(int(ts))
+            yield {
+                "student_id": student_id,
+                "method": METHOD_NAMES.get(int(method), ""),
+                "name": student.get("name", ""),
+                "course": student.get("course", ""),
+                "email": student.get("email", ""),
+                "date": when.strftime("%Y-%m-%d"),
+                "time": when.strftime("%H:%M:%S"),
+            }
+
+    def records(self, date=None):
+        with self.lock:
+            array = self.select(*day_bounds(date)) if date else self.mapped()
+        return self.to_records(array)
+
+    def view(self, **filters):
+        return BinaryRecordsView(self, **filters)
+
+
+class BinaryRecordsView:
+    """Paged view straight over the memory-mapped log.
+
+    Filters are vectorized masks over the student_id and ts columns (a
+    course becomes the set of its students' IDs); only new records are
+    masked on refresh, and only the fetched page is decoded into dicts.
+    """
+
+    def __init__(self, store, **filters):
+        self.store = store
+        self.filters = {k: v.strip() for k, v in filters.items() if v and v.strip()}
+        self.count = 0
+        # Matching record positions, or None when every record matches
+        self.rows = None if not self.filters else np.zeros(0, dtype=np.int64)
+        self.refresh()
+
+    @property
+    def fields(self):
+        return RECORD_FIELDS
+
+    def __len__(self):
+        return self.count if self.rows is None else len(self.rows)
+
+    def _match(self, array):
+        mask = np.ones(len(array), dtype=bool)
+        if "student_id" in self.filters:
+            mask &= array["student_id"] == (encode_id(self.filters["student_id"]) or -1)
+        if "date" in self.filters:
+            start, end = day_bounds(self.filters["date"])
+            mask &= (array["ts"] >= start) & (array["ts"] < end)
+        if "course" in self.filters:
+            course = self.filters["course"].lower()
+            students = self.store.roster.refresh() if self.store.roster is not None else {}
+            ids = [encode_id(sid) for sid, s in students.items()
+                   if s.get("course", "").strip().lower() == course]
+            mask &= np.isin(array["student_id"], [i for i in ids if i is not None])
+        return np.flatnonzero(mask)
+
+    def refresh(self):
+        with self.store.lock:
+            array = self.store.mapped()
+        if len(array) == self.count:
+            return False
+        # Records are only ever appended; a shorter log was replaced, so start over
+        start = self.count if len(array) > self.count else 0
+        if self.rows is not None:
+            kept = self.rows if start else self.rows[:0]
+            self.rows = np.concatenate([kept, self._match(array[start:]) + start])
+        self.count = len(array)
+        return True
+
+    def fetch(self, start, stop):
+        with self.store.lock:
+            array = self.store.mapped()
+        if self.rows is None:
+            page = array[start:min(stop, self.count)]
+        else:
+            page = array[self.rows[start:stop]]
+        return list(self.store.to_records(page))
+
+    def close(self):
+        pass
+
+
+def import_csv(csv_path, bin_path, chunk_rows=100000):
+    """Stream any known CSV attendance layout into a binary log.
+
+    Rows are appended as they are, duplicates included; returns
+    (rows imported, rows skipped).
+    """
+    from migrate_attendance import convert_row
+
+    BinaryAttendanceStore(bin_path)  # writes the header for a new file
+    imported = skipped = 0
+    chunk = []
+
+    def flush():
+        out = np.zeros(len(chunk), RECORD_DTYPE)
+        out["student_id"] = [c[0] for c in chunk]
+        out["method"] = [c[1] for c in chunk]
+        out["ts"] = [c[2] for c in chunk]
+        with open(bin_path, "ab") as f:
+            f.write(out.tobytes())
+        chunk.clear()
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        header = None
+        for row in csv.reader(f):
+            if row and row[0] == "student_id":
+                header = row
+                continue
+            compact = convert_row(row, header)
+            sid = encode_id(compact[0]) if compact else None
+            if sid is None:
+                skipped += bool(row)
+                continue
+            chunk.append((sid, METHOD_CODES.get(compact[1], 0), compact[2]))
+            imported += 1
+            if len(chunk) >= chunk_rows:
+                flush()
+    if chunk:
+        flush()
+    return imported, skipped
+
+
+def export_csv(bin_path, csv_path, roster_path=None):
+    """Write a binary log out as full CSV rows; returns the row count"""
+    store = BinaryAttendanceStore(bin_path, roster_path)
+    count = 0
+    with open(csv_path, "w", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out)
+        writer.writerow(RECORD_FIELDS)
+        for record in store.records():
+            writer.writerow([record[field] for field in RECORD_FIELDS])
+            count += 1
+    return count
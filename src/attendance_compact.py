@@ -0,0 +1,105 @@
+from datetime import datetime
+from attendance_index import AttendanceIndex
+from attendance_store import CsvAttendanceStore, RECORD_FIELDS
+from array import array
+from attendance_view import CsvRecordsView, RowIndex
+from roster import Roster
+
+# Columns of a compact attendance event
+COMPACT_FIELDS = ["student_id", "method", "ts"]
+
+
+def to_epoch(date_str, time_str):
+    """Local YYYY-MM-DD / HH:MM:SS to integer epoch seconds"""
+    return int(datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M:%S").timestamp())
+
+
+def epoch_date(row):
+    # Date of a raw compact row, or None for the header / malformed rows
+    try:
+        return datetime.fromtimestamp(int(row[2])).strftime("%Y-%m-%d")
+    except (IndexError, ValueError):
+        return None
+
+
+class CompactCsvStore(CsvAttendanceStore):
+    """Normalized event log holding only student_id, method and epoch ts.
+
+    Name, course and email are not repeated on every row; they are joined
+    from students.csv whenever records are read or exported.
+    """
+
+    def __init__(self, path, roster_path):
+        self.roster = Roster(roster_path)
+        super().__init__(path, COMPACT_FIELDS, header=True)
+
+    def make_index(self):
+        return AttendanceIndex(self.path, id_column=0, row_date=epoch_date)
+
+    def to_row(self, record):
+        return [record["student_id"], record.get("method", ""),
+                to_epoch(record["date"], record["time"])]
+
+    def from_row(self, row):
+        try:
+            when = datetime.fromtimestamp(int(row["ts"]))
+        except (KeyError, TypeError, ValueError):
+            print(f"Skipping malformed attendance row in {self.path}: {row}")
+            return None
+        student = self.roster.get(row["student_id"], {})
+        return {
+            "student_id": row["student_id"],
+            "method": row.get("method", ""),
+            "name": student.get("name", ""),
+            "course": student.get("course", ""),
+            "email": student.get("email", ""),
+            "date": when.strftime("%Y-%m-%d"),
+            "time": when.strftime("%H:%M:%S"),
+        }
+
+    def records(self, date=None):
+        self.roster.refresh()
+        return super().records(date)
+
+    def view(self, **filters):
+        if self.row_index is None:
+            self.row_index = RowIndex(self.path, self.fields, self.header, row_date=epoch_date)
+        return CompactRecordsView(self, **filters)
+
+
+class CompactRecordsView(CsvRecordsView):
+    """Paged view over the compact log's RowIndex.
+
+    Dates are indexed from the ts column; a course filter becomes the rows
+    of that course's students in the roster. Roster fields are joined only
+    into the fetched page.
+    """
+
+    def __init__(self, store, **filters):
+        self.store = store
+        super().__init__(store.row_index, **filters)
+
+    @property
+    def fields(self):
+        return RECORD_FIELDS
+
+    def query(self):
+        filters = dict(self.filters)
+        course = (filters.pop("course", None) or "").strip().lower()
+        rows = self.index.query(**filters)
+        if not course:
+            return rows
+        postings = self.index.postings["student_id"]
+        students = self.store.roster.refresh()
+        wanted = set()
+        for student_id, student in students.items():
+            if student.get("course", "").strip().lower() == course:
+                wanted.update(postings.get(student_id, ()))
+        if rows is not None:
+            wanted.intersection_update(rows)
+        return array("I", sorted(wanted))
+
+    def fetch(self, start, stop):
+        self.store.roster.refresh()
+        records = (self.store.from_row(row) for row in super().fetch(start, stop))
+        return [record for record in records if record is not None]
@@ -0,0 +1,69 @@
+import csv
+import os
+from utils import get_today
+
+
+class AttendanceIndex:
+    """In-memory sets of the student IDs already marked, per date.
+
+    The attendance file is scanned once per day instead of once per
+    recognized face, so duplicate checks stay O(1) however long the
+    log gets. Other dates (batch marks carry the recording's date) are
+    loaded the first time they are asked about and then kept. Call
+    add() after every successful write.
+    """
+
+    def __init__(self, path, id_column=0, date_column=2, row_date=None):
+        self.path = path
+        self.id_column = id_column
+        self.date_column = date_column
+        # Optional function deriving the date from a row (e.g. from a timestamp)
+        self.row_date = row_date
+        self.date = None
+        self.marked = set()
+        # date -> IDs marked that day, for dates other than today
+        self.days = {}
+
+    def _date_of(self, row):
+        if self.row_date is not None:
+            return self.row_date(row)
+        return row[self.date_column] if len(row) > self.date_column else None
+
+    def _scan(self, date):
+        marked = set()
+        if os.path.exists(self.path):
+            with open(self.path, "r", newline="") as f:
+                for row in csv.reader(f):
+                    if row and self._date_of(row) == date:
+                        marked.add(row[self.id_column])
+        return marked
+
+    def _check_date(self):
+        # Rebuild when the day rolls over (or on first use)
+        today = get_today()
+        if today != self.date:
+            if self.date is not None:
+                self.days[self.date] = self.marked
+            self.marked = self.days.pop(today, None) or self._scan(today)
+            self.date = today
+
+    def _day(self, date):
+        self._check_date()
+        if date is None or date == self.date:
+            return self.marked
+        if date not in self.days:
+            self.days[date] = self._scan(date)
+        return self.days[date]
+
+    def is_marked(self, student_id, date=None):
+        return student_id in self._day(date)
+
+    def add(self, student_id, date=None):
+        self._day(date).add(student_id)
+
+    def __contains__(self, student_id):
+        return self.is_marked(student_id)
+
+    def __len__(self):
+        self._check_date()
+        return len(self.marked)
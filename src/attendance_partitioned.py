@@ -0,0 +1,250 @@
+import csv
+import os
+from datetime import date as Date
+from attendance_store import AttendanceStore, CsvAttendanceStore, SCRIPT_FIELDS
+from config import ATTENDANCE_PARTITION
+
+ARCHIVE_DIR = "archive"
+# Segment stores kept open (today's plus a few recent ones)
+MAX_OPEN_SEGMENTS = 8
+
+
+def segment_key(date_str, partition=ATTENDANCE_PARTITION):
+    """Segment name for a YYYY-MM-DD date: the day itself or its ISO week"""
+    if partition == "week":
+        year, week, _ = Date.fromisoformat(date_str).isocalendar()
+        return f"{year}-W{week:02d}"
+    return date_str
+
+
+def archive_key(date_str):
+    # Archives are monthly, whatever the segment size
+    return date_str[:7]
+
+
+class PartitionedCsvStore(AttendanceStore):
+    """Attendance split into one CSV segment per day (or week).
+
+    Writers append only to the segment of the record's date and readers
+    open only the segments a query needs. Old segments are merged into
+    monthly files under archive/ by compact() (src/compact_attendance.py).
+    """
+
+    def __init__(self, directory, fields=SCRIPT_FIELDS, header=False,
+                 partition=ATTENDANCE_PARTITION):
+        self.path = directory
+        self.fields = list(fields)
+        self.header = header
+        self.partition = partition
+        self.segments = {}
+        self.archive_cache = {}
+        os.makedirs(os.path.join(directory, ARCHIVE_DIR), exist_ok=True)
+
+    def segment_path(self, key):
+        return os.path.join(self.path, f"{key}.csv")
+
+    def archive_path(self, key):
+        return os.path.join(self.path, ARCHIVE_DIR, f"{key}.csv")
+
+    def segment(self, date_str):
+        key = segment_key(date_str, self.partition)
+        store = self.segments.get(key)
+        if store is None:
+            if len(self.segments) >= MAX_OPEN_SEGMENTS:
+                self.segments.clear()
+            store = CsvAttendanceStore(self.segment_path(key), self.fields, self.header)
+            self.segments[key] = store
+        return store
+
+    def is_marked(self, student_id, date=None):
+        date = date or self._today()
+        if self.segment(date).is_marked(student_id, date):
+            return True
+        # Earlier dates may already have been compacted into the archive
+        return date < self._today() and (student_id, date) in self.archived(date)
+
+    def archived(self, date_str):
+        """(student_id, date) pairs in a monthly archive, cached per mtime"""
+        path = self.archive_path(archive_key(date_str))
+        mtime = os.path.getmtime(path) if os.path.isfile(path) else None
+        cached = self.archive_cache.get(path)
+        if cached is None or cached[0] != mtime:
+            pairs = set()
+            if mtime is not None:
+                archive = CsvAttendanceStore(path, self.fields, self.header)
+                pairs = {(r.get("student_id"), r.get("date")) for r in archive.records()}
+            cached = (mtime, pairs)
+            self.archive_cache[path] = cached
+        return cached[1]
+
+    def mark_many(self, records):
+        results = [None] * len(records)
+        by_date = {}
+        for i, record in enumerate(records):
+            if self.is_marked(record["student_id"], record["date"]):
+                results[i] = False
+            else:
+                by_date.setdefault(record["date"], []).append(i)
+        for date, positions in by_date.items():
+            written = self.segment(date).mark_many([records[i] for i in positions])
+            for i, ok in zip(positions, written):
+                results[i] = ok
+        return results
+
+    def _today(self):
+        return Date.today().isoformat()
+
+    def records(self, date=None):
+        for path in self.view_paths(date):
+            yield from CsvAttendanceStore(path, self.fields, self.header).records(date)
+
+    def view(self, **filters):
+        return PartitionedRecordsView(self, **filters)
+
+    def view_paths(self, date=None):
+        """Files holding a date's records (all files without a date), oldest first"""
+        if date:
+            paths = [self.archive_path(archive_key(date)),
+                     self.segment_path(segment_key(date, self.partition))]
+            return [p for p in paths if os.path.isfile(p)]
+        return self.archive_paths() + self.segment_paths()
+
+    def segment_paths(self):
+        names = sorted(n for n in os.listdir(self.path) if n.endswith(".csv"))
+        return [os.path.join(self.path, n) for n in names]
+
+    def archive_paths(self):
+        folder = os.path.join(self.path, ARCHIVE_DIR)
+        names = sorted(n for n in os.listdir(folder) if n.endswith(".csv"))
+        return [os.path.join(folder, n) for n in names]
+
+    def exists(self):
+        return bool(self.segment_paths() or self.archive_paths())
+
+    def compact(self, before):
+        """Merge segments older than the `before` date into monthly archives.
+
+        Rows are de-duplicated on (student_id, date), keeping the earliest
+        one, so duplicates left behind by older sessions disappear.
+        Returns (segments merged, rows kept, duplicates dropped).
+        """
+        before_key = segment_key(before, self.partition)
+        old = [p for p in self.segment_paths()
+               if os.path.basename(p)[:-4] < before_key]
+        if not old:
+            return 0, 0, 0
+
+        # Group rows by archive month, starting from what is already archived
+        months = {}
+        for path in old:
+            for record in CsvAttendanceStore(path, self.fields, self.header).records():
+                month = archive_key(record.get("date", ""))
+                if month not in months:
+                    archived = CsvAttendanceStore(self.archive_path(month), self.fields, self.header)
+                    months[month] = list(archived.records())
+                months[month].append(record)
+
+        kept = dropped = 0
+        for month, rows in months.items():
+            seen = set()
+            unique = []
+            for record in sorted(rows, key=lambda r: (r.get("date", ""), r.get("time", ""))):
+                key = (record.get("student_id"), record.get("date"))
+                if key in seen:
+                    dropped += 1
+                    continue
+                seen.add(key)
+                unique.append(record)
+            kept += len(unique)
+
+            archive_path = self.archive_path(month)
+            tmp_path = archive_path + ".tmp"
+            with open(tmp_path, "w", newline="") as f:
+                writer = csv.writer(f)
+                if self.header:
+                    writer.writerow(self.fields)
+                writer.writerows([r.get(field, "") for field in self.fields] for r in unique)
+            os.replace(tmp_path, archive_path)
+
+        for path in old:
+            os.remove(path)
+            if os.path.isfile(path + ".idx"):
+                os.remove(path + ".idx")
+        self.segments.clear()
+        self.archive_cache.clear()
+        return len(old), kept, dropped
+
+    def import_log(self, csv_path, fields=None, header=None):
+        """Split an existing single-file attendance log into segments"""
+        source = CsvAttendanceStore(csv_path, fields or self.fields,
+                                    self.header if header is None else header)
+        batch = []
+        imported = 0
+        for record in source.records():
+            if not record.get("date"):
+                continue
+            batch.append(record)
+            if len(batch) >= 10000:
+                imported += sum(self.mark_many(batch))
+                batch = []
+        if batch:
+            imported += sum(self.mark_many(batch))
+        return imported
+
+
+class PartitionedRecordsView:
+    """Archive and segment views chained in date order.
+
+    Each file is paged through its own RowIndex, so a refresh only indexes
+    rows appended since the last one; files created or removed (a new day,
+    compaction) are picked up by listing the folder.
+    """
+
+    def __init__(self, store, **filters):
+        self.store = store
+        self.filters = filters
+        # path -> CsvRecordsView, in view_paths() order
+        self.views = {}
+        self.refresh()
+
+    @property
+    def fields(self):
+        for view in self.views.values():
+            return view.fields
+        return self.store.fields
+
+    def __len__(self):
+        return sum(len(view) for view in self.views.values())
+
+    def refresh(self):
+        changed = False
+        views = {}
+        for path in self.store.view_paths(self.filters.get("date")):
+            view = self.views.pop(path, None)
+            if view is None:
+                view = CsvAttendanceStore(path, self.store.fields, self.store.header).view(**self.filters)
+                changed = changed or len(view) > 0
+            else:
+                changed = view.refresh() or changed
+            views[path] = view
+        # Views left over are of files merged away by compact(); they are
+        # dropped without saving an index for a file that no longer exists
+        changed = changed or any(len(view) for view in self.views.values())
+        self.views = views
+        return changed
+
+    def fetch(self, start, stop):
+        records = []
+        offset = 0
+        for view in self.views.values():
+            count = len(view)
+            if start < offset + count and stop > offset:
+                records.extend(view.fetch(max(start - offset, 0), stop - offset))
+            offset += count
+            if offset >= stop:
+                break
+        return records
+
+    def close(self):
+        for view in self.views.values():
+            view.close()
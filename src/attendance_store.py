@@ -0,0 +1,243 @@
+import csv
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from attendance_index import AttendanceIndex
+from attendance_view import CsvRecordsView, ListRecordsView, RowIndex, SqliteRecordsView
+from config import ATTENDANCE_BACKEND
+
+# Keys of a normalized attendance record
+RECORD_FIELDS = ["student_id", "method", "name", "course", "email", "date", "time"]
+
+# Column layouts of the existing CSV files
+SCRIPT_FIELDS = ["student_id", "method", "date", "time"]  # src/ scripts, no header
+GUI_FIELDS = ["student_id", "name", "course", "email", "date", "time"]  # gui_main.py
+
+
+def make_record(student_id, method="", student=None, when=None):
+    """Build a normalized record dict from a student ID and roster entry"""
+    when = when or datetime.now()
+    student = student if isinstance(student, dict) else {"name": student or ""}
+    return {
+        "student_id": student_id,
+        "method": method,
+        "name": student.get("name", ""),
+        "course": student.get("course", ""),
+        "email": student.get("email", ""),
+        "date": when.strftime("%Y-%m-%d"),
+        "time": when.strftime("%H:%M:%S"),
+    }
+
+
+class AttendanceStore:
+    """Interface every attendance backend implements.
+
+    mark() and mark_many() return False for a student already marked on
+    the record's date, so callers never need their own duplicate check.
+    """
+
+    path = None
+    fields = RECORD_FIELDS
+
+    def mark(self, student_id, method="", student=None, when=None):
+        return self.mark_many([make_record(student_id, method, student, when)])[0]
+
+    def mark_many(self, records):
+        raise NotImplementedError
+
+    def is_marked(self, student_id, date=None):
+        raise NotImplementedError
+
+    def records(self, date=None):
+        raise NotImplementedError
+
+    def view(self, **filters):
+        """Paged, filterable view of the records (date, student_id, course)"""
+        return ListRecordsView(self, **filters)
+
+    def exists(self):
+        return os.path.isfile(self.path)
+
+    def close(self):
+        pass
+
+
+class CsvAttendanceStore(AttendanceStore):
+    """Append-only CSV file; duplicate checks are answered from memory."""
+
+    def __init__(self, path, fields=SCRIPT_FIELDS, header=False):
+        self.path = path
+        self.fields = list(fields)
+        self.header = header
+        self.index = self.make_index()
+        self.row_index = None
+        self.lock = threading.Lock()
+
+    def make_index(self):
+        return AttendanceIndex(
+            self.path,
+            id_column=self.fields.index("student_id"),
+            date_column=self.fields.index("date"),
+        )
+
+    def is_marked(self, student_id, date=None):
+        return self.index.is_marked(student_id, date)
+
+    def mark_many(self, records):
+        results = []
+        rows = []
+        seen = set()
+        with self.lock:
+            for record in records:
+                key = (record["student_id"], record["date"])
+                if key in seen or self.is_marked(*key):
+                    results.append(False)
+                    continue
+                seen.add(key)
+                rows.append(self.to_row(record))
+                self.index.add(record["student_id"], record["date"])
+                results.append(True)
+
+            if rows:
+                write_header = self.header and not os.path.isfile(self.path)
+                with open(self.path, "a", newline="") as f:
+                    writer = csv.writer(f)
+                    if write_header:
+                        writer.writerow(self.fields)
+                    writer.writerows(rows)
+        return results
+
+    def records(self, date=None):
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, newline="", encoding="utf-8") as f:
+            if self.header:
+                # Trust the file's own header so older layouts still read correctly
+                reader = csv.DictReader(f)
+            else:
+                reader = (dict(zip(self.fields, row)) for row in csv.reader(f) if row)
+            for record in reader:
+                record = self.from_row(record)
+                if record is None:
+                    continue
+                if date is None or record.get("date") == date:
+                    yield record
+
+    def to_row(self, record):
+        """CSV row written for a normalized record"""
+        return [record.get(field, "") for field in self.fields]
+
+    def from_row(self, row):
+        """Normalized record for a row read back as a dict of file columns
+        (None to skip an unreadable row)"""
+        return row
+
+    def view(self, **filters):
+        if self.row_index is None:
+            self.row_index = RowIndex(self.path, self.fields, self.header)
+        return CsvRecordsView(self.row_index, **filters)
+
+
+class SqliteAttendanceStore(AttendanceStore):
+    """SQLite database in WAL mode.
+
+    The UNIQUE (student_id, date) index rejects duplicates inside the
+    database, so several processes can mark attendance into the same
+    file concurrently.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS attendance ("
+                " id INTEGER PRIMARY KEY,"
+                " student_id TEXT NOT NULL,"
+                " method TEXT NOT NULL DEFAULT '',"
+                " name TEXT NOT NULL DEFAULT '',"
+                " course TEXT NOT NULL DEFAULT '',"
+                " email TEXT NOT NULL DEFAULT '',"
+                " date TEXT NOT NULL,"
+                " time TEXT NOT NULL)"
+            )
+            self.conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_student_date"
+                " ON attendance (student_id, date)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance (date)"
+            )
+
+    def is_marked(self, student_id, date=None):
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM attendance WHERE student_id = ? AND date = ?",
+                (student_id, date),
+            ).fetchone()
+        return row is not None
+
+    def mark_many(self, records):
+        results = []
+        with self.lock, self.conn:
+            for record in records:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO attendance"
+                    " (student_id, method, name, course, email, date, time)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [record.get(field, "") for field in RECORD_FIELDS],
+                )
+                results.append(cursor.rowcount == 1)
+        return results
+
+    def records(self, date=None):
+        query = "SELECT %s FROM attendance" % ", ".join(RECORD_FIELDS)
+        params = ()
+        if date is not None:
+            query += " WHERE date = ?"
+            params = (date,)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY id", params).fetchall()
+        for row in rows:
+            yield dict(zip(RECORD_FIELDS, row))
+
+    def view(self, **filters):
+        return SqliteRecordsView(self, **filters)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def open_store(csv_path, fields=SCRIPT_FIELDS, header=False, backend=None, roster_path=None):
+    """Open the configured backend for an attendance log.
+
+    csv_path is the historical CSV location; other backends keep their
+    files next to it (attendance.db for SQLite, attendance/ for the
+    date-partitioned segments, attendance_events.csv for compact rows,
+    attendance.bin for the binary log).
+    roster_path defaults to students.csv in the same folder.
+    """
+    backend = backend or ATTENDANCE_BACKEND
+    base = os.path.splitext(csv_path)[0]
+    if backend == "csv":
+        return CsvAttendanceStore(csv_path, fields, header)
+    if backend == "sqlite":
+        return SqliteAttendanceStore(base + ".db")
+    if backend == "partitioned":
+        from attendance_partitioned import PartitionedCsvStore
+        return PartitionedCsvStore(base, fields, header)
+    if backend == "compact":
+        from attendance_compact import CompactCsvStore
+        roster_path = roster_path or os.path.join(os.path.dirname(csv_path), "students.csv")
+        return CompactCsvStore(base + "_events.csv", roster_path)
+    if backend == "binary":
+        from attendance_binary import BinaryAttendanceStore
+        roster_path = roster_path or os.path.join(os.path.dirname(csv_path), "students.csv")
+        return BinaryAttendanceStore(base + ".bin", roster_path)
+    raise ValueError(f"Unknown attendance backend: {backend}")
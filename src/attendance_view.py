@@ -0,0 +1,292 @@
+import csv
+import os
+import pickle
+from array import array
+
+# Columns the row index keeps postings for, so filters never rescan the log
+INDEXED_FIELDS = ("date", "student_id", "course")
+
+
+def _key(field, value):
+    value = (value or "").strip()
+    return value.lower() if field == "course" else value
+
+
+def split_records(data):
+    """Complete CSV records at the start of data, as raw bytes with their
+    line endings. A quoted field may hold newlines, so a record only ends
+    at a newline outside quotes (an even number of quote characters so far)."""
+    records = []
+    start = pos = quotes = 0
+    while True:
+        end = data.find(b"\n", pos)
+        if end < 0:
+            return records
+        quotes += data.count(b'"', pos, end)
+        pos = end + 1
+        if quotes % 2 == 0:
+            records.append(data[start:pos])
+            start = pos
+            quotes = 0
+
+
+class RowIndex:
+    """On-disk index of row byte offsets for a CSV attendance log.
+
+    offsets[n] is where data row n starts, so any page of rows can be read
+    with a seek. postings[field][value] lists the row numbers having that
+    value. The index is saved next to the log (attendance.csv.idx) and
+    extended from the last indexed byte when the log grows; it is rebuilt
+    when the log is truncated or replaced. row_date derives the date
+    postings for logs without a date column (e.g. from a timestamp).
+    """
+
+    def __init__(self, path, fields, header, index_path=None, row_date=None):
+        self.path = path
+        self.fields = list(fields)
+        self.header = header
+        self.index_path = index_path or path + ".idx"
+        self.row_date = row_date
+        self._reset(None)
+        self._load()
+
+    def _reset(self, identity):
+        self.identity = identity
+        self.size = 0
+        self.fieldnames = None
+        self.offsets = array("Q")
+        self.postings = {field: {} for field in INDEXED_FIELDS}
+        self.dirty = False
+
+    def _load(self):
+        if not os.path.isfile(self.index_path):
+            return
+        try:
+            with open(self.index_path, "rb") as f:
+                state = pickle.load(f)
+            self.identity = state["identity"]
+            self.size = state["size"]
+            self.fieldnames = state["fieldnames"]
+            self.offsets = state["offsets"]
+            self.postings = state["postings"]
+        except Exception as e:
+            print(f"WARNING: ignoring unreadable row index {self.index_path}: {e}")
+            self._reset(None)
+
+    def save(self):
+        if not self.dirty:
+            return
+        state = {
+            "identity": self.identity,
+            "size": self.size,
+            "fieldnames": self.fieldnames,
+            "offsets": self.offsets,
+            "postings": self.postings,
+        }
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.index_path)
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def refresh(self):
+        """Index rows appended since the last call; returns True if anything changed"""
+        if not os.path.isfile(self.path):
+            changed = len(self.offsets) > 0
+            self._reset(None)
+            return changed
+        st = os.stat(self.path)
+        identity = (st.st_dev, st.st_ino)
+        reset = identity != self.identity or st.st_size < self.size
+        if reset:
+            self._reset(identity)
+            self.dirty = True
+        if st.st_size == self.size:
+            return reset
+
+        with open(self.path, "rb") as f:
+            f.seek(self.size)
+            data = f.read()
+        # Only index complete records; a half-written row waits for the next call
+        records = split_records(data)
+        end = sum(len(record) for record in records)
+        rows = csv.reader([record.decode("utf-8").rstrip("\r\n") for record in records])
+
+        pos = self.size
+        columns = None
+        for record, row in zip(records, rows):
+            start = pos
+            pos += len(record)
+            if not row:
+                continue
+            if self.fieldnames is None:
+                self.fieldnames = row if self.header else self.fields
+                if self.header:
+                    continue
+            if columns is None:
+                columns = [(f, self.fieldnames.index(f)) for f in INDEXED_FIELDS
+                           if f in self.fieldnames]
+                derive_date = self.row_date is not None and "date" not in self.fieldnames
+            n = len(self.offsets)
+            self.offsets.append(start)
+            for field, col in columns:
+                if col < len(row):
+                    self.postings[field].setdefault(_key(field, row[col]), array("I")).append(n)
+            if derive_date:
+                date = self.row_date(row)
+                if date:
+                    self.postings["date"].setdefault(date, array("I")).append(n)
+
+        self.size += end
+        self.dirty = True
+        return True
+
+    def query(self, **filters):
+        """Row numbers matching every non-empty filter, or None for all rows"""
+        result = None
+        for field, value in filters.items():
+            if not value:
+                continue
+            rows = self.postings.get(field, {}).get(_key(field, value), array("I"))
+            if result is None:
+                result = rows
+            else:
+                keep = set(rows)
+                result = array("I", (n for n in result if n in keep))
+        return result
+
+    def read(self, row_numbers):
+        """Parse the given rows into dicts, seeking straight to each one"""
+        records = []
+        with open(self.path, "rb") as f:
+            for n in row_numbers:
+                f.seek(self.offsets[n])
+                line = f.readline()
+                while line.count(b'"') % 2:
+                    # Quoted field with a newline: the record goes on
+                    more = f.readline()
+                    if not more:
+                        break
+                    line += more
+                row = next(csv.reader([line.decode("utf-8").rstrip("\r\n")]), [])
+                records.append(dict(zip(self.fieldnames, row)))
+        return records
+
+
+class CsvRecordsView:
+    """Filtered, paged window onto a CSV log through its RowIndex"""
+
+    def __init__(self, index, **filters):
+        self.index = index
+        self.filters = filters
+        self.rows = None
+        self.refresh()
+        self.rows = self.query()
+
+    @property
+    def fields(self):
+        return self.index.fieldnames or self.index.fields
+
+    def __len__(self):
+        return len(self.index) if self.rows is None else len(self.rows)
+
+    def fetch(self, start, stop):
+        stop = min(stop, len(self))
+        if start >= stop:
+            return []
+        if self.rows is None:
+            return self.index.read(range(start, stop))
+        return self.index.read(self.rows[start:stop])
+
+    def query(self):
+        return self.index.query(**self.filters)
+
+    def refresh(self):
+        changed = self.index.refresh()
+        if changed and self.rows is not None:
+            self.rows = self.query()
+        return changed
+
+    def close(self):
+        self.index.save()
+
+
+class ListRecordsView:
+    """Fallback view for backends without a paged query path"""
+
+    def __init__(self, store, **filters):
+        self.store = store
+        self.filters = {k: v for k, v in filters.items() if v}
+        self.rows = []
+        self.refresh()
+
+    @property
+    def fields(self):
+        return self.store.fields
+
+    def __len__(self):
+        return len(self.rows)
+
+    def fetch(self, start, stop):
+        return self.rows[start:stop]
+
+    def refresh(self):
+        rows = [r for r in self.store.records(self.filters.get("date"))
+                if all(_key(k, r.get(k)) == _key(k, v) for k, v in self.filters.items())]
+        changed = len(rows) != len(self.rows)
+        self.rows = rows
+        return changed
+
+    def close(self):
+        pass
+
+
+class SqliteRecordsView:
+    """Paged view over the SQLite backend using its date/student indexes"""
+
+    columns = ("student_id", "method", "name", "course", "email", "date", "time")
+
+    def __init__(self, store, **filters):
+        self.store = store
+        self.filters = {k: v.strip() for k, v in filters.items() if v and v.strip()}
+        self.ids = array("q")
+        self.refresh()
+
+    @property
+    def fields(self):
+        return list(self.columns)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def refresh(self):
+        # Only ids after the last one seen are fetched on each refresh
+        where = ["id > ?"]
+        params = [self.ids[-1] if self.ids else 0]
+        for field, value in self.filters.items():
+            if field == "course":
+                where.append("course = ? COLLATE NOCASE")
+            else:
+                where.append(f"{field} = ?")
+            params.append(value)
+        query = "SELECT id FROM attendance WHERE %s ORDER BY id" % " AND ".join(where)
+        with self.store.lock:
+            new_ids = [row[0] for row in self.store.conn.execute(query, params)]
+        self.ids.extend(new_ids)
+        return bool(new_ids)
+
+    def fetch(self, start, stop):
+        ids = self.ids[start:stop]
+        if not ids:
+            return []
+        query = "SELECT %s FROM attendance WHERE id IN (%s) ORDER BY id" % (
+            ", ".join(self.columns), ", ".join("?" * len(ids)))
+        with self.store.lock:
+            rows = self.store.conn.execute(query, list(ids)).fetchall()
+        return [dict(zip(self.columns, row)) for row in rows]
+
+    def close(self):
+        pass
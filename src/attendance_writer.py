@@ -0,0 +1,146 @@
+import atexit
+import queue
+import threading
+import time
+from attendance_store import make_record
+from config import WRITER_BATCH_SIZE, WRITER_FLUSH_MS, WRITER_QUEUE_SIZE
+
+_STOP = object()
+
+
+class AttendanceWriter:
+    """Group-commit writer that keeps storage I/O off the camera loop.
+
+    mark() decides immediately whether a student is new (so the loop can
+    show feedback) and queues the record; a background thread writes
+    pending records with a single store.mark_many() call once batch_size
+    records are waiting or flush_ms has passed. close() flushes whatever
+    is left; it also runs at interpreter exit, so marks already reported
+    are written even when the loop dies on Ctrl+C or an exception.
+
+    A queued mark can still fail to be saved (a write error, or the store
+    rejecting the row because another process marked the student first).
+    Such records are logged and collected; loops call take_failed() to
+    find out which of the marks they reported were not written.
+    """
+
+    def __init__(self, store, batch_size=WRITER_BATCH_SIZE,
+                 flush_ms=WRITER_FLUSH_MS, max_queue=WRITER_QUEUE_SIZE):
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_ms / 1000.0
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.pending = set()
+        self.lock = threading.Lock()
+
+        # Counters for sizing the queue and batch parameters
+        self.batches = 0
+        self.rows_written = 0
+        self.errors = 0
+        self.rejected = 0
+        # (record, reason) for marks that were queued but not written
+        self.failed = []
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+        # Optional StageTimer of the running session; flushes are recorded as "write"
+        self.timer = None
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def is_marked(self, student_id, date=None):
+        date = date or time.strftime("%Y-%m-%d")
+        with self.lock:
+            if (student_id, date) in self.pending:
+                return True
+        return self.store.is_marked(student_id, date)
+
+    def mark(self, student_id, method="", student=None, when=None):
+        """Queue a mark; returns False if the student is already marked that day"""
+        record = make_record(student_id, method, student, when)
+        key = (record["student_id"], record["date"])
+        with self.lock:
+            if key in self.pending or self.store.is_marked(*key):
+                return False
+            self.pending.add(key)
+        self.queue.put(record)
+        return True
+
+    def _run(self):
+        while True:
+            record = self.queue.get()
+            if record is _STOP:
+                return
+            batch = [record]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    record = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stop = True
+                    break
+                batch.append(record)
+            self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch):
+        start = time.perf_counter()
+        failed = []
+        try:
+            written = self.store.mark_many(batch)
+            self.rows_written += sum(written)
+            for record, ok in zip(batch, written):
+                if not ok:
+                    self.rejected += 1
+                    failed.append((record, "already recorded by another writer"))
+        except Exception as e:
+            self.errors += 1
+            failed = [(record, str(e)) for record in batch]
+        for record, reason in failed:
+            print(f"ERROR: Attendance for {record['student_id']} on {record['date']} "
+                  f"was not saved: {reason}")
+        elapsed = (time.perf_counter() - start) * 1000
+        self.batches += 1
+        self.last_flush_ms = elapsed
+        self.max_flush_ms = max(self.max_flush_ms, elapsed)
+        self.total_flush_ms += elapsed
+        if self.timer is not None:
+            self.timer.record("write", elapsed / 1000)
+        with self.lock:
+            for record in batch:
+                self.pending.discard((record["student_id"], record["date"]))
+            self.failed.extend(failed)
+
+    def take_failed(self):
+        """(record, reason) for each mark not written since the last call"""
+        with self.lock:
+            failed, self.failed = self.failed, []
+        return failed
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self.total_flush_ms / self.batches, 3) if self.batches else 0.0,
+        }
+
+    def close(self):
+        """Flush pending marks and stop the writer thread"""
+        atexit.unregister(self.close)
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join()
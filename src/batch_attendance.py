@@ -0,0 +1,206 @@
+import argparse
+import multiprocessing
+import os
+import time
+from datetime import datetime
+
+import cv2
+
+from attendance_store import open_store
+from attendance_writer import AttendanceWriter
+from face_detector import DetectionScheduler
+from face_pipeline import FacePipeline
+from qr_attendance import scan_qr
+from recognition_pool import RecognitionPool, model_face_size
+
+ATTENDANCE_FILE = "data/attendance.csv"
+MODEL_PATH = "models/face_model.yml"
+LABEL_MAP_PATH = "models/label_map.pkl"
+CASCADE_PATH = "haarcascade_frontalface_default.xml"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+# Images per job when a folder is spread over the workers
+IMAGES_PER_JOB = 64
+
+# Per-process state, set up once by init_worker()
+_mode = None
+_recognizer = None
+_face_cascade = None
+_qr_detector = None
+
+
+def init_worker(mode, model_path, label_map_path, cascade_path):
+    global _mode, _recognizer, _face_cascade, _qr_detector
+    _mode = mode
+    if mode == "face":
+        # The batch pool provides the parallelism; predict in this process
+        _recognizer = RecognitionPool(model_path, label_map_path, workers=0)
+        _face_cascade = cv2.CascadeClassifier(cascade_path)
+    else:
+        _qr_detector = cv2.QRCodeDetector()
+
+
+def video_start(path, cap):
+    """Wall-clock time of the first frame: the file's mtime minus its duration"""
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0
+    frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+    duration = frames / fps if fps > 0 else 0
+    return os.path.getmtime(path) - duration
+
+
+def plan_jobs(inputs, workers, start=None):
+    """Split inputs into jobs: ("video", path, first, last, start_ts) frame
+    ranges so one long recording still uses every core, and ("images",
+    paths) batches"""
+    jobs = []
+    images = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                images.extend(os.path.join(root, f) for f in sorted(files)
+                              if f.lower().endswith(IMAGE_EXTENSIONS))
+            continue
+        if item.lower().endswith(IMAGE_EXTENSIONS):
+            images.append(item)
+            continue
+
+        cap = cv2.VideoCapture(item)
+        if not cap.isOpened():
+            print(f"ERROR: Cannot open {item}")
+            continue
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        first_ts = start if start is not None else video_start(item, cap)
+        cap.release()
+        # Unknown length (e.g. some streams): a single job reads to the end
+        parts = workers if frames >= workers * 100 else 1
+        step = -(-frames // parts) if frames else 0
+        for first in range(0, max(frames, 1), max(step, 1)):
+            last = min(frames, first + step) if frames else None
+            jobs.append(("video", item, first, last, first_ts))
+
+    for i in range(0, len(images), IMAGES_PER_JOB):
+        jobs.append(("images", images[i:i + IMAGES_PER_JOB]))
+    return jobs
+
+
+def make_pipeline():
+    """The live loops' FacePipeline, or None in QR mode"""
+    if _mode != "face":
+        return None
+    # Every sampled frame gets a full detection: no live deadline to meet
+    detector = DetectionScheduler(_face_cascade, interval=1)
+    return FacePipeline(_face_cascade, _recognizer, detector=detector)
+
+
+def scan(frame, pipeline, still=False):
+    """Student IDs found in one frame, by the same QR scan and face pipeline
+    as the camera loops: confirmed tracks for video, one confident match
+    per face for a still photo (no later frames to vote with)"""
+    if _mode == "qr":
+        student_id, _ = scan_qr(_qr_detector, frame)
+        return [student_id] if student_id else []
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if still:
+        return pipeline.identify(gray)
+    return [t.identity for t in pipeline.process(gray) if t.identity]
+
+
+def run_job(job, every=1):
+    """(source, frames scanned, [(student_id, timestamp)] first sightings)"""
+    found = {}
+    scanned = 0
+    pipeline = make_pipeline()
+    if job[0] == "images":
+        for path in job[1]:
+            frame = cv2.imread(path)
+            if frame is None:
+                continue
+            scanned += 1
+            for student_id in scan(frame, pipeline, still=True):
+                found.setdefault(student_id, os.path.getmtime(path))
+        return os.path.dirname(job[1][0]) if job[1] else "", scanned, list(found.items())
+
+    _, path, first, last, start_ts = job
+    cap = cv2.VideoCapture(path)
+    if first:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+    index = first
+    while last is None or index < last:
+        # grab() skips decoding frames that are not sampled
+        if not cap.grab():
+            break
+        if (index - first) % every == 0:
+            ret, frame = cap.retrieve()
+            if ret:
+                scanned += 1
+                ts = start_ts + cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                for student_id in scan(frame, pipeline):
+                    found.setdefault(student_id, ts)
+        index += 1
+    cap.release()
+    return path, scanned, list(found.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Take attendance from recorded video files or image folders, without a display."
+    )
+    parser.add_argument("inputs", nargs="+", help="video files, images or folders of images")
+    parser.add_argument("--mode", choices=("face", "qr"), default="face")
+    parser.add_argument("--every", type=int, default=1, help="scan every Nth video frame")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--start", help="wall-clock time of the first video frame, "
+                                        "'YYYY-MM-DD HH:MM:SS' (default: file mtime minus duration)")
+    parser.add_argument("--attendance", default=ATTENDANCE_FILE)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--label-map", default=LABEL_MAP_PATH)
+    parser.add_argument("--cascade", default=CASCADE_PATH)
+    args = parser.parse_args()
+
+    start = None
+    if args.start:
+        start = datetime.strptime(args.start, "%Y-%m-%d %H:%M:%S").timestamp()
+    if args.mode == "face":
+        # Fail here rather than in every worker's initializer
+        try:
+            model_face_size(args.label_map)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return
+    jobs = plan_jobs(args.inputs, args.workers, start)
+    if not jobs:
+        print("ERROR: Nothing to scan.")
+        return
+
+    began = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    sightings = []
+    frames = {}
+    with context.Pool(min(args.workers, len(jobs)), initializer=init_worker,
+                      initargs=(args.mode, args.model, args.label_map, args.cascade)) as pool:
+        results = pool.starmap(run_job, [(job, max(1, args.every)) for job in jobs])
+    for source, scanned, found in results:
+        frames[source] = frames.get(source, 0) + scanned
+        sightings.extend((ts, student_id, source) for student_id, ts in found)
+    elapsed = time.perf_counter() - began
+
+    if os.path.dirname(args.attendance):
+        os.makedirs(os.path.dirname(args.attendance), exist_ok=True)
+    attendance_writer = AttendanceWriter(open_store(args.attendance))
+    method = "FACE" if args.mode == "face" else "QR"
+    # Earliest sighting first, so the recorded time is when the student first appeared
+    marked = 0
+    for ts, student_id, source in sorted(sightings):
+        if attendance_writer.mark(student_id, method, when=datetime.fromtimestamp(ts)):
+            marked += 1
+            print(f"Marked: {student_id} at {datetime.fromtimestamp(ts):%Y-%m-%d %H:%M:%S} ({source})")
+    attendance_writer.close()
+
+    total = sum(frames.values())
+    for source, scanned in frames.items():
+        print(f"{source}: {scanned} frames scanned")
+    print(f"{total} frames in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.1f} frames/s), "
+          f"{marked} new marks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import itertools
+import os
+import time
+
+import cv2
+import numpy as np
+
+from face_detector import DetectionScheduler
+from face_tracker import FaceTracker
+
+CASCADE_PATH = "haarcascade_frontalface_default.xml"
+
+
+def parse_list(text, kind):
+    return [kind(v) for v in text.split(",") if v.strip()]
+
+
+def video_frames(source, count):
+    cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    cap.release()
+    return frames
+
+
+def synthetic_frames(faces_dir, count, size=(640, 480)):
+    """Registered face crops drifting across a noisy 640x480 background"""
+    crops = []
+    for root, _, files in os.walk(faces_dir):
+        for name in sorted(files):
+            img = cv2.imread(os.path.join(root, name), cv2.IMREAD_GRAYSCALE)
+            if img is not None:
+                crops.append(cv2.resize(img, (160, 160)))
+    if not crops:
+        return []
+
+    width, height = size
+    rng = np.random.default_rng(0)
+    background = rng.integers(90, 140, (height, width), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        crop = crops[i % len(crops)]
+        x = 40 + (i * 3) % (width - 280)
+        y = 100 + (i * 2) % (height - 260)
+        frame[y:y+160, x:x+160] = crop
+        frames.append(frame)
+    return frames
+
+
+def run(face_cascade, frames, scale, interval, padding):
+    detector = DetectionScheduler(face_cascade, scale=scale, interval=interval, padding=padding)
+    tracker = FaceTracker()
+    found = 0
+    start = time.perf_counter()
+    for gray in frames:
+        boxes = detector.detect(gray, [t.box for t in tracker.tracks])
+        tracker.update(boxes)
+        found += len(boxes)
+    elapsed = time.perf_counter() - start
+    return len(frames) / elapsed, found / len(frames), detector.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Frames per second of face detection at different scale/interval/padding settings."
+    )
+    parser.add_argument("--video", help="video file or camera index (default: synthetic frames "
+                                        "built from the registered face crops)")
+    parser.add_argument("--faces", default="faces", help="face crop folder for synthetic frames")
+    parser.add_argument("--cascade", default=CASCADE_PATH)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--scales", default="1,0.75,0.5,0.35")
+    parser.add_argument("--intervals", default="1,5,15")
+    parser.add_argument("--paddings", default="0.5")
+    args = parser.parse_args()
+
+    face_cascade = cv2.CascadeClassifier(args.cascade)
+    if face_cascade.empty():
+        print(f"ERROR: Could not load Haar cascade from {args.cascade}")
+        return
+
+    if args.video:
+        frames = video_frames(args.video, args.frames)
+    else:
+        frames = synthetic_frames(args.faces, args.frames)
+    if not frames:
+        print("ERROR: No frames to benchmark.")
+        return
+    height, width = frames[0].shape[:2]
+    print(f"{len(frames)} frames of {width}x{height}")
+
+    print(f"{'scale':>6} {'interval':>8} {'padding':>7} {'fps':>8} {'faces/frame':>11} "
+          f"{'full':>5} {'roi':>5}")
+    for scale, interval, padding in itertools.product(parse_list(args.scales, float),
+                                                      parse_list(args.intervals, int),
+                                                      parse_list(args.paddings, float)):
+        fps, faces, stats = run(face_cascade, frames, scale, interval, padding)
+        print(f"{scale:>6g} {interval:>8} {padding:>7g} {fps:>8.1f} {faces:>11.2f} "
+              f"{stats['full']:>5} {stats['roi']:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import argparse
+import os
+from datetime import date, timedelta
+from attendance_partitioned import PartitionedCsvStore
+from attendance_store import GUI_FIELDS, SCRIPT_FIELDS
+
+# Same logs the CLI scripts and the GUI write to
+SCRIPT_ATTENDANCE_FILE = "data/attendance.csv"
+GUI_ATTENDANCE_FILE = "smart_attendance/data/attendance.csv"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compact date-partitioned attendance segments into monthly archives."
+    )
+    parser.add_argument("--gui", action="store_true",
+                        help="use the GUI attendance log instead of the CLI scripts' log")
+    parser.add_argument("--keep-days", type=int, default=7,
+                        help="leave segments from the last N days untouched (default: 7)")
+    parser.add_argument("--import", dest="import_path", metavar="CSV",
+                        help="first split an existing single-file attendance CSV into segments")
+    args = parser.parse_args()
+
+    csv_path = GUI_ATTENDANCE_FILE if args.gui else SCRIPT_ATTENDANCE_FILE
+    fields = GUI_FIELDS if args.gui else SCRIPT_FIELDS
+    store = PartitionedCsvStore(os.path.splitext(csv_path)[0], fields, header=args.gui)
+
+    if args.import_path:
+        imported = store.import_log(args.import_path)
+        print(f"Imported {imported} rows from {args.import_path} into {store.path}")
+
+    before = (date.today() - timedelta(days=args.keep_days)).isoformat()
+    merged, kept, dropped = store.compact(before)
+    if merged:
+        print(f"Merged {merged} segments older than {before}: "
+              f"{kept} rows archived, {dropped} duplicates dropped.")
+    else:
+        print(f"No segments older than {before} to compact.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import os
+
+# Runtime settings, overridable through environment variables so kiosks
+# can be tuned without editing code.
+
+# Attendance storage backend: "csv" (default), "sqlite", "partitioned",
+# "compact" or "binary"
+ATTENDANCE_BACKEND = os.environ.get("ATTENDANCE_BACKEND", "csv").strip().lower()
+# Segment size for the partitioned backend: "day" or "week"
+ATTENDANCE_PARTITION = os.environ.get("ATTENDANCE_PARTITION", "day").strip().lower()
+
+# Background attendance writer: flush when this many marks are pending...
+WRITER_BATCH_SIZE = int(os.environ.get("ATTENDANCE_WRITER_BATCH_SIZE", "50"))
+# ...or when the oldest pending mark has waited this long (milliseconds)
+WRITER_FLUSH_MS = int(os.environ.get("ATTENDANCE_WRITER_FLUSH_MS", "200"))
+# Bounded queue; mark() blocks once this many marks are waiting
+WRITER_QUEUE_SIZE = int(os.environ.get("ATTENDANCE_WRITER_QUEUE_SIZE", "1000"))
+
+# Face crops are resized to FACE_SIZE x FACE_SIZE pixels for training and
+# prediction (changing it requires `face_train.py --full`)
+FACE_SIZE = int(os.environ.get("ATTENDANCE_FACE_SIZE", "200"))
+# Keep at most this many representative histograms per student when
+# training (0 = keep one per training image)
+FACE_PROTOTYPES = int(os.environ.get("ATTENDANCE_FACE_PROTOTYPES", "0"))
+# Face recognition: LBPH distance below which a face counts as recognized
+FACE_CONFIDENCE_THRESHOLD = float(os.environ.get("ATTENDANCE_FACE_THRESHOLD", "70"))
+# Worker processes for LBPH prediction ("auto" = one per spare core, 0/1 = in-process)
+_workers = os.environ.get("ATTENDANCE_RECOGNITION_WORKERS", "0").strip().lower()
+RECOGNITION_WORKERS = max(1, (os.cpu_count() or 2) - 1) if _workers == "auto" else int(_workers)
+# LBPH implementation: "opencv" (cv2.face) or "numpy" (batched, src/lbph_engine.py)
+RECOGNIZER_BACKEND = os.environ.get("ATTENDANCE_RECOGNIZER", "opencv").strip().lower()
+
+# Face tracking between detection and recognition
+# Re-run recognition on an identified track every N frames
+TRACK_PREDICT_INTERVAL = int(os.environ.get("ATTENDANCE_TRACK_PREDICT_INTERVAL", "15"))
+# Matching predictions needed (out of the last TRACK_VOTE_WINDOW) before marking
+TRACK_VOTES = int(os.environ.get("ATTENDANCE_TRACK_VOTES", "3"))
+TRACK_VOTE_WINDOW = int(os.environ.get("ATTENDANCE_TRACK_VOTE_WINDOW", "5"))
+# Minimum box overlap (IoU) to continue a track, and frames a track may go unseen
+TRACK_IOU_THRESHOLD = float(os.environ.get("ATTENDANCE_TRACK_IOU", "0.3"))
+TRACK_MAX_MISSED = int(os.environ.get("ATTENDANCE_TRACK_MAX_MISSED", "5"))
+
+# Face detection scheduling
+# Detection runs on a copy of the frame resized by this factor (1 = full size).
+# Opt-in: below 1 it is faster, but the smallest detectable face grows to
+# the cascade's 24 px window divided by the scale
+DETECT_SCALE = float(os.environ.get("ATTENDANCE_DETECT_SCALE", "1"))
+# Full-frame detection every N frames; in between only around known faces
+DETECT_INTERVAL = int(os.environ.get("ATTENDANCE_DETECT_INTERVAL", "5"))
+# Search region around a known face, as a fraction of the face size per side
+DETECT_ROI_PADDING = float(os.environ.get("ATTENDANCE_DETECT_ROI_PADDING", "0.5"))
+
+# Per-course face model shards: how many stay loaded at once (least
+# recently used shards are dropped first). Only effective when prediction runs
+# in the camera process (RECOGNITION_WORKERS <= 1); worker pools are restarted,
+# with empty caches, whenever the shard selection changes
+FACE_SHARD_CACHE = int(os.environ.get("ATTENDANCE_FACE_SHARD_CACHE", "4"))
+
+# Descriptor index (face_train.py --index): nearest clusters searched per face;
+# higher finds the true nearest match more often, lower is faster
+FACE_INDEX_NPROBE = int(os.environ.get("ATTENDANCE_FACE_NPROBE", "4"))
+
+# Per-stage latency instrumentation: samples kept per stage for the rolling
+# percentiles, whether the overlay starts visible (toggle with L in the camera
+# windows), and where session summaries go ("" = next to the attendance log)
+LATENCY_WINDOW = int(os.environ.get("ATTENDANCE_LATENCY_WINDOW", "500"))
+LATENCY_OVERLAY = os.environ.get("ATTENDANCE_LATENCY_OVERLAY", "0").strip().lower() in ("1", "true", "yes")
+LATENCY_DIR = os.environ.get("ATTENDANCE_LATENCY_DIR", "")
+
+# Prometheus metrics endpoint (GET /metrics); port 0 disables it. Bound to
+# localhost by default so only a local scraper or agent can read it
+METRICS_PORT = int(os.environ.get("ATTENDANCE_METRICS_PORT", "0"))
+METRICS_HOST = os.environ.get("ATTENDANCE_METRICS_HOST", "127.0.0.1")
+
+# Camera session recording (for replaying identical input when profiling):
+# JPEG quality of recorded frames (0 = lossless PNG), the folder GUI
+# sessions are recorded to ("" = off), and a recorded session the GUI
+# replays instead of opening the camera (at recorded speed if REPLAY_REALTIME)
+RECORD_QUALITY = int(os.environ.get("ATTENDANCE_RECORD_QUALITY", "90"))
+RECORD_DIR = os.environ.get("ATTENDANCE_RECORD_DIR", "")
+REPLAY_FILE = os.environ.get("ATTENDANCE_REPLAY", "")
+REPLAY_REALTIME = os.environ.get("ATTENDANCE_REPLAY_REALTIME", "0").strip().lower() in ("1", "true", "yes")
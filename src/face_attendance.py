@@ -1,83 +1,151 @@
+import argparse
 import cv2
-import pickle
-from utils import setup_folders, get_today, get_timestamp
-import csv
 import os
-
-setup_folders()
+from utils import setup_folders
+from attendance_writer import AttendanceWriter
+from face_pipeline import FacePipeline
+from face_shards import list_shards, shard_path
+from metrics import Metrics
+from recognition_pool import RecognitionPool
+from session_recorder import open_attendance_store, open_camera
+from stage_timer import StageTimer, latency_path
+from config import LATENCY_OVERLAY
 
 ATTENDANCE_FILE = "data/attendance.csv"
+MODEL_PATH = "models/face_model.yml"
+LABEL_MAP_PATH = "models/label_map.pkl"
 
-face_cascade = cv2.CascadeClassifier(
-    "src/haarcascade_frontalface_default.xml"
-)
-
-recognizer = cv2.face.LBPHFaceRecognizer_create()
-recognizer.read("models/face_model.yml")
-
-with open("models/label_map.pkl", "rb") as f:
-    label_map = pickle.load(f)
-
-id_map = {v: k for k, v in label_map.items()}
+# Opened in main(), not at import: recognition workers are spawned and
+# re-import this module, and must not start a second writer
+attendance_writer = None
 
 def already_marked(student_id):
-    today = get_today()
-    if not os.path.exists(ATTENDANCE_FILE):
-        return False
-    with open(ATTENDANCE_FILE, "r") as f:
-        reader = csv.reader(f)
-        for row in reader:
-            if row and row[0] == student_id and row[2] == today:
-                return True
-    return False
+    return attendance_writer.is_marked(student_id)
 
 def mark_attendance(student_id):
-    if already_marked(student_id):
-        return False
-
-    with open(ATTENDANCE_FILE, "a", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            student_id,
-            "FACE",
-            get_today(),
-            get_timestamp()
-        ])
-    return True
-
-cap = cv2.VideoCapture(0)
-print("Face attendance started. Press Q to quit.")
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    faces = face_cascade.detectMultiScale(gray, 1.3, 5)
-
-    for (x, y, w, h) in faces:
-        roi = gray[y:y+h, x:x+w]
-        label, confidence = recognizer.predict(roi)
-
-        if confidence < 70 and label in id_map:
-            student_id = id_map[label]
-            success = mark_attendance(student_id)
-
-            text = "Marked" if success else "Already Marked"
-            cv2.putText(frame, f"{student_id} - {text}",
-                        (x, y-10), cv2.FONT_HERSHEY_SIMPLEX,
-                        0.8, (0, 255, 0), 2)
-        else:
-            cv2.putText(frame, "Unknown",
-                        (x, y-10), cv2.FONT_HERSHEY_SIMPLEX,
-                        0.8, (0, 0, 255), 2)
-
-        cv2.rectangle(frame, (x,y), (x+w,y+h), (255,0,0), 2)
-
-    cv2.imshow("Face Attendance", frame)
-    if cv2.waitKey(1) & 0xFF == ord("q"):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
+    return attendance_writer.mark(student_id, "FACE")
+
+def main():
+    global attendance_writer
+    parser = argparse.ArgumentParser(description="Mark attendance by face recognition.")
+    parser.add_argument("--course", action="append", default=[],
+                        help="only recognize students of this course, using its model "
+                             "shard from face_train.py --shards (repeatable)")
+    parser.add_argument("--record", metavar="FILE", help="also save the camera frames to FILE")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="run on a session saved with --record instead of the camera")
+    parser.add_argument("--realtime", action="store_true",
+                        help="with --replay, play at recorded speed instead of every frame in turn")
+    args = parser.parse_args()
+
+    model = MODEL_PATH
+    if args.course:
+        model_dir = os.path.dirname(MODEL_PATH)
+        model = [shard_path(model_dir, course) for course in args.course]
+        missing = [course for course, path in zip(args.course, model) if not os.path.exists(path)]
+        if missing:
+            print(f"ERROR: No model shard for {', '.join(missing)}. "
+                  f"Available: {', '.join(list_shards(model_dir)) or 'none'}")
+            return
+
+    face_cascade = cv2.CascadeClassifier(
+        "src/haarcascade_frontalface_default.xml"
+    )
+
+    # Frames are grabbed on their own thread; the loop always gets the newest one
+    # (or, replaying a recorded session deterministically, every frame)
+    try:
+        cap = open_camera(0, args.record, args.replay, args.realtime)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Cannot replay session: {e}")
+        return
+
+    setup_folders()
+    # Every write and duplicate check goes through the storage layer;
+    # writes are batched on a background thread so disk I/O never stalls a frame
+    attendance_writer = AttendanceWriter(open_attendance_store(ATTENDANCE_FILE, args.replay))
+
+    # Loads the model (or course shards) and the label map, once per worker process
+    try:
+        recognizer = RecognitionPool(model, LABEL_MAP_PATH)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        cap.release()
+        attendance_writer.close()
+        return
+    # Served only when ATTENDANCE_METRICS_PORT is set
+    metrics = Metrics().start()
+    metrics.writer = attendance_writer
+    # Per-stage latencies; press L to show them on the preview
+    timer = StageTimer(metrics=metrics)
+    attendance_writer.timer = timer
+    show_latency = LATENCY_OVERLAY
+    pipeline = FacePipeline(face_cascade, recognizer, timer=timer, metrics=metrics)
+    metrics.attach("face", cap)
+    print("Face attendance started. Press Q to quit, L for latencies.")
+
+    try:
+        while True:
+            with timer.stage("capture"):
+                ret, frame = cap.read()
+            if not ret:
+                break
+
+            with timer.stage("cvtColor"):
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+            # Tracks keep their identity across frames, so each person is
+            # recognized a few times (and voted on) rather than every frame
+            for track in pipeline.process(gray):
+                x, y, w, h = track.box
+                student_id = track.identity
+                if student_id is not None:
+                    if not track.marked:
+                        with timer.stage("mark"):
+                            new_mark = mark_attendance(student_id)
+                        metrics.mark("FACE", new_mark)
+                        track.status = "Marked" if new_mark else "Already Marked"
+                        track.marked = True
+
+                    cv2.putText(frame, f"{student_id} - {track.status}",
+                                (x, y-10), cv2.FONT_HERSHEY_SIMPLEX,
+                                0.8, (0, 255, 0), 2)
+                else:
+                    cv2.putText(frame, "Unknown",
+                                (x, y-10), cv2.FONT_HERSHEY_SIMPLEX,
+                                0.8, (0, 0, 255), 2)
+
+                cv2.rectangle(frame, (x,y), (x+w,y+h), (255,0,0), 2)
+
+            # A mark the writer could not save is retried while the face is in view
+            for record, _ in attendance_writer.take_failed():
+                for track in pipeline.tracker.tracks:
+                    if track.identity == record["student_id"]:
+                        track.marked = False
+
+            if show_latency:
+                timer.overlay(frame)
+            with timer.stage("imshow"):
+                cv2.imshow("Face Attendance", frame)
+                key = cv2.waitKey(1) & 0xFF
+            if key == ord("q"):
+                break
+            if key == ord("l"):
+                show_latency = not show_latency
+    finally:
+        # Also on Ctrl+C or an error: queued marks are still written
+        cap.release()
+        cv2.destroyAllWindows()
+        recognizer.close()
+        attendance_writer.close()
+        metrics.close()
+    print(f"Attendance writer: {attendance_writer.stats()}")
+    print(f"Frames: {cap.stats()}")
+    print(f"Recognition calls: {pipeline.tracker.predictions}")
+    path = timer.dump(latency_path(ATTENDANCE_FILE, "face"), frames=cap.stats(),
+                      writer=attendance_writer.stats(), predictions=pipeline.tracker.predictions,
+                      replay=args.replay)
+    print(f"Latency summary: {path}")
+
+if __name__ == "__main__":
+    main()
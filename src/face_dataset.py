@@ -0,0 +1,116 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from config import FACE_SIZE
+
+# Written by face_train.py next to the model and label map; its "face_size"
+# is the crop size the model was trained at
+MANIFEST_NAME = "train_manifest.json"
+
+
+def normalize_face(img, size=FACE_SIZE):
+    """Grayscale face crop resized to size x size, as used for training and prediction"""
+    if img.shape[:2] == (size, size):
+        return img
+    shrink = img.shape[0] > size or img.shape[1] > size
+    return cv2.resize(img, (size, size),
+                      interpolation=cv2.INTER_AREA if shrink else cv2.INTER_LINEAR)
+
+
+def trained_face_size(model_dir):
+    """Crop size the model in model_dir was trained at, or None for a model
+    trained on crops as detected (no manifest, or one without a face size)"""
+    try:
+        with open(os.path.join(model_dir, MANIFEST_NAME)) as f:
+            return json.load(f).get("face_size")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def cache_dtype(size, path_chars):
+    # The path field is as wide as the longest cached path, so none is cut short
+    return np.dtype([("path", f"U{max(1, path_chars)}"), ("mtime_ns", "<i8"), ("size", "<i8"),
+                     ("pixels", "u1", (size, size))])
+
+
+def decode(path, size):
+    img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    return None if img is None else normalize_face(img, size)
+
+
+class FaceDataset:
+    """Decoded, size-normalized training crops cached in one .npy file.
+
+    The cache is a structured array (path, mtime_ns, size, pixels) that is
+    memory-mapped on load; only images whose path, mtime or file size is
+    not in the cache are decoded, on a thread pool.
+    """
+
+    def __init__(self, dataset_dir, cache_path, size=FACE_SIZE, workers=None):
+        self.dataset_dir = dataset_dir
+        self.cache_path = cache_path
+        self.size = size
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.decoded = 0
+
+    def _read_cache(self):
+        if not os.path.exists(self.cache_path):
+            return None
+        try:
+            cached = np.load(self.cache_path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"Ignoring face cache {self.cache_path}: {e}")
+            return None
+        path_field = cached.dtype.fields.get("path") if cached.dtype.names else None
+        if path_field is None or cached.dtype != cache_dtype(self.size, path_field[0].itemsize // 4):
+            return None
+        return cached
+
+    def load(self, images):
+        """Structured array of crops for images ({rel path: (student_id, mtime_ns, size)}).
+
+        Unreadable files are left out; select rows by their "path" field.
+        """
+        cached = self._read_cache()
+        index = {}
+        if cached is not None:
+            for row, (path, mtime_ns, size) in enumerate(
+                    zip(cached["path"], cached["mtime_ns"], cached["size"])):
+                index[(str(path), int(mtime_ns), int(size))] = row
+
+        missing = [p for p, (_, mtime_ns, size) in images.items()
+                   if (p, mtime_ns, size) not in index]
+        if not missing and cached is not None and len(cached) == len(images):
+            # Nothing added, changed or removed: serve the mapped cache as is
+            return cached
+
+        decoded = {}
+        if missing:
+            paths = [os.path.join(self.dataset_dir, p) for p in missing]
+            with ThreadPoolExecutor(self.workers) as pool:
+                for rel_path, img in zip(missing, pool.map(lambda p: decode(p, self.size), paths)):
+                    if img is not None:
+                        decoded[rel_path] = img
+            self.decoded += len(missing)
+
+        keys = [(p, mtime_ns, size) for p, (_, mtime_ns, size) in images.items()
+                if p in decoded or (p, mtime_ns, size) in index]
+        path_chars = max((len(path) for path, _, _ in keys), default=1)
+        records = np.empty(len(keys), dtype=cache_dtype(self.size, path_chars))
+        for row, (path, mtime_ns, size) in enumerate(keys):
+            if path in decoded:
+                pixels = decoded[path]
+            else:
+                pixels = cached[index[(path, mtime_ns, size)]]["pixels"]
+            records[row] = (path, mtime_ns, size, pixels)
+        self._write_cache(records)
+        return records
+
+    def _write_cache(self, records):
+        tmp_path = self.cache_path + ".tmp.npy"
+        np.save(tmp_path, records)
+        os.replace(tmp_path, self.cache_path)
@@ -0,0 +1,79 @@
+import cv2
+
+from config import DETECT_SCALE, DETECT_INTERVAL, DETECT_ROI_PADDING
+from face_tracker import iou_matrix
+
+
+class DetectionScheduler:
+    """Haar detection on a downscaled frame, full-frame only every N frames.
+
+    Between full detections only the regions around the last known boxes
+    are searched. A full detection is forced as soon as nothing is
+    tracked any more (the tracker keeps a missed face for a few frames,
+    so its region is searched again before that). Boxes are always
+    returned in full-resolution frame coordinates.
+    """
+
+    def __init__(self, face_cascade, scale=DETECT_SCALE, interval=DETECT_INTERVAL,
+                 padding=DETECT_ROI_PADDING, scale_factor=1.3, min_neighbors=5):
+        self.face_cascade = face_cascade
+        self.scale = scale
+        self.interval = max(1, interval)
+        self.padding = padding
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.since_full = None
+        self.full_runs = 0
+        self.roi_runs = 0
+
+    def _detect(self, image):
+        faces = self.face_cascade.detectMultiScale(image, self.scale_factor, self.min_neighbors)
+        return [tuple(int(v) for v in face) for face in faces]
+
+    def _search_rois(self, small, boxes):
+        height, width = small.shape[:2]
+        found = []
+        for x, y, w, h in boxes:
+            x, y, w, h = (int(round(v * self.scale)) for v in (x, y, w, h))
+            pad_x, pad_y = int(w * self.padding), int(h * self.padding)
+            x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+            x1, y1 = min(width, x + w + pad_x), min(height, y + h + pad_y)
+            if x1 <= x0 or y1 <= y0:
+                continue
+            self.roi_runs += 1
+            for fx, fy, fw, fh in self._detect(small[y0:y1, x0:x1]):
+                found.append((fx + x0, fy + y0, fw, fh))
+        if len(found) < 2:
+            return found
+
+        # Padded regions of neighbouring faces overlap; keep one box per face
+        overlap = iou_matrix(found, found)
+        kept = []
+        for i in range(len(found)):
+            if all(overlap[i, j] < 0.5 for j in kept):
+                kept.append(i)
+        return [found[i] for i in kept]
+
+    def detect(self, gray, known_boxes=()):
+        """Faces in gray; known_boxes are the boxes tracked in the previous frame"""
+        if self.scale != 1:
+            small = cv2.resize(gray, None, fx=self.scale, fy=self.scale,
+                               interpolation=cv2.INTER_AREA)
+        else:
+            small = gray
+
+        # No known boxes means every tracked face has been lost
+        if self.since_full is None or self.since_full + 1 >= self.interval or not known_boxes:
+            faces = self._detect(small)
+            self.full_runs += 1
+            self.since_full = 0
+        else:
+            faces = self._search_rois(small, known_boxes)
+            self.since_full += 1
+
+        if self.scale == 1:
+            return faces
+        return [tuple(int(round(v / self.scale)) for v in face) for face in faces]
+
+    def stats(self):
+        return {"full": self.full_runs, "roi": self.roi_runs}
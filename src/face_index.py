@@ -0,0 +1,158 @@
+import os
+import time
+
+import numpy as np
+
+from config import FACE_INDEX_NPROBE
+from lbph_engine import NumpyLBPH
+
+
+def index_paths(model_path):
+    """face_model.yml -> (face_model.ivf.bin, face_model.ivf.npz)"""
+    base = os.path.splitext(model_path)[0]
+    return base + ".ivf.bin", base + ".ivf.npz"
+
+
+def has_index(model_path):
+    """True when an index exists and was built after the model was last written"""
+    paths = index_paths(model_path)
+    if not all(os.path.exists(p) for p in paths):
+        return False
+    if not os.path.exists(model_path):
+        return True
+    return min(os.path.getmtime(p) for p in paths) >= os.path.getmtime(model_path)
+
+
+def sqdist(points, centroids, centroid_norms):
+    """Squared euclidean distances, points x centroids, via one matrix product"""
+    return (np.einsum("ij,ij->i", points, points)[:, None] + centroid_norms[None, :]
+            - 2.0 * points @ centroids.T)
+
+
+def kmeans(points, k, iterations=10, seed=0):
+    """k-means centroids of points (float32 rows)"""
+    rng = np.random.default_rng(seed)
+    centroids = points[rng.choice(len(points), k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = sqdist(points, centroids, (centroids ** 2).sum(axis=1)).argmin(axis=1)
+        for cluster in range(k):
+            members = points[assignment == cluster]
+            if len(members):
+                centroids[cluster] = members.mean(axis=0)
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file index over the histograms of an LBPH model.
+
+    Histograms are clustered with k-means in sqrt space (euclidean on
+    sqrt-histograms is the Hellinger distance, a close proxy for
+    chi-square); each cluster is a contiguous block of columns of the
+    model. A query ranks the centroids and computes exact chi-square
+    distances only against the `nprobe` nearest clusters.
+    """
+
+    def __init__(self, nprobe=FACE_INDEX_NPROBE):
+        self.nprobe = nprobe
+        self.model = NumpyLBPH()
+        self.set_centroids(np.zeros((0, self.model.bins), dtype=np.float32),
+                           np.zeros(1, dtype=np.int64))
+
+    def set_centroids(self, centroids, offsets):
+        self.centroids = centroids
+        self.norms = (centroids ** 2).sum(axis=1)
+        self.offsets = offsets
+
+    @property
+    def threshold(self):
+        return self.model.threshold
+
+    def build(self, model, nlist=0, iterations=10):
+        """Cluster model's histograms into nlist lists (0 = sqrt of the count)"""
+        count = len(model.labels)
+        nlist = min(count, nlist or max(1, int(np.sqrt(count))))
+        histograms = model.histograms
+        # Centroids are fitted on a sample; every histogram is then assigned
+        sample = np.random.default_rng(0).choice(count, min(count, 64 * nlist), replace=False)
+        centroids = kmeans(np.sqrt(histograms[np.sort(sample)]), nlist, iterations)
+
+        norms = (centroids ** 2).sum(axis=1)
+        assignment = np.empty(count, dtype=np.int64)
+        for start in range(0, count, 1024):
+            chunk = np.sqrt(histograms[start:start + 1024])
+            assignment[start:start + 1024] = sqdist(chunk, centroids, norms).argmin(axis=1)
+
+        order = np.argsort(assignment, kind="stable")
+        self.set_centroids(centroids, np.searchsorted(assignment[order], np.arange(nlist + 1)))
+        self.model = NumpyLBPH(model.radius, model.neighbors, model.grid_x, model.grid_y,
+                               model.threshold)
+        self.model.set_histograms(model.histograms[order], model.labels[order])
+        return self
+
+    def write(self, model_path):
+        bin_path, npz_path = index_paths(model_path)
+        self.model.write_binary(bin_path)
+        tmp_path = npz_path + ".tmp.npz"
+        np.savez(tmp_path, centroids=self.centroids, offsets=self.offsets)
+        os.replace(tmp_path, npz_path)
+
+    def read(self, model_path):
+        bin_path, npz_path = index_paths(model_path)
+        self.model = NumpyLBPH().read_binary(bin_path)
+        with np.load(npz_path) as data:
+            self.set_centroids(data["centroids"], data["offsets"])
+        return self
+
+    def search(self, histogram, nprobe=None):
+        """(column of the nearest stored histogram, its distance, columns scanned)"""
+        if not len(self.centroids):
+            return -1, float(np.finfo(np.float64).max), 0
+        nprobe = min(max(1, nprobe or self.nprobe), len(self.centroids))
+        point = np.sqrt(histogram)[None, :]
+        ranked = sqdist(point, self.centroids, self.norms)[0]
+        probes = np.argpartition(ranked, nprobe - 1)[:nprobe]
+        columns = np.concatenate([np.arange(self.offsets[p], self.offsets[p + 1]) for p in probes])
+        if not len(columns):
+            return -1, float(np.finfo(np.float64).max), 0
+        dist = self.model.distances_to(histogram, columns)
+        best = int(dist.argmin())
+        return int(columns[best]), float(dist[best]), len(columns)
+
+    def predict_many(self, images, nprobe=None):
+        """(label, confidence) per face, like NumpyLBPH.predict_many()"""
+        results = []
+        for image in images:
+            column, confidence, _ = self.search(self.model.histogram(image), nprobe)
+            if column < 0 or confidence >= self.threshold:
+                results.append((-1, confidence))
+            else:
+                results.append((int(self.model.labels[column]), confidence))
+        return results
+
+    def predict(self, image):
+        return self.predict_many([image])[0]
+
+
+def recall_report(index, exhaustive, images, nprobes):
+    """Print recall@1 and latency of index at each nprobe against exhaustive search"""
+    queries = [exhaustive.histogram(image) for image in images]
+    start = time.perf_counter()
+    truth = [exhaustive.distances_to(q) for q in queries]
+    exhaustive_ms = 1000 * (time.perf_counter() - start) / max(1, len(queries))
+    best = [float(d.min()) for d in truth]
+    total = len(exhaustive.labels)
+
+    print(f"{'nprobe':>6} {'recall@1':>8} {'scanned':>8} {'ms/face':>8}")
+    print(f"{'all':>6} {1:>8.1%} {1:>8.1%} {exhaustive_ms:>8.2f}")
+    for nprobe in nprobes:
+        hits, scanned = 0, 0
+        start = time.perf_counter()
+        results = [index.search(q, nprobe) for q in queries]
+        elapsed = time.perf_counter() - start
+        for (_, distance, columns), expected in zip(results, best):
+            # Same nearest distance = same neighbour (or an exact tie)
+            hits += abs(distance - expected) <= 1e-6 * max(1.0, expected)
+            scanned += columns
+        n = max(1, len(queries))
+        print(f"{nprobe:>6} {hits / n:>8.1%} {scanned / n / max(1, total):>8.1%} "
+              f"{1000 * elapsed / n:>8.2f}")
@@ -0,0 +1,62 @@
+from config import FACE_CONFIDENCE_THRESHOLD
+from face_detector import DetectionScheduler
+from face_tracker import FaceTracker
+from stage_timer import StageTimer
+
+
+class FacePipeline:
+    """Detection -> tracking -> recognition for one grayscale frame.
+
+    Shared by src/face_attendance.py and the GUI so both loops recognize
+    faces the same way. process() returns the frame's tracks; a track
+    with an identity has been confirmed by voting and can be marked.
+    identify() recognizes the faces of a single still image, where there
+    are no later frames to vote with.
+    """
+
+    def __init__(self, face_cascade, recognizer, tracker=None,
+                 threshold=FACE_CONFIDENCE_THRESHOLD, detector=None, timer=None,
+                 metrics=None):
+        self.detector = detector or DetectionScheduler(face_cascade)
+        self.timer = timer or StageTimer()
+        self.recognizer = recognizer
+        self.tracker = tracker or FaceTracker()
+        self.threshold = threshold
+        self.metrics = metrics
+
+    def detect(self, gray):
+        # Tracks still alive tell the scheduler where to look between full scans
+        with self.timer.stage("detect"):
+            return self.detector.detect(gray, [t.box for t in self.tracker.tracks])
+
+    def predict(self, gray, boxes):
+        """(student_id or None, confidence) per box; None above the threshold"""
+        rois = [gray[y:y+h, x:x+w] for (x, y, w, h) in boxes]
+        if not rois:
+            return []
+        with self.timer.stage("predict"):
+            results = self.recognizer.predict_many(rois)
+
+        predictions = []
+        for student_id, confidence in results:
+            if confidence >= self.threshold:
+                student_id = None
+            if self.metrics is not None:
+                self.metrics.prediction(student_id is not None)
+            predictions.append((student_id, confidence))
+        return predictions
+
+    def process(self, gray):
+        tracks = self.tracker.update(self.detect(gray))
+
+        # Only new tracks, undecided ones and periodic re-checks are predicted
+        pending = [t for t in tracks if self.tracker.needs_prediction(t)]
+        for track, (student_id, confidence) in zip(pending, self.predict(gray, [t.box for t in pending])):
+            self.tracker.record(track, student_id, confidence)
+        return tracks
+
+    def identify(self, gray):
+        """Student IDs of the faces recognized in one still image"""
+        with self.timer.stage("detect"):
+            boxes = self.detector.detect(gray)
+        return [student_id for student_id, _ in self.predict(gray, boxes) if student_id]
@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+
+from config import FACE_CONFIDENCE_THRESHOLD
+from lbph_engine import NumpyLBPH
+
+
+def chi_square_matrix(histograms):
+    """Pairwise HISTCMP_CHISQR_ALT distances between rows of histograms"""
+    model = NumpyLBPH()
+    model.set_histograms(histograms, np.zeros(len(histograms)))
+    return model.distances(np.asarray(histograms, dtype=np.float32))
+
+
+def k_medoids(dist, k, iterations=20):
+    """Indices of k medoids for a square distance matrix (greedy build + swaps)"""
+    n = len(dist)
+    if n <= k:
+        return list(range(n))
+
+    # Build: start from the most central point, then add the point that
+    # lowers the total distance to the nearest medoid the most
+    medoids = [int(dist.sum(axis=1).argmin())]
+    nearest = dist[medoids[0]].copy()
+    while len(medoids) < k:
+        gain = np.maximum(nearest[None, :] - dist, 0).sum(axis=1)
+        gain[medoids] = -1
+        best = int(gain.argmax())
+        medoids.append(best)
+        nearest = np.minimum(nearest, dist[best])
+
+    # Refine: re-center every cluster on its most central member
+    for _ in range(iterations):
+        assignment = dist[medoids].argmin(axis=0)
+        updated = []
+        for cluster in range(k):
+            members = np.flatnonzero(assignment == cluster)
+            if not len(members):
+                updated.append(medoids[cluster])
+                continue
+            within = dist[np.ix_(members, members)].sum(axis=1)
+            updated.append(int(members[within.argmin()]))
+        if updated == medoids:
+            break
+        medoids = updated
+    return sorted(set(medoids))
+
+
+def select_prototypes(histograms, labels, k):
+    """At most k representative histograms per label, as (histograms, labels)"""
+    histograms = np.asarray(histograms, dtype=np.float32)
+    labels = np.asarray(labels).reshape(-1)
+    keep = []
+    for label in np.unique(labels):
+        rows = np.flatnonzero(labels == label)
+        chosen = k_medoids(chi_square_matrix(histograms[rows]), k)
+        keep.extend(rows[chosen])
+    keep = np.sort(np.array(keep, dtype=np.int64))
+    return histograms[keep], labels[keep]
+
+
+def compact(model, k):
+    """Copy of a NumpyLBPH model with at most k histograms per label"""
+    compacted = NumpyLBPH(model.radius, model.neighbors, model.grid_x, model.grid_y,
+                          model.threshold)
+    compacted.set_histograms(*select_prototypes(model.histograms, model.labels, k))
+    return compacted
+
+
+def evaluate(model, images, labels, threshold=FACE_CONFIDENCE_THRESHOLD):
+    """(accuracy, milliseconds per face) of model on labelled face crops"""
+    start = time.perf_counter()
+    results = model.predict_many(images)
+    elapsed = time.perf_counter() - start
+    correct = sum(1 for (label, confidence), expected in zip(results, labels)
+                  if label == expected and confidence < threshold)
+    return correct / max(1, len(images)), 1000 * elapsed / max(1, len(images))
@@ -0,0 +1,93 @@
+import glob
+import os
+import re
+
+import numpy as np
+
+from lbph_engine import NumpyLBPH, binary_path
+
+SHARD_DIR = "courses"
+# Full model the shards are split from, in the folder above SHARD_DIR
+MODEL_NAME = "face_model.yml"
+# Shard for students without a course in students.csv
+UNASSIGNED = "unassigned"
+
+
+def course_key(course):
+    """File-name-safe, case-insensitive shard name for a course"""
+    key = re.sub(r"[^a-z0-9]+", "_", (course or "").strip().lower()).strip("_")
+    return key or UNASSIGNED
+
+
+def shard_path(model_dir, course):
+    return os.path.join(model_dir, SHARD_DIR, f"{course_key(course)}.yml")
+
+
+def list_shards(model_dir):
+    """Course keys that have a shard model"""
+    paths = glob.glob(os.path.join(model_dir, SHARD_DIR, "*.yml"))
+    return sorted(os.path.splitext(os.path.basename(p))[0] for p in paths)
+
+
+def check_shards(paths):
+    """Raise ValueError for a shard older than the full model it was split
+    from: retraining without rebuilding it would silently miss new students"""
+    for path in paths:
+        model_path = os.path.join(os.path.dirname(os.path.dirname(path)), MODEL_NAME)
+        if os.path.exists(model_path) and os.path.getmtime(path) < os.path.getmtime(model_path):
+            raise ValueError(f"Course model {path} is older than {model_path}; "
+                             f"rebuild it with: python src/face_train.py --shards")
+
+
+def build_shards(model, label_map, students, model_dir):
+    """Split a NumpyLBPH model into one model per course.
+
+    Labels stay the global ones from label_map, so every shard shares
+    label_map.pkl. Returns {course key: histogram count}; shards of
+    courses that no longer have students are removed.
+    """
+    course_of_label = {label: course_key(students.get(student_id, {}).get("course"))
+                       for label, student_id in label_map.items()}
+    keys = np.array([course_of_label.get(int(label), UNASSIGNED) for label in model.labels])
+
+    os.makedirs(os.path.join(model_dir, SHARD_DIR), exist_ok=True)
+    counts = {}
+    histograms = model.histograms
+    for key in sorted(set(keys)):
+        rows = np.flatnonzero(keys == key)
+        shard = NumpyLBPH(model.radius, model.neighbors, model.grid_x, model.grid_y,
+                          model.threshold)
+        shard.set_histograms(histograms[rows], model.labels[rows])
+        path = os.path.join(model_dir, SHARD_DIR, f"{key}.yml")
+        shard.write(path)
+        shard.write_binary(binary_path(path))
+        counts[key] = len(rows)
+
+    for key in list_shards(model_dir):
+        if key not in counts:
+            path = os.path.join(model_dir, SHARD_DIR, f"{key}.yml")
+            for stale in (path, binary_path(path)):
+                if os.path.exists(stale):
+                    os.remove(stale)
+    return counts
+
+
+class ShardSet:
+    """Several shard recognizers searched as one model (best match wins)"""
+
+    def __init__(self, recognizers):
+        self.recognizers = recognizers
+
+    def predict_many(self, rois):
+        best = [(-1, float(np.finfo(np.float64).max))] * len(rois)
+        for recognizer in self.recognizers:
+            if hasattr(recognizer, "predict_many"):
+                results = recognizer.predict_many(rois)
+            else:
+                results = [recognizer.predict(roi) for roi in rois]
+            best = [result if result[0] != -1 and result[1] < current[1] else current
+                    for result, current in zip(results, best)]
+        return best
+
+    def predict(self, roi):
+        return self.predict_many([roi])[0]
@@ -0,0 +1,111 @@
+from collections import Counter, deque
+import numpy as np
+from config import (TRACK_IOU_THRESHOLD, TRACK_MAX_MISSED, TRACK_PREDICT_INTERVAL,
+                    TRACK_VOTE_WINDOW, TRACK_VOTES)
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise intersection-over-union of two lists of (x, y, w, h) boxes"""
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    ax2, ay2 = a[:, 0] + a[:, 2], a[:, 1] + a[:, 3]
+    bx2, by2 = b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+    iw = np.clip(np.minimum(ax2[:, None], bx2) - np.maximum(a[:, 0, None], b[:, 0]), 0, None)
+    ih = np.clip(np.minimum(ay2[:, None], by2) - np.maximum(a[:, 1, None], b[:, 1]), 0, None)
+    inter = iw * ih
+    union = (a[:, 2] * a[:, 3])[:, None] + b[:, 2] * b[:, 3] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+class Track:
+    """One face followed across frames, with its recent predictions"""
+
+    def __init__(self, track_id, box, vote_window):
+        self.track_id = track_id
+        self.box = tuple(int(v) for v in box)
+        self.missed = 0
+        self.since_predict = None
+        self.votes = deque(maxlen=vote_window)
+        self.identity = None
+        self.confidence = None
+        # Set by the attendance loop once the identity has been marked
+        self.marked = False
+        self.status = ""
+
+
+class FaceTracker:
+    """IoU tracker that lets recognition run once per person, not per frame.
+
+    update() matches the frame's detections to existing tracks; only
+    tracks returned by needs_prediction() go to the recognizer. A track's
+    identity is the student predicted at least `votes` times in its last
+    `vote_window` predictions, so a single bad prediction never marks
+    attendance.
+    """
+
+    def __init__(self, iou_threshold=TRACK_IOU_THRESHOLD, max_missed=TRACK_MAX_MISSED,
+                 predict_interval=TRACK_PREDICT_INTERVAL, votes=TRACK_VOTES,
+                 vote_window=TRACK_VOTE_WINDOW):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.predict_interval = predict_interval
+        self.votes = votes
+        self.vote_window = max(vote_window, votes)
+        self.tracks = []
+        self.next_id = 1
+        self.predictions = 0
+
+    def update(self, boxes):
+        """Tracks for this frame's boxes, in the same order as boxes"""
+        boxes = [tuple(int(v) for v in box) for box in boxes]
+        matched = [None] * len(boxes)
+        free_tracks = set(range(len(self.tracks)))
+
+        if boxes and self.tracks:
+            overlap = iou_matrix(boxes, [t.box for t in self.tracks])
+            # Greedy: best-overlapping pairs first
+            for flat in np.argsort(overlap, axis=None)[::-1]:
+                i, j = np.unravel_index(flat, overlap.shape)
+                if overlap[i, j] < self.iou_threshold:
+                    break
+                if matched[i] is None and j in free_tracks:
+                    matched[i] = self.tracks[j]
+                    free_tracks.discard(j)
+
+        for j in free_tracks:
+            self.tracks[j].missed += 1
+        self.tracks = [t for t in self.tracks if t.missed <= self.max_missed]
+
+        for i, box in enumerate(boxes):
+            track = matched[i]
+            if track is None:
+                track = Track(self.next_id, box, self.vote_window)
+                self.next_id += 1
+                self.tracks.append(track)
+                matched[i] = track
+            else:
+                track.box = box
+                track.missed = 0
+            if track.since_predict is not None:
+                track.since_predict += 1
+        return matched
+
+    def needs_prediction(self, track):
+        if track.since_predict is None:
+            return True
+        if track.identity is None and len(track.votes) < self.vote_window:
+            # Still collecting votes
+            return True
+        return track.since_predict >= self.predict_interval
+
+    def record(self, track, student_id, confidence):
+        """Add a prediction (student_id None = unknown) and re-vote the identity"""
+        self.predictions += 1
+        track.since_predict = 0
+        track.votes.append(student_id)
+        track.confidence = confidence
+        winner, count = Counter(track.votes).most_common(1)[0]
+        identity = winner if winner is not None and count >= self.votes else None
+        if identity != track.identity:
+            track.identity = identity
+            track.marked = False
@@ -1,52 +1,271 @@
+import argparse
 import cv2
+import json
 import os
 import numpy as np
 import pickle
+from config import FACE_SIZE, FACE_PROTOTYPES
+from face_dataset import FaceDataset, MANIFEST_NAME
+from face_index import IVFIndex, has_index, recall_report
+from face_prototypes import compact, evaluate
+from face_shards import build_shards, list_shards
+from lbph_engine import NumpyLBPH, binary_path
+from roster import Roster
 
 DATASET_DIR = "smart_attendance/faces"
 MODEL_DIR = "smart_attendance/models"
 MODEL_PATH = f"{MODEL_DIR}/face_model.yml"
 LABEL_MAP_PATH = f"{MODEL_DIR}/label_map.pkl"
+# Face size and images already in face_model.yml:
+# {"face_size": 200, "images": {"student_id/img.jpg": [mtime_ns, size]}}
+MANIFEST_PATH = f"{MODEL_DIR}/{MANIFEST_NAME}"
+# Decoded, resized crops of every registered image
+CACHE_PATH = f"{MODEL_DIR}/faces_cache.npy"
+# Source of each student's course for --shards
+STUDENTS_CSV = "smart_attendance/data/students.csv"
 
-os.makedirs(MODEL_DIR, exist_ok=True)
 
-faces = []
-labels = []
-label_map = {}
-current_label = 0
+def scan_dataset(dataset_dir):
+    """{relative image path: (student_id, mtime_ns, size)} for every file on disk"""
+    images = {}
+    for student_id in sorted(os.listdir(dataset_dir)):
+        student_path = os.path.join(dataset_dir, student_id)
+        if not os.path.isdir(student_path):
+            continue
+        for img_name in sorted(os.listdir(student_path)):
+            img_path = os.path.join(student_path, img_name)
+            st = os.stat(img_path)
+            images[f"{student_id}/{img_name}"] = (student_id, st.st_mtime_ns, st.st_size)
+    return images
 
-for student_id in os.listdir(DATASET_DIR):
-    student_path = os.path.join(DATASET_DIR, student_id)
-    if not os.path.isdir(student_path):
-        continue
 
-    label_map[current_label] = student_id
+def load_state():
+    """(label_map, manifest), or (None, None) when there is no usable model"""
+    if not all(os.path.exists(p) for p in (MODEL_PATH, LABEL_MAP_PATH, MANIFEST_PATH)):
+        return None, None
+    try:
+        with open(LABEL_MAP_PATH, "rb") as f:
+            label_map = pickle.load(f)
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError, pickle.UnpicklingError) as e:
+        print(f"Ignoring previous training state: {e}")
+        return None, None
+    return label_map, manifest
 
-    for img_name in os.listdir(student_path):
-        img_path = os.path.join(student_path, img_name)
-        img = cv2.imread(img_path, cv2.IMREAD_GRAYSCALE)
-        if img is not None:
-            faces.append(img)
-            labels.append(current_label)
 
-    current_label += 1
+def read_faces(records, paths, label_of):
+    faces, labels, trained = [], [], {}
+    for record in records:
+        rel_path = str(record["path"])
+        if rel_path in paths:
+            student_id, mtime_ns, size = paths[rel_path]
+            faces.append(record["pixels"])
+            labels.append(label_of[student_id])
+            trained[rel_path] = [mtime_ns, size]
+    return faces, labels, trained
 
-if not faces:
-    print("ERROR: No faces found. Register students first.")
-    exit()
 
-# Create LBPH recognizer
-try:
-    recognizer = cv2.face.LBPHFaceRecognizer_create()
-except AttributeError:
-    print("ERROR: cv2.face module not found. Install opencv-contrib-python.")
-    exit()
+def to_numpy_model(recognizer):
+    model = NumpyLBPH(recognizer.getRadius(), recognizer.getNeighbors(),
+                      recognizer.getGridX(), recognizer.getGridY(), recognizer.getThreshold())
+    histograms = [h.reshape(-1) for h in recognizer.getHistograms()]
+    model.set_histograms(np.vstack(histograms), recognizer.getLabels())
+    return model
 
-recognizer.train(faces, np.array(labels))
-recognizer.save(MODEL_PATH)
 
-# Save label map for attendance lookup
-with open(LABEL_MAP_PATH, "wb") as f:
-    pickle.dump(label_map, f)
+def size_mb(model):
+    return model.matrix.nbytes / (1024 * 1024)
 
-print("Face model trained successfully.")
+
+def holdout_split(records, label_of, holdout=5):
+    """(train faces, train labels, test faces, test labels); every holdout-th
+    image of each student is kept out of training"""
+    train_faces, train_labels, test_faces, test_labels = [], [], [], []
+    seen = {}
+    for record in records:
+        student_id = str(record["path"]).split("/")[0]
+        if student_id not in label_of:
+            continue
+        seen[student_id] = seen.get(student_id, 0) + 1
+        if seen[student_id] % holdout == 0:
+            test_faces.append(record["pixels"])
+            test_labels.append(label_of[student_id])
+        else:
+            train_faces.append(record["pixels"])
+            train_labels.append(label_of[student_id])
+    return train_faces, train_labels, test_faces, test_labels
+
+
+def report_prototypes(records, label_of, k, holdout=5):
+    """Accuracy/latency of the full and the k-prototype model on held-out images"""
+    train_faces, train_labels, test_faces, test_labels = holdout_split(records, label_of, holdout)
+    if not test_faces:
+        print(f"Not enough images to hold out every {holdout}th one for evaluation.")
+        return
+
+    full = NumpyLBPH().train(train_faces, train_labels)
+    compacted = compact(full, k)
+    print(f"Held-out evaluation ({len(train_faces)} training, {len(test_faces)} held-out images):")
+    print(f"{'model':>10} {'histograms':>10} {'size MB':>8} {'ms/face':>8} {'accuracy':>8}")
+    for name, model in (("full", full), (f"k={k}", compacted)):
+        accuracy, latency = evaluate(model, test_faces, test_labels)
+        print(f"{name:>10} {len(model.labels):>10} {size_mb(model):>8.1f} "
+              f"{latency:>8.2f} {accuracy:>8.1%}")
+
+
+def report_index(records, label_of, nlist, holdout=5):
+    """Recall and latency of the descriptor index against exhaustive search"""
+    train_faces, train_labels, test_faces, _ = holdout_split(records, label_of, holdout)
+    if not test_faces:
+        print(f"Not enough images to hold out every {holdout}th one for evaluation.")
+        return
+    full = NumpyLBPH().train(train_faces, train_labels)
+    index = IVFIndex().build(full, nlist)
+    print(f"Index evaluation ({len(full.labels)} histograms in {len(index.centroids)} lists, "
+          f"{len(test_faces)} held-out queries):")
+    nprobes = sorted({1, 2, 4, 8, 16, index.nprobe} & set(range(1, len(index.centroids) + 1)))
+    recall_report(index, full, test_faces, nprobes)
+
+
+def write_shards(model, label_map):
+    counts = build_shards(model, label_map, Roster(STUDENTS_CSV).refresh(), MODEL_DIR)
+    print("Course shards: " + ", ".join(f"{key} ({n})" for key, n in counts.items()))
+
+
+def save_index(model, nlist):
+    index = IVFIndex().build(model, nlist)
+    index.write(MODEL_PATH)
+    print(f"Descriptor index: {len(model.labels)} histograms in {len(index.centroids)} lists.")
+
+
+def save_state(recognizer, label_map, images, prototypes=0, shards=False, index_lists=None):
+    recognizer.write(MODEL_PATH)
+    # Memory-mappable copy for the numpy recognizer backend
+    model = recognizer if isinstance(recognizer, NumpyLBPH) else to_numpy_model(recognizer)
+    model.write_binary(binary_path(MODEL_PATH))
+    if shards:
+        write_shards(model, label_map)
+    if index_lists is not None:
+        save_index(model, index_lists)
+    # Save label map for attendance lookup
+    with open(LABEL_MAP_PATH, "wb") as f:
+        pickle.dump(label_map, f)
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"face_size": FACE_SIZE, "prototypes": prototypes, "images": images}, f)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Train the LBPH face model. Only new images are added to an "
+                    "existing model unless images were removed or changed."
+    )
+    parser.add_argument("--full", action="store_true", help="retrain from scratch")
+    parser.add_argument("--workers", type=int, help="image decoding threads (default: CPU count)")
+    parser.add_argument("--prototypes", type=int, default=FACE_PROTOTYPES,
+                        help="keep at most K representative histograms per student (0 = all)")
+    parser.add_argument("--evaluate", action="store_true",
+                        help="with --prototypes, compare accuracy and latency of the full "
+                             "and the reduced model on held-out images; with --index, "
+                             "report recall against exhaustive search")
+    parser.add_argument("--shards", action="store_true",
+                        help="also write one model per course (students.csv course column)")
+    parser.add_argument("--index", nargs="?", type=int, const=0, metavar="LISTS",
+                        help="also build the descriptor index used for recognition, with "
+                             "LISTS clusters (default: square root of the histogram count)")
+    args = parser.parse_args()
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    # Existing course shards are rebuilt with every model change, or they
+    # would keep missing the students added since
+    shards = args.shards or bool(list_shards(MODEL_DIR))
+
+    # Create LBPH recognizer
+    try:
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+    except AttributeError:
+        print("ERROR: cv2.face module not found. Install opencv-contrib-python.")
+        return
+
+    on_disk = scan_dataset(DATASET_DIR)
+    dataset = FaceDataset(DATASET_DIR, CACHE_PATH, workers=args.workers)
+    records = dataset.load(on_disk)
+    print(f"{len(records)} face images ({dataset.decoded} decoded, rest from cache).")
+    if args.evaluate:
+        # Held-out reports train their own models; labels only need to be consistent
+        student_ids = sorted({student_id for student_id, _, _ in on_disk.values()})
+        eval_labels = {student_id: label for label, student_id in enumerate(student_ids)}
+        if args.prototypes:
+            report_prototypes(records, eval_labels, args.prototypes)
+        if args.index is not None:
+            report_index(records, eval_labels, args.index)
+    label_map, manifest = (None, None) if args.full else load_state()
+
+    if manifest is not None and manifest.get("face_size") != FACE_SIZE:
+        print(f"Model was trained at another face size, retraining at {FACE_SIZE}px.")
+        label_map, manifest = None, None
+    if manifest is not None and (args.prototypes or manifest.get("prototypes")):
+        # Prototypes are chosen from all of a student's images, so the
+        # model is rebuilt (from the crop cache) rather than appended to
+        label_map, manifest = None, None
+    if manifest is not None:
+        manifest = manifest["images"]
+        # update() can only append; removed or rewritten images need a full retrain
+        stale = [p for p, entry in manifest.items()
+                 if p not in on_disk or list(on_disk[p][1:]) != entry]
+        if stale:
+            print(f"{len(stale)} trained image(s) removed or changed, retraining from scratch.")
+            label_map, manifest = None, None
+
+    if manifest is None:
+        student_ids = sorted({student_id for student_id, _, _ in on_disk.values()})
+        label_map = dict(enumerate(student_ids))
+        label_of = {student_id: label for label, student_id in label_map.items()}
+        faces, labels, trained = read_faces(records, on_disk, label_of)
+        if not faces:
+            print("ERROR: No faces found. Register students first.")
+            return
+        recognizer.train(faces, np.array(labels))
+        if args.prototypes:
+            full = to_numpy_model(recognizer)
+            recognizer = compact(full, args.prototypes)
+            print(f"Kept {len(recognizer.labels)} of {len(full.labels)} histograms "
+                  f"({size_mb(full):.1f} MB -> {size_mb(recognizer):.1f} MB).")
+        save_state(recognizer, label_map, trained, args.prototypes, shards, args.index)
+        print(f"Face model trained successfully ({len(faces)} images, {len(label_map)} students).")
+        return
+
+    new = {p: entry for p, entry in on_disk.items() if p not in manifest}
+    if not new:
+        print("Face model is up to date.")
+        if args.shards:
+            # Courses may have changed in students.csv without new images
+            write_shards(NumpyLBPH().read(MODEL_PATH), label_map)
+        if args.index is not None and not has_index(MODEL_PATH):
+            save_index(NumpyLBPH().read(MODEL_PATH), args.index)
+        return
+
+    # Existing labels keep their numbers; new students are appended
+    label_of = {student_id: label for label, student_id in label_map.items()}
+    next_label = max(label_map, default=-1) + 1
+    for student_id, _, _ in new.values():
+        if student_id not in label_of:
+            label_map[next_label] = student_id
+            label_of[student_id] = next_label
+            next_label += 1
+
+    faces, labels, trained = read_faces(records, new, label_of)
+    if not faces:
+        print("No readable new face images.")
+        return
+    recognizer.read(MODEL_PATH)
+    recognizer.update(faces, np.array(labels))
+    manifest.update(trained)
+    save_state(recognizer, label_map, manifest, shards=shards, index_lists=args.index)
+    print(f"Face model updated with {len(faces)} new images ({len(label_map)} students).")
+
+
+if __name__ == "__main__":
+    main()
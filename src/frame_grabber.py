@@ -0,0 +1,86 @@
+import threading
+import cv2
+
+
+class FrameGrabber:
+    """Camera reader that keeps only the newest frame.
+
+    A background thread calls cap.read() continuously into a one-slot
+    buffer; read() hands the processing loop the latest frame and any
+    frame it never picked up is counted as dropped. Mirrors the
+    cv2.VideoCapture read/isOpened/release calls the loops already use.
+
+    With drop=False the reader waits for each frame to be consumed
+    instead, which suits video files where every frame matters.
+    """
+
+    def __init__(self, source=0, drop=True, timeout=5.0):
+        self.cap = source if hasattr(source, "read") else cv2.VideoCapture(source)
+        self.drop = drop
+        self.timeout = timeout
+        self.cond = threading.Condition()
+        self.frame = None
+        self.ended = False
+        self.running = False
+
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0
+
+        self.thread = None
+        if self.cap.isOpened():
+            self.running = True
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def _run(self):
+        try:
+            while self.running:
+                ret, frame = self.cap.read()
+                with self.cond:
+                    if not ret:
+                        self.ended = True
+                        self.cond.notify_all()
+                        return
+                    if not self.drop:
+                        self.cond.wait_for(lambda: self.frame is None or not self.running)
+                    if self.frame is not None:
+                        self.dropped += 1
+                    self.frame = frame
+                    self.captured += 1
+                    self.cond.notify_all()
+        finally:
+            # Released here, never while this thread may be inside cap.read()
+            self.cap.release()
+
+    def read(self):
+        """Return (True, newest frame) or (False, None) once the source ends"""
+        with self.cond:
+            self.cond.wait_for(lambda: self.frame is not None or self.ended, self.timeout)
+            frame = self.frame
+            if frame is None:
+                return False, None
+            self.frame = None
+            self.processed += 1
+            self.cond.notify_all()
+        return True, frame
+
+    def stats(self):
+        return {
+            "captured": self.captured,
+            "processed": self.processed,
+            "dropped": self.dropped,
+        }
+
+    def release(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.thread is None:
+            self.cap.release()
+        else:
+            # A read still in progress releases the capture when it returns
+            self.thread.join(timeout=2.0)
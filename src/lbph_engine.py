@@ -0,0 +1,230 @@
+import os
+import struct
+
+import cv2
+import numpy as np
+
+# Binary model: 64-byte header, then sums (float64[count]), labels
+# (int32[count]) and the bin-major histogram matrix (float32[bins, count])
+MODEL_MAGIC = b"SLBPH001"
+MODEL_HEADER = struct.Struct("<8s6id")
+MODEL_HEADER_SIZE = 64
+
+
+def binary_path(model_path):
+    """face_model.yml -> face_model.bin"""
+    return os.path.splitext(model_path)[0] + ".bin"
+
+
+def elbp(image, radius=1, neighbors=8):
+    """Extended (circular) LBP codes, bit-for-bit like OpenCV's elbp_()"""
+    src = np.asarray(image, dtype=np.float32)
+    rows, cols = src.shape
+    center = src[radius:rows - radius, radius:cols - radius]
+    codes = np.zeros(center.shape, dtype=np.int32)
+    eps = np.finfo(np.float32).eps
+
+    for n in range(neighbors):
+        # Same float32 sample point and bilinear weights as OpenCV
+        x = np.float32(radius * np.cos(2.0 * np.pi * n / neighbors))
+        y = np.float32(-radius * np.sin(2.0 * np.pi * n / neighbors))
+        fx, fy = int(np.floor(x)), int(np.floor(y))
+        cx, cy = int(np.ceil(x)), int(np.ceil(y))
+        ty, tx = np.float32(y - fy), np.float32(x - fx)
+        one = np.float32(1)
+        w1, w2 = (one - tx) * (one - ty), tx * (one - ty)
+        w3, w4 = (one - tx) * ty, tx * ty
+
+        def shifted(dy, dx):
+            return src[radius + dy:rows - radius + dy, radius + dx:cols - radius + dx]
+
+        t = (w1 * shifted(fy, fx) + w2 * shifted(fy, cx)
+             + w3 * shifted(cy, fx) + w4 * shifted(cy, cx))
+        codes += (((t > center) | (np.abs(t - center) < eps)).astype(np.int32) << n)
+    return codes
+
+
+def spatial_histogram(codes, patterns, grid_x=8, grid_y=8):
+    """Normalized per-cell histograms of LBP codes, concatenated (float32)"""
+    height, width = codes.shape[0] // grid_y, codes.shape[1] // grid_x
+    if width == 0 or height == 0:
+        return np.zeros(grid_x * grid_y * patterns, dtype=np.float32)
+    # Crop to whole cells and give every code a cell-specific bin
+    cells = codes[:grid_y * height, :grid_x * width]
+    cell_index = (np.arange(grid_y * height) // height)[:, None] * grid_x \
+        + (np.arange(grid_x * width) // width)[None, :]
+    bins = cell_index * patterns + cells
+    hist = np.bincount(bins.ravel(), minlength=grid_x * grid_y * patterns)
+    return (hist / np.float32(width * height)).astype(np.float32)
+
+
+class NumpyLBPH:
+    """LBPH recognizer with all training histograms in one float32 matrix.
+
+    Reads face_model.yml files written by cv2.face.LBPHFaceRecognizer and
+    returns the same (label, confidence) pairs, but predict_many() scores
+    a batch of faces against every training histogram without a Python
+    loop over the training set.
+    """
+
+    def __init__(self, radius=1, neighbors=8, grid_x=8, grid_y=8,
+                 threshold=np.finfo(np.float64).max):
+        self.radius = radius
+        self.neighbors = neighbors
+        self.grid_x = grid_x
+        self.grid_y = grid_y
+        self.threshold = threshold
+        self.set_histograms(np.zeros((0, self.bins), dtype=np.float32), [])
+
+    @property
+    def bins(self):
+        return self.grid_x * self.grid_y * (1 << self.neighbors)
+
+    @property
+    def histograms(self):
+        """Training histograms, one row per training face"""
+        return self.matrix.T
+
+    def set_histograms(self, histograms, labels):
+        # Stored bin-major (one column per training face) so that the
+        # nonzero bins of a query select contiguous rows
+        self.matrix = np.ascontiguousarray(np.asarray(histograms, dtype=np.float32).T)
+        self.sums = self.matrix.sum(axis=0, dtype=np.float64)
+        self.labels = np.asarray(labels, dtype=np.int32).reshape(-1)
+
+    def read(self, path):
+        fs = cv2.FileStorage(path, cv2.FILE_STORAGE_READ)
+        try:
+            node = fs.getNode("opencv_lbphfaces")
+            if node.empty():
+                raise ValueError(f"{path} is not an LBPH model")
+            self.radius = int(node.getNode("radius").real())
+            self.neighbors = int(node.getNode("neighbors").real())
+            self.grid_x = int(node.getNode("grid_x").real())
+            self.grid_y = int(node.getNode("grid_y").real())
+            self.threshold = node.getNode("threshold").real()
+
+            hist_node = node.getNode("histograms")
+            rows = [hist_node.at(i).mat().reshape(-1) for i in range(hist_node.size())]
+            histograms = np.vstack(rows) if rows else np.zeros((0, self.bins))
+            self.set_histograms(histograms, node.getNode("labels").mat())
+        finally:
+            fs.release()
+        return self
+
+    def write(self, path):
+        """Save in the face_model.yml layout that cv2.face can read back"""
+        fs = cv2.FileStorage(path, cv2.FILE_STORAGE_WRITE)
+        try:
+            fs.startWriteStruct("opencv_lbphfaces", cv2.FileNode_MAP)
+            fs.write("threshold", float(self.threshold))
+            fs.write("radius", self.radius)
+            fs.write("neighbors", self.neighbors)
+            fs.write("grid_x", self.grid_x)
+            fs.write("grid_y", self.grid_y)
+            fs.startWriteStruct("histograms", cv2.FileNode_SEQ)
+            for histogram in self.histograms:
+                fs.write("", histogram.reshape(1, -1))
+            fs.endWriteStruct()
+            fs.write("labels", self.labels.reshape(-1, 1))
+            fs.startWriteStruct("labelsInfo", cv2.FileNode_SEQ)
+            fs.endWriteStruct()
+            fs.endWriteStruct()
+        finally:
+            fs.release()
+
+    def write_binary(self, path):
+        count = len(self.labels)
+        header = MODEL_HEADER.pack(MODEL_MAGIC, self.radius, self.neighbors, self.grid_x,
+                                   self.grid_y, count, self.bins, float(self.threshold))
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header.ljust(MODEL_HEADER_SIZE, b"\0"))
+            f.write(np.ascontiguousarray(self.sums, dtype="<f8").tobytes())
+            f.write(np.ascontiguousarray(self.labels, dtype="<i4").tobytes())
+            f.write(np.ascontiguousarray(self.matrix, dtype="<f4").tobytes())
+        os.replace(tmp_path, path)
+
+    def read_binary(self, path):
+        """Memory-map a model written by write_binary(); nothing is parsed"""
+        with open(path, "rb") as f:
+            header = f.read(MODEL_HEADER.size)
+        if len(header) < MODEL_HEADER.size or not header.startswith(MODEL_MAGIC):
+            raise ValueError(f"{path} is not a binary LBPH model")
+        (_, self.radius, self.neighbors, self.grid_x, self.grid_y,
+         count, bins, self.threshold) = MODEL_HEADER.unpack(header)
+        if count == 0:
+            self.set_histograms(np.zeros((0, bins), dtype=np.float32), [])
+            return self
+        offset = MODEL_HEADER_SIZE
+        self.sums = np.memmap(path, dtype="<f8", mode="r", offset=offset, shape=(count,))
+        offset += 8 * count
+        self.labels = np.memmap(path, dtype="<i4", mode="r", offset=offset, shape=(count,))
+        offset += 4 * count
+        self.matrix = np.memmap(path, dtype="<f4", mode="r", offset=offset, shape=(bins, count))
+        return self
+
+    def train(self, images, labels):
+        histograms = [self.histogram(image) for image in images]
+        self.set_histograms(np.vstack(histograms) if histograms else
+                            np.zeros((0, self.bins), dtype=np.float32), labels)
+        return self
+
+    def histogram(self, image):
+        codes = elbp(image, self.radius, self.neighbors)
+        return spatial_histogram(codes, 1 << self.neighbors, self.grid_x, self.grid_y)
+
+    def distances(self, queries):
+        """Chi-square (HISTCMP_CHISQR_ALT) distances, queries x training faces.
+
+        2 * sum((q-h)^2 / (q+h)) is rewritten as
+        2 * (sum(q) + sum(h) - 4 * sum(q*h / (q+h))), where the last sum
+        only has terms for the query's nonzero bins (typically a third).
+
+        Each query is one vectorized pass over the training matrix. Scoring
+        the whole batch in one pass would have to use the union of the
+        queries' nonzero bins, which grows to most of the histogram (about
+        12k of 16k bins for 16 faces) and measured 1.6-3x slower.
+        """
+        out = np.empty((len(queries), self.matrix.shape[1]), dtype=np.float64)
+        for row, query in enumerate(queries):
+            out[row] = self.distances_to(query)
+        return out
+
+    def distances_to(self, query, columns=None):
+        """Distances from one query histogram to all (or the given) training faces"""
+        nonzero = np.flatnonzero(query)
+        q = query[nonzero][:, None]
+        if columns is None:
+            h = self.matrix[nonzero]
+            sums = self.sums
+        else:
+            h = self.matrix[np.ix_(nonzero, columns)]
+            sums = self.sums[columns]
+        den = h + q
+        np.multiply(h, q, out=h)
+        np.divide(h, den, out=h)
+        shared = h.sum(axis=0, dtype=np.float64)
+        out = 2.0 * (query.sum(dtype=np.float64) + sums - 4.0 * shared)
+        # Rounding can leave identical histograms a hair below zero
+        return np.maximum(out, 0.0, out=out)
+
+    def predict_many(self, images):
+        """(label, confidence) per face; label -1 when nothing is under threshold"""
+        if not len(images):
+            return []
+        if not len(self.labels):
+            return [(-1, float(np.finfo(np.float64).max))] * len(images)
+        queries = np.vstack([self.histogram(image) for image in images])
+        dist = self.distances(queries)
+        # argmin picks the first minimum, like OpenCV's strict '<' scan
+        best = dist.argmin(axis=1)
+        results = []
+        for row, index in enumerate(best):
+            confidence = float(dist[row, index])
+            label = int(self.labels[index]) if confidence < self.threshold else -1
+            results.append((label, confidence))
+        return results
+
+    def predict(self, image):
+        return self.predict_many([image])[0]
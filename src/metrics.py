@@ -0,0 +1,217 @@
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import METRICS_HOST, METRICS_PORT
+
+# Upper bounds (seconds) of the stage latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Marks per minute and the unknown-face rate are computed over this many seconds
+RATE_WINDOW = 60.0
+
+_STOP = object()
+
+
+class Metrics:
+    """Prometheus text-format endpoint for an attendance session.
+
+    The camera loops only ever call SimpleQueue.put() (observe(),
+    prediction(), mark()), which never blocks; a background thread folds
+    the events into counters and histograms, and scrapes of
+    http://127.0.0.1:<port>/metrics read those under a lock the loops
+    never take. Frame and writer counters are read straight from the
+    attached FrameGrabber and AttendanceWriter at scrape time.
+
+    Until start() is called with a port every method is a no-op.
+    """
+
+    def __init__(self):
+        self.events = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.server = None
+        self.thread = None
+
+        self.stages = {}
+        self.marks = {}
+        self.recent_marks = deque()
+        self.predictions = {"known": 0, "unknown": 0}
+        self.recent_predictions = deque()
+        # mode -> attached FrameGrabber, and frames of grabbers already released
+        self.sources = {}
+        self.frame_totals = {}
+        self.writer = None
+
+    def start(self, port=METRICS_PORT, host=METRICS_HOST):
+        if not port or self.server is not None:
+            return self
+        try:
+            self.server = ThreadingHTTPServer((host, port), self._handler())
+        except OSError as e:
+            print(f"ERROR: Cannot serve metrics on {host}:{port}: {e}")
+            return self
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        print(f"Metrics on http://{host}:{port}/metrics")
+        return self
+
+    @property
+    def enabled(self):
+        return self.server is not None
+
+    # Frame loop side: queue an event and return
+
+    def observe(self, stage, seconds):
+        if self.server is not None:
+            self.events.put(("stage", stage, seconds))
+
+    def prediction(self, known):
+        if self.server is not None:
+            self.events.put(("prediction", bool(known), time.monotonic()))
+
+    def mark(self, method, new):
+        if self.server is not None:
+            self.events.put(("mark", method, bool(new), time.monotonic()))
+
+    # Session setup: called once per session, not per frame
+
+    def attach(self, mode, grabber):
+        with self.lock:
+            self.sources[mode] = grabber
+
+    def detach(self, mode):
+        """Fold a finished session's frame counts into the running totals"""
+        with self.lock:
+            grabber = self.sources.pop(mode, None)
+            if grabber is not None:
+                totals = self.frame_totals.setdefault(mode, {"processed": 0, "dropped": 0})
+                totals["processed"] += grabber.processed
+                totals["dropped"] += grabber.dropped
+
+    def _run(self):
+        while True:
+            event = self.events.get()
+            if event is _STOP:
+                return
+            with self.lock:
+                self._apply(event)
+
+    def _apply(self, event):
+        kind = event[0]
+        if kind == "stage":
+            _, stage, seconds = event
+            if stage not in self.stages:
+                self.stages[stage] = {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+            histogram = self.stages[stage]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+        elif kind == "prediction":
+            _, known, now = event
+            self.predictions["known" if known else "unknown"] += 1
+            self.recent_predictions.append((now, known))
+        elif kind == "mark":
+            _, method, new, now = event
+            key = (method, "marked" if new else "duplicate")
+            self.marks[key] = self.marks.get(key, 0) + 1
+            if new:
+                self.recent_marks.append((now, method))
+
+    def _trim(self, now):
+        while self.recent_marks and now - self.recent_marks[0][0] > RATE_WINDOW:
+            self.recent_marks.popleft()
+        while self.recent_predictions and now - self.recent_predictions[0][0] > RATE_WINDOW:
+            self.recent_predictions.popleft()
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        with self.lock:
+            self._trim(time.monotonic())
+            frames = {mode: dict(totals) for mode, totals in self.frame_totals.items()}
+            for mode, grabber in self.sources.items():
+                totals = frames.setdefault(mode, {"processed": 0, "dropped": 0})
+                totals["processed"] += grabber.processed
+                totals["dropped"] += grabber.dropped
+
+            metric("attendance_frames_processed_total", "counter",
+                   "Camera frames run through the pipeline",
+                   [((("mode", m),), f["processed"]) for m, f in sorted(frames.items())])
+            metric("attendance_frames_dropped_total", "counter",
+                   "Camera frames replaced by a newer one before processing",
+                   [((("mode", m),), f["dropped"]) for m, f in sorted(frames.items())])
+
+            lines.append("# HELP attendance_stage_seconds Latency of each pipeline stage")
+            lines.append("# TYPE attendance_stage_seconds histogram")
+            for stage, histogram in sorted(self.stages.items()):
+                for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+                    lines.append(f'attendance_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'attendance_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram["count"]}')
+                lines.append(f'attendance_stage_seconds_sum{{stage="{stage}"}} {histogram["sum"]:.6f}')
+                lines.append(f'attendance_stage_seconds_count{{stage="{stage}"}} {histogram["count"]}')
+
+            metric("attendance_marks_total", "counter",
+                   "Attendance marks by method; duplicates were already marked that day",
+                   [((("method", m), ("result", r)), n) for (m, r), n in sorted(self.marks.items())])
+            per_minute = {method: 0 for method, _ in self.marks}
+            for _, method in self.recent_marks:
+                per_minute[method] += 1
+            metric("attendance_marks_per_minute", "gauge",
+                   "New marks in the last minute, by method",
+                   [((("method", m),), n * 60.0 / RATE_WINDOW) for m, n in sorted(per_minute.items())])
+
+            metric("attendance_face_predictions_total", "counter",
+                   "Face recognitions, by whether the face matched a student",
+                   [((("result", r),), n) for r, n in sorted(self.predictions.items())])
+            recent = len(self.recent_predictions)
+            unknown = sum(1 for _, known in self.recent_predictions if not known)
+            metric("attendance_unknown_face_ratio", "gauge",
+                   "Share of face recognitions in the last minute that matched nobody",
+                   [((), round(unknown / recent, 4) if recent else 0)])
+
+            if self.writer is not None:
+                metric("attendance_writer_queue_depth", "gauge",
+                       "Marks waiting for the background writer",
+                       [((), self.writer.queue.qsize())])
+        return "\n".join(lines) + "\n"
+
+    def _handler(self):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.events.put(_STOP)
+            self.thread.join()
+            self.server = None
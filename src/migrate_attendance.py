@@ -0,0 +1,115 @@
+import argparse
+import csv
+import os
+from attendance_compact import COMPACT_FIELDS, CompactCsvStore, to_epoch
+from attendance_store import RECORD_FIELDS
+
+# Methods the scripts write in their second column
+METHODS = ("", "QR", "FACE")
+
+
+def convert_row(row, header=None):
+    """Compact [student_id, method, ts] for any known attendance row layout.
+
+    header is the file's header row when it has one; its column names are
+    used instead of guessing the layout from the row length.
+    """
+    if not row or row[0] == "student_id":
+        return None
+    try:
+        if header and len(header) == len(row):
+            fields = dict(zip(header, row))
+            if "ts" in fields:
+                return [fields["student_id"], fields.get("method", ""), int(fields["ts"])]
+            return [fields["student_id"], fields.get("method", ""),
+                    to_epoch(fields["date"], fields["time"])]
+        if len(row) == 6:
+            # gui_main.py: student_id, name, course, email, date, time
+            return [row[0], "", to_epoch(row[4], row[5])]
+        if len(row) == 4:
+            # src/ scripts: student_id, method, date, time; the old GUI
+            # layout (student_id, name, date, time) has a name there instead
+            method = row[1] if row[1] in METHODS else ""
+            return [row[0], method, to_epoch(row[2], row[3])]
+        if len(row) == 3:
+            # Already compact
+            return [row[0], row[1], int(row[2])]
+    except (KeyError, ValueError):
+        pass
+    return None
+
+
+def migrate(source, dest):
+    """Stream a legacy attendance CSV into compact rows appended to dest.
+
+    Returns (rows converted, rows skipped). Reads and writes one row at a
+    time, so files of any size convert in constant memory.
+    """
+    converted = skipped = 0
+    write_header = not os.path.isfile(dest) or os.path.getsize(dest) == 0
+    with open(source, newline="", encoding="utf-8") as src, \
+            open(dest, "a", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out)
+        if write_header:
+            writer.writerow(COMPACT_FIELDS)
+        header = None
+        for row in csv.reader(src):
+            if row and row[0] == "student_id":
+                header = row
+                continue
+            compact = convert_row(row, header)
+            if compact is None:
+                skipped += bool(row)
+                continue
+            writer.writerow(compact)
+            converted += 1
+    return converted, skipped
+
+
+def export(source, dest, roster_path):
+    """Write a compact log as full rows with roster fields joined in"""
+    store = CompactCsvStore(source, roster_path)
+    count = 0
+    with open(dest, "w", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out)
+        writer.writerow(RECORD_FIELDS)
+        for record in store.records():
+            writer.writerow([record[field] for field in RECORD_FIELDS])
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert attendance logs to the compact student_id/method/ts format "
+                    "or the fixed-width binary log."
+    )
+    parser.add_argument("source", help="attendance log to read")
+    parser.add_argument("dest", help="file to write (converted rows are appended)")
+    parser.add_argument("--format", choices=("compact", "binary"), default="compact",
+                        help="output format when converting a CSV log (default: compact)")
+    parser.add_argument("--export", action="store_true",
+                        help="reverse direction: expand a compact CSV or .bin log into full rows")
+    parser.add_argument("--roster", help="students.csv used by --export "
+                                         "(default: students.csv next to the source)")
+    args = parser.parse_args()
+
+    if args.export:
+        roster = args.roster or os.path.join(os.path.dirname(args.source), "students.csv")
+        if args.source.endswith(".bin"):
+            from attendance_binary import export_csv
+            count = export_csv(args.source, args.dest, roster)
+        else:
+            count = export(args.source, args.dest, roster)
+        print(f"Exported {count} records to {args.dest}")
+    else:
+        if args.format == "binary":
+            from attendance_binary import import_csv
+            converted, skipped = import_csv(args.source, args.dest)
+        else:
+            converted, skipped = migrate(args.source, args.dest)
+        print(f"Migrated {converted} rows to {args.dest} ({skipped} unreadable rows skipped)")
+
+
+if __name__ == "__main__":
+    main()
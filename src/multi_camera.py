@@ -0,0 +1,179 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import time
+from datetime import datetime
+
+import cv2
+
+from attendance_store import open_store
+from attendance_writer import AttendanceWriter
+from face_pipeline import FacePipeline
+from frame_grabber import FrameGrabber
+from qr_attendance import scan_qr
+from recognition_pool import RecognitionPool
+
+ATTENDANCE_FILE = "data/attendance.csv"
+MODEL_PATH = "models/face_model.yml"
+LABEL_MAP_PATH = "models/label_map.pkl"
+CASCADE_PATH = "haarcascade_frontalface_default.xml"
+# Seconds between counter updates from each source
+STATS_INTERVAL = 2.0
+
+
+def parse_source(text):
+    """Device index for digits, otherwise a video file path or stream URL"""
+    return int(text) if text.isdigit() else text
+
+
+def is_live(source):
+    return isinstance(source, int) or "://" in source
+
+
+def run_source(name, source, mode, model_path, label_map_path, cascade_path, results):
+    """Worker process: scan one source and send marks and counters to results.
+
+    Messages are tuples: ("mark", name, student_id, timestamp),
+    ("stats", name, counters), ("error", name, message) and finally
+    ("done", name, None).
+    """
+    recognizer = None
+    # Live sources keep only the newest frame; files are read frame by frame
+    cap = FrameGrabber(source, drop=is_live(source))
+    counters = {"frames": 0, "recognitions": 0, "fps": 0.0}
+    try:
+        if not cap.isOpened():
+            results.put(("error", name, f"cannot open {source}"))
+            return
+
+        if mode == "face":
+            face_cascade = cv2.CascadeClassifier(cascade_path)
+            if face_cascade.empty():
+                results.put(("error", name, f"cannot load Haar cascade {cascade_path}"))
+                return
+            # One process per source already uses the cores; predict in-process
+            recognizer = RecognitionPool(model_path, label_map_path, workers=0)
+            pipeline = FacePipeline(face_cascade, recognizer)
+        else:
+            detector = cv2.QRCodeDetector()
+
+        sent = set()
+        start = last = time.perf_counter()
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            counters["frames"] += 1
+
+            if mode == "face":
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                found = [t.identity for t in pipeline.process(gray) if t.identity]
+            else:
+                student_id, _ = scan_qr(detector, frame)
+                found = [student_id] if student_id else []
+
+            for student_id in found:
+                counters["recognitions"] += 1
+                # The sink deduplicates across sources; this only saves messages
+                if student_id not in sent:
+                    sent.add(student_id)
+                    results.put(("mark", name, student_id, time.time()))
+
+            now = time.perf_counter()
+            if now - last >= STATS_INTERVAL:
+                counters["fps"] = counters["frames"] / (now - start)
+                results.put(("stats", name, dict(counters)))
+                last = now
+
+        counters["fps"] = counters["frames"] / max(1e-9, time.perf_counter() - start)
+    except Exception as e:
+        results.put(("error", name, str(e)))
+    finally:
+        cap.release()
+        if recognizer is not None:
+            recognizer.close()
+        results.put(("stats", name, dict(counters)))
+        results.put(("done", name, None))
+
+
+def print_table(counters):
+    print(f"{'source':<24} {'frames':>7} {'fps':>6} {'recognitions':>12} {'marked':>6} {'duplicate':>9}")
+    for name, c in counters.items():
+        print(f"{name:<24} {c['frames']:>7} {c['fps']:>6.1f} {c['recognitions']:>12} "
+              f"{c['marked']:>6} {c['duplicate']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Take attendance from several cameras at once, one process per source."
+    )
+    parser.add_argument("sources", nargs="+",
+                        help="camera indexes, video files or stream URLs")
+    parser.add_argument("--mode", choices=("face", "qr"), default="face")
+    parser.add_argument("--attendance", default=ATTENDANCE_FILE)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--label-map", default=LABEL_MAP_PATH)
+    parser.add_argument("--cascade", default=CASCADE_PATH)
+    args = parser.parse_args()
+
+    if os.path.dirname(args.attendance):
+        os.makedirs(os.path.dirname(args.attendance), exist_ok=True)
+    # All sources feed one writer, so a student seen at two entrances is marked once
+    attendance_writer = AttendanceWriter(open_store(args.attendance))
+    method = "FACE" if args.mode == "face" else "QR"
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    counters = {}
+    processes = []
+    for i, text in enumerate(args.sources):
+        name = f"{i}:{text}"
+        counters[name] = {"frames": 0, "fps": 0.0, "recognitions": 0, "marked": 0, "duplicate": 0}
+        process = context.Process(
+            target=run_source, daemon=True,
+            args=(name, parse_source(text), args.mode, args.model, args.label_map,
+                  args.cascade, results),
+        )
+        process.start()
+        processes.append(process)
+
+    running = set(counters)
+    print(f"Scanning {len(processes)} source(s). Press Ctrl+C to stop.")
+    try:
+        while running:
+            try:
+                kind, name, *payload = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(p.is_alive() for p in processes):
+                    break
+                continue
+
+            if kind == "mark":
+                student_id, timestamp = payload
+                if attendance_writer.mark(student_id, method, when=datetime.fromtimestamp(timestamp)):
+                    counters[name]["marked"] += 1
+                    print(f"[{name}] Marked: {student_id}")
+                else:
+                    counters[name]["duplicate"] += 1
+            elif kind == "stats":
+                counters[name].update(payload[0])
+            elif kind == "error":
+                print(f"[{name}] ERROR: {payload[0]}")
+            elif kind == "done":
+                running.discard(name)
+    except KeyboardInterrupt:
+        print("Stopping...")
+    finally:
+        for process in processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        attendance_writer.close()
+
+    print_table(counters)
+    print(f"Attendance writer: {attendance_writer.stats()}")
+
+
+if __name__ == "__main__":
+    main()
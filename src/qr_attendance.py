@@ -1,62 +1,111 @@
+import argparse
 import cv2
-import csv
-import os
-from datetime import datetime
-from utils import setup_folders, get_today, get_timestamp
-
-setup_folders()
+from utils import setup_folders
+from attendance_writer import AttendanceWriter
+from metrics import Metrics
+from session_recorder import open_attendance_store, open_camera
+from stage_timer import StageTimer, latency_path
+from config import LATENCY_OVERLAY
 
 ATTENDANCE_FILE = "data/attendance.csv"
 
-def already_marked(student_id):
-    today = get_today()
-    if not os.path.exists(ATTENDANCE_FILE):
-        return False
+# Opened in main(), so batch_attendance.py can import scan_qr() without
+# opening the store or starting a writer
+attendance_writer = None
 
-    with open(ATTENDANCE_FILE, "r") as f:
-        reader = csv.reader(f)
-        for row in reader:
-            if row and row[0] == student_id and row[2] == today:
-                return True
-    return False
+def already_marked(student_id):
+    return attendance_writer.is_marked(student_id)
 
 def mark_attendance(student_id, method):
-    if already_marked(student_id):
-        return False
-
-    with open(ATTENDANCE_FILE, "a", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            student_id,
-            method,
-            get_today(),
-            get_timestamp()
-        ])
-    return True
-
-# OpenCV QR scanning
-cap = cv2.VideoCapture(0)
-detector = cv2.QRCodeDetector()
-
-print("QR Attendance started. Press Q to quit.")
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
+    return attendance_writer.mark(student_id, method)
 
+def scan_qr(detector, frame):
+    """(student ID or None, corner points) of the QR code in frame"""
     data, bbox, _ = detector.detectAndDecode(frame)
+    return (data.strip() or None) if data else None, bbox
+
+def main():
+    global attendance_writer
+    parser = argparse.ArgumentParser(description="Mark attendance by scanning QR codes.")
+    parser.add_argument("--record", metavar="FILE", help="also save the camera frames to FILE")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="run on a session saved with --record instead of the camera")
+    parser.add_argument("--realtime", action="store_true",
+                        help="with --replay, play at recorded speed instead of every frame in turn")
+    args = parser.parse_args()
+
+    # OpenCV QR scanning
+    # Frames are grabbed on their own thread; the loop always gets the newest one
+    # (or, replaying a recorded session deterministically, every frame)
+    try:
+        cap = open_camera(0, args.record, args.replay, args.realtime)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Cannot replay session: {e}")
+        return
+
+    setup_folders()
+    # Every write and duplicate check goes through the storage layer;
+    # writes are batched on a background thread so disk I/O never stalls a frame
+    attendance_writer = AttendanceWriter(open_attendance_store(ATTENDANCE_FILE, args.replay))
+    detector = cv2.QRCodeDetector()
+    # Served only when ATTENDANCE_METRICS_PORT is set
+    metrics = Metrics().start()
+    metrics.writer = attendance_writer
+    metrics.attach("qr", cap)
+    # Per-stage latencies; press L to show them on the preview
+    timer = StageTimer(metrics=metrics)
+    attendance_writer.timer = timer
+    show_latency = LATENCY_OVERLAY
+    # IDs handled this session: a code held up to the camera is in view for
+    # many frames but is one scan attempt
+    scanned = set()
+
+    print("QR Attendance started. Press Q to quit, L for latencies.")
+
+    try:
+        while True:
+            with timer.stage("capture"):
+                ret, frame = cap.read()
+            if not ret:
+                break
+
+            with timer.stage("detectAndDecode"):
+                student_id, _ = scan_qr(detector, frame)
+
+            if student_id and student_id not in scanned:
+                scanned.add(student_id)
+                with timer.stage("mark"):
+                    success = mark_attendance(student_id, "QR")
+                metrics.mark("QR", success)
+                if success:
+                    print(f"[SUCCESS] Attendance marked for {student_id}")
+                else:
+                    print(f"[INFO] Attendance already marked today for {student_id}")
 
-    if data:
-        success = mark_attendance(data, "QR")
-        if success:
-            print(f"[SUCCESS] Attendance marked for {data}")
-        else:
-            print(f"[INFO] Attendance already marked today for {data}")
+            # The writer logs marks it could not save; scanning the code again retries them
+            for record, _ in attendance_writer.take_failed():
+                scanned.discard(record["student_id"])
 
-    cv2.imshow("QR Attendance", frame)
-    if cv2.waitKey(1) & 0xFF == ord("q"):
-        break
+            if show_latency:
+                timer.overlay(frame)
+            with timer.stage("imshow"):
+                cv2.imshow("QR Attendance", frame)
+                key = cv2.waitKey(1) & 0xFF
+            if key == ord("q"):
+                break
+            if key == ord("l"):
+                show_latency = not show_latency
+    finally:
+        # Also on Ctrl+C or an error: queued marks are still written
+        cap.release()
+        cv2.destroyAllWindows()
+        attendance_writer.close()
+        metrics.close()
+    print(f"Attendance writer: {attendance_writer.stats()}")
+    print(f"Frames: {cap.stats()}")
+    latency_file = timer.dump(latency_path(ATTENDANCE_FILE, "qr"), frames=cap.stats(),
+                              writer=attendance_writer.stats(), replay=args.replay)
+    print(f"Latency summary: {latency_file}")
 
-cap.release()
-cv2.destroyAllWindows()
+if __name__ == "__main__":
+    main()
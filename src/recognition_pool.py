@@ -0,0 +1,231 @@
+import multiprocessing
+import os
+import pickle
+import threading
+from collections import OrderedDict
+import cv2
+from config import RECOGNITION_WORKERS, RECOGNIZER_BACKEND, FACE_SHARD_CACHE, FACE_SIZE
+from face_dataset import normalize_face, trained_face_size
+from face_index import IVFIndex, has_index
+from face_shards import ShardSet, check_shards
+from lbph_engine import NumpyLBPH, binary_path
+
+# Per-process model state, loaded once by load_model()
+_recognizer = None
+_label_map = None
+# Crop size predictions are resized to; None predicts on crops as detected
+_face_size = None
+# Loaded course shards, least recently used first: (path, backend) -> (mtime, recognizer).
+# Per process: it only carries over between sessions when prediction runs in
+# the camera process, as a new selection starts a fresh worker pool
+_shards = OrderedDict()
+
+
+def create_recognizer(model_path, backend=RECOGNIZER_BACKEND):
+    """LBPH recognizer for face_model.yml from the configured backend.
+
+    An up-to-date descriptor index (face_train.py --index) is used instead,
+    whatever the backend.
+    """
+    if has_index(model_path):
+        return IVFIndex().read(model_path)
+    if backend == "numpy":
+        # The memory-mapped binary copy loads instantly; it is (re)built
+        # from the YAML model whenever that is newer
+        bin_path = binary_path(model_path)
+        if os.path.exists(bin_path) and (not os.path.exists(model_path) or
+                                         os.path.getmtime(bin_path) >= os.path.getmtime(model_path)):
+            return NumpyLBPH().read_binary(bin_path)
+        model = NumpyLBPH().read(model_path)
+        try:
+            model.write_binary(bin_path)
+        except OSError as e:
+            print(f"Could not write binary face model {bin_path}: {e}")
+        return model
+    if backend == "opencv":
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.read(model_path)
+        return recognizer
+    raise ValueError(f"Unknown recognizer backend: {backend}")
+
+
+def model_face_size(label_map_path):
+    """Crop size to resize faces to for the model next to label_map_path.
+
+    Models trained before crops were normalized have no recorded size and
+    keep predicting on crops as detected. A model trained at a size other
+    than ATTENDANCE_FACE_SIZE is refused rather than fed mismatched crops.
+    """
+    size = trained_face_size(os.path.dirname(label_map_path))
+    if size is not None and size != FACE_SIZE:
+        raise ValueError(f"Face model was trained on {size}px crops but ATTENDANCE_FACE_SIZE "
+                         f"is {FACE_SIZE}; retrain with: python src/face_train.py --full")
+    return size
+
+
+def load_shards(paths, backend=RECOGNIZER_BACKEND):
+    """ShardSet over the given shard models, reusing recently loaded ones"""
+    recognizers = []
+    for path in paths:
+        key = (path, backend)
+        mtime = os.path.getmtime(path)
+        cached = _shards.pop(key, None)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, create_recognizer(path, backend))
+        _shards[key] = cached
+        recognizers.append(cached[1])
+
+    # Drop least recently used shards, never one of the current selection
+    wanted = {(path, backend) for path in paths}
+    for key in list(_shards):
+        if len(_shards) <= FACE_SHARD_CACHE:
+            break
+        if key not in wanted:
+            del _shards[key]
+    return ShardSet(recognizers)
+
+
+def load_model(model_path, label_map_path, backend=RECOGNIZER_BACKEND):
+    """model_path is face_model.yml or a list of course shard models"""
+    global _recognizer, _label_map, _face_size
+    _face_size = model_face_size(label_map_path)
+    # One OpenCV thread per worker; the pool itself provides the parallelism
+    cv2.setNumThreads(1)
+    if isinstance(model_path, (list, tuple)):
+        _recognizer = load_shards(model_path, backend)
+    else:
+        _recognizer = create_recognizer(model_path, backend)
+    with open(label_map_path, "rb") as f:
+        _label_map = pickle.load(f)
+
+
+def prepare(roi):
+    # Same crop size as the training images
+    return roi if _face_size is None else normalize_face(roi, _face_size)
+
+
+def predict(roi):
+    """(student_id or None, confidence) for one grayscale face crop"""
+    label, confidence = _recognizer.predict(prepare(roi))
+    return _label_map.get(label), confidence
+
+
+def predict_batch(rois):
+    if not hasattr(_recognizer, "predict_many"):
+        return [predict(roi) for roi in rois]
+    rois = [prepare(roi) for roi in rois]
+    return [(_label_map.get(label), confidence)
+            for label, confidence in _recognizer.predict_many(rois)]
+
+
+class RecognitionPool:
+    """LBPH prediction spread across worker processes.
+
+    Each worker loads face_model.yml (or the selected course shards) and
+    the label map once; predict_many()
+    sends the face crops of a frame to the workers and returns results in
+    the same order. With workers <= 1 prediction runs in this process.
+    """
+
+    def __init__(self, model_path, label_map_path, workers=RECOGNITION_WORKERS,
+                 backend=RECOGNIZER_BACKEND):
+        self.workers = workers
+        self.pool = None
+        # Checked here as well, so a mismatched model fails before workers start
+        model_face_size(label_map_path)
+        if isinstance(model_path, (list, tuple)):
+            check_shards(model_path)
+        if workers > 1:
+            # spawn: never fork a process that already runs camera/writer threads
+            context = multiprocessing.get_context("spawn")
+            self.pool = context.Pool(workers, initializer=load_model,
+                                     initargs=(model_path, label_map_path, backend))
+        else:
+            load_model(model_path, label_map_path, backend)
+
+    def predict_many(self, rois):
+        if not rois:
+            return []
+        if self.pool is None:
+            return predict_batch(rois)
+        return self.pool.map(predict, rois, chunksize=1)
+
+    def predict(self, roi):
+        return self.predict_many([roi])[0]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+class ModelLoader:
+    """Loads a RecognitionPool on a background thread.
+
+    start() begins loading (or reloading, when face_model.yml or the label
+    map changed since, e.g. after retraining) without blocking; get()
+    waits for it and returns the pool or raises the loading error.
+    """
+
+    def __init__(self, model_path, label_map_path, **pool_args):
+        self.model_path = model_path
+        self.label_map_path = label_map_path
+        self.pool_args = pool_args
+        self.lock = threading.Lock()
+        self.loaded = None
+        self.pool = None
+        self.error = None
+        self.thread = None
+
+    def _version(self):
+        models = self.model_path if isinstance(self.model_path, (list, tuple)) else [self.model_path]
+        paths = [p for model in models for p in (model, binary_path(model))]
+        paths.append(self.label_map_path)
+        return tuple(models) + tuple(os.path.getmtime(p) if os.path.exists(p) else None
+                                     for p in paths)
+
+    def select(self, model_path):
+        """Switch to another model (or list of course shards) and start loading it"""
+        with self.lock:
+            self.model_path = model_path
+        self.start()
+
+    def _load(self):
+        with self.lock:
+            if self.pool is not None and self.loaded == self._version():
+                return
+            if self.pool is not None:
+                self.pool.close()
+                self.pool = None
+            try:
+                self.pool = RecognitionPool(self.model_path, self.label_map_path, **self.pool_args)
+                self.error = None
+            except Exception as e:
+                self.error = e
+            # Taken after loading, which may have written the binary copy
+            self.loaded = self._version()
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._load, daemon=True)
+            self.thread.start()
+
+    def loading(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def get(self):
+        if self.thread is not None:
+            self.thread.join()
+        self._load()
+        if self.error is not None:
+            raise self.error
+        return self.pool
+
+    def close(self):
+        if self.thread is not None:
+            self.thread.join()
+        with self.lock:
+            if self.pool is not None:
+                self.pool.close()
+                self.pool = None
@@ -0,0 +1,100 @@
+import csv
+import io
+import os
+import threading
+
+REQUIRED_COLUMNS = ("student_id", "name")
+# Bytes before the cached end that must be unchanged for an append-only reload
+TAIL_CHECK = 64
+
+
+class Roster:
+    """Cached students.csv keyed on the file's mtime and size.
+
+    refresh() costs a single stat when nothing changed, parses only the
+    new rows when the file was appended to, and reloads everything
+    otherwise. Lookups are plain dict operations with no file I/O.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.students = {}
+        self._clear()
+
+    def _clear(self):
+        self.students = {}
+        self.fieldnames = None
+        self.signature = None
+        self.size = 0
+        self.tail = b""
+        self.appendable = False
+
+    def refresh(self):
+        """Bring the cache up to date with the file; returns the students dict"""
+        with self.lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                self._clear()
+                return self.students
+            signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+            if signature == self.signature:
+                return self.students
+
+            with open(self.path, "rb") as f:
+                appended = None
+                if self.appendable and st.st_size > self.size:
+                    f.seek(self.size - len(self.tail))
+                    if f.read(len(self.tail)) == self.tail:
+                        appended = f.read()
+                if appended is None:
+                    # Edited, truncated or replaced: reload from scratch
+                    f.seek(0)
+                    self._clear()
+                    data = f.read()
+                    self._parse(data)
+                    self.size = len(data)
+                    self.appendable = data.endswith(b"\n") and self.fieldnames is not None
+                else:
+                    # Appended to: parse only the new, complete lines
+                    end = appended.rfind(b"\n") + 1
+                    self._parse(appended[:end])
+                    self.size += end
+                f.seek(max(0, self.size - TAIL_CHECK))
+                self.tail = f.read(self.size - f.tell())
+            self.signature = signature
+            return self.students
+
+    def _parse(self, data):
+        rows = csv.reader(io.StringIO(data.decode("utf-8"), newline=""))
+
+        if self.fieldnames is None:
+            self.fieldnames = next(rows, None)
+            if not self.fieldnames or any(c not in self.fieldnames for c in REQUIRED_COLUMNS):
+                print("ERROR: students.csv is missing required columns (student_id, name)")
+                print(f"Found columns: {self.fieldnames}")
+                self.fieldnames = None
+                return
+
+        for row in rows:
+            self._add_row(dict(zip(self.fieldnames, row)))
+
+    def _add_row(self, row):
+        student_id = (row.get("student_id") or "").strip()
+        name = (row.get("name") or "").strip()
+        if student_id and name:
+            self.students[student_id] = {
+                'name': name,
+                'course': (row.get("course") or "").strip(),
+                'email': (row.get("email") or "").strip(),
+            }
+
+    def get(self, student_id, default=None):
+        return self.students.get(student_id, default)
+
+    def __contains__(self, student_id):
+        return student_id in self.students
+
+    def __len__(self):
+        return len(self.students)
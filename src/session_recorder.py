@@ -0,0 +1,172 @@
+import atexit
+import os
+import queue
+import shutil
+import struct
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from attendance_store import open_store
+from config import RECORD_QUALITY
+from frame_grabber import FrameGrabber
+
+# Session file: 16-byte header (magic, wall-clock start), then per frame
+# its capture time in seconds since the start, the encoded size, and the
+# JPEG (or PNG when lossless) bytes
+SESSION_MAGIC = b"SREC0001"
+SESSION_HEADER = struct.Struct("<8sd")
+FRAME_HEADER = struct.Struct("<dI")
+# Frames waiting to be encoded before the camera thread has to wait
+RECORD_QUEUE_SIZE = 64
+
+_STOP = object()
+
+
+def session_path(directory, mode):
+    """Where a recorded session goes: session_<mode>_<timestamp>.rec"""
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"session_{mode}_{time.strftime('%Y%m%d_%H%M%S')}.rec")
+
+
+def replay_attendance_file(attendance_file):
+    """Throwaway attendance log for a replayed session, so replays never
+    mark real attendance: a new temporary folder per session, removed
+    when the process exits"""
+    folder = tempfile.mkdtemp(prefix="replay_")
+    atexit.register(shutil.rmtree, folder, ignore_errors=True)
+    return os.path.join(folder, os.path.basename(attendance_file))
+
+
+def open_attendance_store(attendance_file, replay=None, **store_args):
+    """open_store() on the attendance log, or on a throwaway copy of it
+    when replaying the recorded session `replay`"""
+    if not replay:
+        return open_store(attendance_file, **store_args)
+    path = replay_attendance_file(attendance_file)
+    print(f"Replaying {replay}: marks go to {path} (removed on exit), not the attendance log")
+    store_args.setdefault("roster_path", os.path.join(os.path.dirname(attendance_file), "students.csv"))
+    return open_store(path, **store_args)
+
+
+class RecordingCapture:
+    """cv2.VideoCapture stand-in that also saves every frame it reads.
+
+    Frames are timestamped as they come off the camera and encoded on a
+    background thread, so recording adds little to the capture loop.
+    quality is the JPEG quality; 0 stores lossless PNG.
+    """
+
+    def __init__(self, source, path, quality=RECORD_QUALITY):
+        self.cap = cv2.VideoCapture(source)
+        self.path = path
+        self.quality = quality
+        self.frames = 0
+        self.queue = queue.Queue(maxsize=RECORD_QUEUE_SIZE)
+        self.start = time.monotonic()
+        self.file = open(path, "wb")
+        self.file.write(SESSION_HEADER.pack(SESSION_MAGIC, time.time()))
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if ret:
+            self.queue.put((time.monotonic() - self.start, frame))
+        return ret, frame
+
+    def _encode(self, frame):
+        if self.quality:
+            return cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return cv2.imencode(".png", frame, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                return
+            timestamp, frame = item
+            ok, data = self._encode(frame)
+            if not ok:
+                continue
+            self.file.write(FRAME_HEADER.pack(timestamp, len(data)))
+            self.file.write(data.tobytes())
+            self.frames += 1
+
+    def release(self):
+        self.cap.release()
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join()
+            self.file.close()
+
+
+class ReplaySource:
+    """Reads a recorded session back with the VideoCapture read/isOpened/release calls.
+
+    By default frames come as fast as they are asked for, so every run
+    sees the same frames in the same order; with realtime=True each frame
+    is held back until its recorded capture time, so a slow pipeline
+    drops frames the way it would on the live camera.
+    """
+
+    def __init__(self, path, realtime=False):
+        self.path = path
+        self.realtime = realtime
+        self.file = open(path, "rb")
+        header = self.file.read(SESSION_HEADER.size)
+        if len(header) < SESSION_HEADER.size or not header.startswith(SESSION_MAGIC):
+            self.file.close()
+            raise ValueError(f"{path} is not a recorded session")
+        _, self.started = SESSION_HEADER.unpack(header)
+        self.frames = 0
+        self.timestamp = 0.0
+        self.clock = None
+
+    def isOpened(self):
+        return not self.file.closed
+
+    def read(self):
+        """(True, frame) for the next recorded frame, (False, None) at the end"""
+        if self.file.closed:
+            return False, None
+        header = self.file.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            return False, None
+        self.timestamp, size = FRAME_HEADER.unpack(header)
+        data = self.file.read(size)
+        if len(data) < size:
+            # Recording cut short, e.g. the process was killed mid-write
+            return False, None
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if self.realtime:
+            if self.clock is None:
+                self.clock = time.monotonic() - self.timestamp
+            delay = self.clock + self.timestamp - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self.frames += 1
+        return frame is not None, frame
+
+    def release(self):
+        self.file.close()
+
+
+def open_camera(camera=0, record=None, replay=None, realtime=False):
+    """FrameGrabber for a camera session: the live camera (saved to `record`
+    when given) or the recorded session `replay`.
+
+    A deterministic replay hands the loop every frame; a realtime one
+    keeps only the newest frame, like the live camera.
+    """
+    if replay:
+        return FrameGrabber(ReplaySource(replay, realtime), drop=realtime)
+    if record:
+        return FrameGrabber(RecordingCapture(camera, record))
+    return FrameGrabber(camera)
@@ -0,0 +1,87 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from config import LATENCY_WINDOW, LATENCY_DIR
+
+
+def latency_path(attendance_file, mode):
+    """Where a session's summary goes: latency_<mode>_<timestamp>.json"""
+    directory = LATENCY_DIR or os.path.dirname(attendance_file) or "."
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"latency_{mode}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+
+
+class StageTimer:
+    """Rolling latency percentiles per pipeline stage.
+
+    Wrap a stage in `with timer.stage("detect"):` (or call record()
+    directly); the last `window` samples of each stage are kept, so the
+    percentiles follow the current scene rather than the whole session.
+    Safe to share with the attendance writer thread. Samples are also
+    passed on to `metrics` (a Metrics endpoint) when one is given.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW, metrics=None):
+        self.window = window
+        self.metrics = metrics
+        self.samples = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self.lock:
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.window)
+                self.counts[name] = 0
+            self.samples[name].append(seconds * 1000)
+            self.counts[name] += 1
+        if self.metrics is not None:
+            self.metrics.observe(name, seconds)
+
+    def percentiles(self):
+        """{stage: {"count", "p50", "p95", "p99", "max"}} in milliseconds"""
+        with self.lock:
+            snapshot = {name: (np.array(values), self.counts[name])
+                        for name, values in self.samples.items() if values}
+        summary = {}
+        for name, (values, count) in snapshot.items():
+            p50, p95, p99 = np.percentile(values, (50, 95, 99))
+            summary[name] = {"count": count, "p50": round(float(p50), 3),
+                             "p95": round(float(p95), 3), "p99": round(float(p99), 3),
+                             "max": round(float(values.max()), 3)}
+        return summary
+
+    def overlay(self, frame, origin=(10, 130)):
+        """Draw one "stage p50/p95/p99 ms" line per stage onto frame"""
+        x, y = origin
+        for name, p in self.percentiles().items():
+            text = f"{name:<14} {p['p50']:6.1f} {p['p95']:6.1f} {p['p99']:6.1f} ms"
+            cv2.putText(frame, text, (x, y), cv2.FONT_HERSHEY_PLAIN, 1.0, (0, 0, 0), 3)
+            cv2.putText(frame, text, (x, y), cv2.FONT_HERSHEY_PLAIN, 1.0, (255, 255, 255), 1)
+            y += 16
+
+    def dump(self, path, **extra):
+        """Write the session summary (plus any extra counters) as JSON"""
+        summary = {"started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+                   "seconds": round(time.time() - self.started, 3),
+                   "window": self.window, "stages": self.percentiles()}
+        summary.update(extra)
+        with open(path, "w") as f:
+            json.dump(summary, f, indent=2)
+        return path
@@ -1,28 +1,20 @@
 import os
-from src.utils import setup_folders
+from datetime import datetime
 
-setup_folders()
+# Folders the CLI scripts read from and write to (relative to project root)
+DATA_DIR = "data"
+FACES_DIR = "faces"
+MODELS_DIR = "models"
 
-while True:
-    print("\nSMART ATTENDANCE SYSTEM")
-    print("1. Register Student")
-    print("2. Generate QR Codes")
-    print("3. QR Attendance")
-    print("4. Face Attendance")
-    print("Q. Quit")
 
-    choice = input("Select option: ").strip().upper()
+def setup_folders():
+    for folder in (DATA_DIR, FACES_DIR, MODELS_DIR):
+        os.makedirs(folder, exist_ok=True)
 
-    if choice == "1":
-        os.system("python src/register_student.py")
-    elif choice == "2":
-        os.system("python src/generate_qr.py")
-    elif choice == "3":
-        os.system("python src/qr_attendance.py")
-    elif choice == "4":
-        os.system("python src/face_attendance.py")
-    elif choice == "Q":
-        print("Goodbye!")
-        break
-    else:
-        print("Invalid choice.")
+
+def get_today():
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+def get_timestamp():
+    return datetime.now().strftime("%H:%M:%S")
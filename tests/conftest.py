@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules import each other by bare name, the way the scripts run them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
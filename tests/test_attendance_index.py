@@ -0,0 +1,36 @@
+import attendance_index
+from attendance_index import AttendanceIndex
+
+
+def test_today_is_loaded_once_and_kept_up_to_date(tmp_path, monkeypatch):
+    path = tmp_path / "attendance.csv"
+    path.write_text("20240001,QR,2024-03-01,09:00:00\n20240002,QR,2024-03-02,09:00:00\n")
+    monkeypatch.setattr(attendance_index, "get_today", lambda: "2024-03-01")
+    index = AttendanceIndex(str(path))
+    assert "20240001" in index and "20240002" not in index
+    # Later writes go through add(), not the file
+    path.write_text("")
+    index.add("20240003")
+    assert "20240001" in index and "20240003" in index
+    assert len(index) == 2
+
+
+def test_index_follows_the_date(tmp_path, monkeypatch):
+    path = tmp_path / "attendance.csv"
+    path.write_text("20240001,QR,2024-03-01,09:00:00\n20240002,QR,2024-03-02,09:00:00\n")
+    today = ["2024-03-01"]
+    monkeypatch.setattr(attendance_index, "get_today", lambda: today[0])
+    index = AttendanceIndex(str(path))
+    index.add("20240005")
+    today[0] = "2024-03-02"
+    assert index.is_marked("20240002") and not index.is_marked("20240001")
+    # The previous day is kept, with the marks added to it
+    assert index.is_marked("20240005", "2024-03-01")
+
+
+def test_date_derived_from_the_row(tmp_path, monkeypatch):
+    path = tmp_path / "attendance.csv"
+    path.write_text("20240001,1709283600\n")
+    monkeypatch.setattr(attendance_index, "get_today", lambda: "2024-03-01")
+    index = AttendanceIndex(str(path), row_date=lambda row: "2024-03-01" if row[1] == "1709283600" else None)
+    assert "20240001" in index
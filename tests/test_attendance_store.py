@@ -0,0 +1,164 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from attendance_store import GUI_FIELDS, open_store
+
+BACKENDS = ["csv", "sqlite", "partitioned", "compact", "binary"]
+EARLIER = datetime(2024, 3, 1, 9, 30, 0)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    (tmp_path / "students.csv").write_text(
+        "student_id,name,course,email\n"
+        "20240001,Ada Lovelace,CS,ada@example.com\n"
+        "20240002,Alan Turing,Math,alan@example.com\n")
+    return str(tmp_path / "attendance.csv")
+
+
+@pytest.fixture(params=BACKENDS)
+def store(request, csv_path):
+    store = open_store(csv_path, backend=request.param)
+    yield store
+    store.close()
+
+
+def test_mark_rejects_duplicates_on_the_same_day(store):
+    assert store.mark("20240001", "QR")
+    assert not store.mark("20240001", "FACE")
+    assert store.mark("20240002", "FACE")
+    assert store.is_marked("20240001")
+    assert not store.is_marked("20240003")
+
+
+def test_mark_many_reports_each_record(store):
+    from attendance_store import make_record
+    records = [make_record("20240001", "QR"), make_record("20240001", "QR"), make_record("20240002", "QR")]
+    assert store.mark_many(records) == [True, False, True]
+
+
+def test_other_days_are_separate(store):
+    assert store.mark("20240001", "QR", when=EARLIER)
+    assert store.mark("20240001", "QR")
+    assert store.is_marked("20240001", "2024-03-01")
+    assert not store.is_marked("20240002", "2024-03-01")
+    earlier = list(store.records("2024-03-01"))
+    assert [(r["student_id"], r["date"], r["time"]) for r in earlier] == [("20240001", "2024-03-01", "09:30:00")]
+    assert len(list(store.records())) == 2
+
+
+def test_reopened_store_remembers_todays_marks(csv_path):
+    for backend in BACKENDS:
+        store = open_store(csv_path, backend=backend)
+        assert store.mark("20240001", "QR")
+        store.close()
+        store = open_store(csv_path, backend=backend)
+        assert not store.mark("20240001", "QR"), backend
+        store.close()
+
+
+@pytest.mark.parametrize("backend", ["compact", "binary"])
+def test_roster_fields_are_joined_on_read(csv_path, backend):
+    store = open_store(csv_path, backend=backend)
+    store.mark("20240002", "FACE")
+    (record,) = store.records()
+    assert (record["name"], record["course"], record["email"]) == ("Alan Turing", "Math", "alan@example.com")
+    store.close()
+
+
+def test_gui_layout_keeps_student_details(csv_path):
+    store = open_store(csv_path, fields=GUI_FIELDS, header=True, backend="csv")
+    store.mark("20240001", student={"name": "Ada Lovelace", "course": "CS", "email": "ada@example.com"})
+    with open(csv_path) as f:
+        assert f.readline().strip() == ",".join(GUI_FIELDS)
+    (record,) = store.records()
+    assert record["name"] == "Ada Lovelace"
+
+
+def test_view_pages_and_filters(store):
+    store.mark("20240001", "QR", when=EARLIER)
+    store.mark("20240001", "QR")
+    store.mark("20240002", "QR")
+    view = store.view(student_id="20240001")
+    assert len(view) == 2
+    assert [row["student_id"] for row in view.fetch(0, 10)] == ["20240001", "20240001"]
+
+
+def test_past_dates_are_scanned_once(csv_path, monkeypatch):
+    from attendance_index import AttendanceIndex
+    store = open_store(csv_path, backend="csv")
+    store.mark("20240001", "QR", when=EARLIER)
+    store = open_store(csv_path, backend="csv")
+    scans = []
+    scan = AttendanceIndex._scan
+    monkeypatch.setattr(AttendanceIndex, "_scan", lambda self, date: scans.append(date) or scan(self, date))
+    for minute in range(5):
+        store.mark("20240002", "QR", when=EARLIER.replace(minute=minute))
+        assert not store.mark("20240001", "QR", when=EARLIER.replace(minute=minute))
+    assert scans.count("2024-03-01") == 1
+    assert store.is_marked("20240002", "2024-03-01")
+
+
+def test_view_picks_up_new_marks(store):
+    store.mark("20240001", "QR", when=EARLIER)
+    view = store.view()
+    assert len(view) == 1 and not view.refresh()
+    store.mark("20240002", "FACE")
+    assert view.refresh()
+    assert len(view) == 2
+    assert view.fetch(1, 2)[0]["student_id"] == "20240002"
+
+
+@pytest.mark.parametrize("backend", ["compact", "binary"])
+def test_view_filters_on_joined_course(csv_path, backend):
+    store = open_store(csv_path, backend=backend)
+    store.mark("20240001", "QR")
+    store.mark("20240002", "QR")
+    view = store.view(course="math")
+    assert [r["name"] for r in view.fetch(0, 10)] == ["Alan Turing"]
+    assert "course" in view.fields
+    store.close()
+
+
+def test_view_filters_on_date(store):
+    store.mark("20240001", "QR", when=EARLIER)
+    store.mark("20240002", "QR", when=EARLIER)
+    store.mark("20240001", "QR")
+    view = store.view(date="2024-03-01")
+    assert sorted(r["student_id"] for r in view.fetch(0, 10)) == ["20240001", "20240002"]
+    view.close()
+
+
+def test_partitioned_view_follows_compaction(csv_path):
+    store = open_store(csv_path, backend="partitioned")
+    store.mark("20240001", "QR", when=EARLIER)
+    store.mark("20240002", "QR", when=EARLIER.replace(day=2))
+    store.mark("20240001", "QR")
+    view = store.view()
+    assert [r["date"] for r in view.fetch(0, 10)][:2] == ["2024-03-01", "2024-03-02"]
+    assert store.compact("2024-04-01") == (2, 2, 0)
+    assert view.refresh()
+    assert len(view) == 3
+    assert [r["student_id"] for r in view.fetch(1, 3)] == ["20240002", "20240001"]
+    view.close()
+    # No index left behind for the merged segments
+    assert not [name for name in os.listdir(store.path) if name.startswith("2024-03")]
+
+
+def test_compaction_keeps_the_earliest_duplicate(csv_path):
+    store = open_store(csv_path, backend="partitioned")
+    store.mark("20240001", "QR", when=EARLIER)
+    store.mark("20240002", "FACE", when=EARLIER.replace(day=2))
+    # Older sessions could append a second mark for the same day
+    with open(store.segment_path("2024-03-01"), "a") as f:
+        f.write("20240001,FACE,2024-03-01,08:15:00\n20240001,QR,2024-03-01,11:00:00\n")
+    assert store.compact("2024-03-15") == (2, 2, 2)
+    assert store.segment_paths() == []
+    first = [r for r in store.records("2024-03-01")]
+    assert [(r["student_id"], r["method"], r["time"]) for r in first] == [("20240001", "FACE", "08:15:00")]
+    assert store.is_marked("20240002", "2024-03-02")
+    # Compacting again has nothing left to merge
+    assert store.compact("2024-03-15") == (0, 0, 0)
+    store.close()
@@ -0,0 +1,28 @@
+from attendance_store import GUI_FIELDS
+from attendance_view import RowIndex, split_records
+
+
+def test_split_records_keeps_quoted_newlines_together():
+    data = b'1,"a\r\nb",x\r\n2,"c""d",y\n3,"open\n'
+    assert split_records(data) == [b'1,"a\r\nb",x\r\n', b'2,"c""d",y\n']
+
+
+def test_row_index_pages_multi_line_rows(tmp_path):
+    path = tmp_path / "attendance.csv"
+    path.write_bytes(
+        b"student_id,name,course,email,date,time\r\n"
+        b'20240001,"Lovelace,\r\nAda",CS,ada@example.com,2024-03-01,09:30:00\r\n'
+        b"20240002,Alan Turing,Math,alan@example.com,2024-03-01,09:31:00\r\n"
+        b'20240003,"Half')
+    index = RowIndex(str(path), GUI_FIELDS, header=True)
+    assert index.refresh()
+    assert len(index) == 2
+    first, second = index.read([0, 1])
+    assert first["name"] == "Lovelace,\r\nAda" and first["email"] == "ada@example.com"
+    assert second["student_id"] == "20240002"
+
+    # The half-written row is indexed once its closing quote arrives
+    with open(path, "ab") as f:
+        f.write(b' written",CS,,2024-03-02,10:00:00\r\n')
+    assert index.refresh()
+    assert index.read(index.query(date="2024-03-02"))[0]["name"] == "Half written"
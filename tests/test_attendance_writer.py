@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from attendance_store import open_store
+from attendance_writer import AttendanceWriter
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+class FailingStore:
+    def is_marked(self, student_id, date=None):
+        return False
+
+    def mark_many(self, records):
+        raise OSError("disk full")
+
+
+def test_marks_are_batched_and_flushed_on_close(tmp_path):
+    store = open_store(str(tmp_path / "attendance.csv"), backend="csv")
+    writer = AttendanceWriter(store, batch_size=50, flush_ms=10000)
+    assert writer.mark("20240001", "QR")
+    assert writer.mark("20240002", "FACE")
+    assert not writer.mark("20240001", "FACE")
+    assert writer.is_marked("20240002")
+    writer.close()
+    stats = writer.stats()
+    assert (stats["batches"], stats["rows_written"], stats["queue_depth"]) == (1, 2, 0)
+    assert [r["student_id"] for r in store.records()] == ["20240001", "20240002"]
+
+
+def test_failed_writes_are_reported(capsys):
+    writer = AttendanceWriter(FailingStore(), flush_ms=0)
+    assert writer.mark("20240001", "QR")
+    writer.close()
+    (record, reason), = writer.take_failed()
+    assert record["student_id"] == "20240001" and reason == "disk full"
+    assert writer.take_failed() == []
+    assert writer.stats()["errors"] == 1
+    assert "20240001" in capsys.readouterr().out
+    # Nothing is pending any more, so the student can be marked again
+    assert not writer.is_marked("20240001")
+
+
+def test_queued_marks_survive_an_interrupted_loop(tmp_path):
+    path = str(tmp_path / "attendance.csv")
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {SRC!r})
+        from attendance_store import open_store
+        from attendance_writer import AttendanceWriter
+        writer = AttendanceWriter(open_store({path!r}, backend="csv"), flush_ms=10000)
+        writer.mark("20240001", "FACE")
+        raise KeyboardInterrupt
+    """)
+    subprocess.run([sys.executable, "-c", script], capture_output=True)
+    with open(path) as f:
+        assert f.read().startswith("20240001,FACE,")
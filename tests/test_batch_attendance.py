@@ -0,0 +1,63 @@
+import sys
+
+import cv2
+import numpy as np
+
+import batch_attendance
+from attendance_store import open_store
+
+
+def qr_frame(payload):
+    code = cv2.QRCodeEncoder.create().encode(payload)
+    code = cv2.resize(code, (code.shape[1] * 8, code.shape[0] * 8), interpolation=cv2.INTER_NEAREST)
+    frame = np.full((400, 400, 3), 255, dtype=np.uint8)
+    frame[50:50 + code.shape[0], 50:50 + code.shape[1]] = code[:, :, None]
+    return frame
+
+
+def write_video(path, frames):
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (400, 400))
+    for frame in frames:
+        out.write(frame)
+    out.release()
+
+
+def test_long_videos_are_split_across_workers(tmp_path):
+    path = str(tmp_path / "lecture.avi")
+    write_video(path, [np.zeros((400, 400, 3), dtype=np.uint8)] * 250)
+    (tmp_path / "a.jpg").write_bytes(b"")
+    jobs = batch_attendance.plan_jobs([path, str(tmp_path / "a.jpg")], workers=2, start=100.0)
+    assert jobs == [("video", path, 0, 125, 100.0), ("video", path, 125, 250, 100.0),
+                    ("images", [str(tmp_path / "a.jpg")])]
+    # Too short to be worth splitting
+    assert len(batch_attendance.plan_jobs([path], workers=4)) == 1
+
+
+def test_video_job_reports_first_sightings(tmp_path):
+    path = str(tmp_path / "door.avi")
+    blank = np.full((400, 400, 3), 255, dtype=np.uint8)
+    write_video(path, [blank] * 3 + [qr_frame("20240001")] * 4)
+    batch_attendance.init_worker("qr", None, None, None)
+    source, scanned, found = batch_attendance.run_job(("video", path, 0, None, 1000.0))
+    assert (source, scanned) == (path, 7)
+    ((student_id, ts),) = found
+    # Seen from the fourth frame at 10 fps
+    assert student_id == "20240001" and abs(ts - 1000.3) < 0.05
+
+    _, scanned, _ = batch_attendance.run_job(("video", path, 2, 6, 1000.0), every=2)
+    assert scanned == 2
+
+
+def test_image_folder_is_marked_in_the_log(tmp_path, monkeypatch):
+    folder = tmp_path / "photos"
+    folder.mkdir()
+    cv2.imwrite(str(folder / "1.png"), qr_frame("20240001"))
+    cv2.imwrite(str(folder / "2.png"), qr_frame("20240002"))
+    cv2.imwrite(str(folder / "3.png"), qr_frame("20240001"))
+    attendance = str(tmp_path / "data" / "attendance.csv")
+    monkeypatch.setattr(sys, "argv", ["batch_attendance.py", str(folder), "--mode", "qr",
+                                      "--workers", "2", "--attendance", attendance])
+    batch_attendance.main()
+    store = open_store(attendance)
+    assert sorted(r["student_id"] for r in store.records()) == ["20240001", "20240002"]
+    store.close()
@@ -0,0 +1,52 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from face_dataset import FaceDataset
+from face_train import scan_dataset
+
+
+@pytest.fixture
+def faces(tmp_path):
+    folder = tmp_path / "faces" / "20240001"
+    folder.mkdir(parents=True)
+    for i in range(3):
+        cv2.imwrite(str(folder / f"{i}.png"), np.full((50, 40), 60 * i, dtype=np.uint8))
+    return str(tmp_path / "faces")
+
+
+def load(faces, size=32):
+    dataset = FaceDataset(faces, os.path.join(os.path.dirname(faces), "cache.npy"), size=size, workers=2)
+    return dataset, dataset.load(scan_dataset(faces))
+
+
+def test_crops_are_resized_and_cached(faces):
+    dataset, records = load(faces)
+    assert dataset.decoded == 3
+    assert records["pixels"].shape == (3, 32, 32)
+    assert sorted(records["path"]) == ["20240001/0.png", "20240001/1.png", "20240001/2.png"]
+    dataset, records = load(faces)
+    assert dataset.decoded == 0
+    assert isinstance(records, np.memmap)
+
+
+def test_only_changed_and_new_images_are_decoded(faces):
+    load(faces)
+    folder = os.path.join(faces, "20240001")
+    cv2.imwrite(os.path.join(folder, "1.png"), np.full((60, 60), 255, dtype=np.uint8))
+    cv2.imwrite(os.path.join(folder, "3.png"), np.zeros((20, 20), dtype=np.uint8))
+    os.remove(os.path.join(folder, "0.png"))
+    dataset, records = load(faces)
+    assert dataset.decoded == 2
+    pixels = dict(zip(records["path"], records["pixels"]))
+    assert sorted(pixels) == ["20240001/1.png", "20240001/2.png", "20240001/3.png"]
+    assert (pixels["20240001/1.png"] == 255).all()
+
+
+def test_cache_at_another_size_is_rebuilt(faces):
+    load(faces)
+    dataset, records = load(faces, size=24)
+    assert dataset.decoded == 3
+    assert records["pixels"].shape == (3, 24, 24)
@@ -0,0 +1,41 @@
+import numpy as np
+
+from face_detector import DetectionScheduler
+
+
+class FakeCascade:
+    """Finds one 20x20 face at the top left of whatever image it is given"""
+
+    def __init__(self):
+        self.shapes = []
+
+    def detectMultiScale(self, image, scale_factor, min_neighbors):
+        self.shapes.append(image.shape)
+        return [(2, 4, 20, 20)]
+
+
+def test_full_detection_every_interval_and_rois_in_between():
+    cascade = FakeCascade()
+    scheduler = DetectionScheduler(cascade, scale=0.5, interval=3, padding=0.5)
+    gray = np.zeros((480, 640), dtype=np.uint8)
+    boxes = scheduler.detect(gray)
+    # Downscaled by half, boxes come back in frame coordinates
+    assert cascade.shapes == [(240, 320)]
+    assert boxes == [(4, 8, 40, 40)]
+
+    scheduler.detect(gray, boxes)
+    scheduler.detect(gray, boxes)
+    scheduler.detect(gray, boxes)
+    assert scheduler.stats() == {"full": 2, "roi": 2}
+    # A region is the known box plus padding, clipped to the frame
+    assert cascade.shapes[1] == (34, 32)
+
+
+def test_losing_every_face_forces_a_full_detection():
+    scheduler = DetectionScheduler(FakeCascade(), scale=1, interval=10)
+    gray = np.zeros((100, 100), dtype=np.uint8)
+    boxes = scheduler.detect(gray)
+    # The region starts at the frame corner, so the box is where it was
+    assert scheduler.detect(gray, boxes) == [(2, 4, 20, 20)]
+    scheduler.detect(gray, [])
+    assert scheduler.stats() == {"full": 2, "roi": 1}
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from face_index import IVFIndex
+from lbph_engine import NumpyLBPH
+
+
+def model(count=60, seed=0):
+    rng = np.random.default_rng(seed)
+    histograms = rng.random((count, NumpyLBPH().bins), dtype=np.float32)
+    histograms /= histograms.sum(axis=1, keepdims=True)
+    exhaustive = NumpyLBPH()
+    exhaustive.set_histograms(histograms, np.arange(count) % 7)
+    return exhaustive
+
+
+def test_empty_index():
+    index = IVFIndex()
+    column, _, scanned = index.search(np.ones(index.model.bins, dtype=np.float32))
+    assert (column, scanned) == (-1, 0)
+    assert index.predict_many([np.zeros((32, 32), dtype=np.uint8)])[0][0] == -1
+
+
+def test_probing_every_list_is_exact():
+    exhaustive = model()
+    index = IVFIndex().build(exhaustive, nlist=6)
+    for column in (0, 17, 59):
+        query = exhaustive.histograms[column]
+        found, distance, scanned = index.search(query, nprobe=6)
+        assert scanned == 60
+        assert distance == pytest.approx(0.0, abs=1e-5)
+        assert index.model.labels[found] == exhaustive.labels[column]
+
+
+def test_nprobe_is_clamped():
+    index = IVFIndex().build(model(), nlist=4)
+    query = index.model.histograms[0]
+    assert index.search(query, nprobe=100)[2] == 60
+    assert 0 < index.search(query, nprobe=-3)[2] < 60
+
+
+def test_round_trip(tmp_path):
+    index = IVFIndex().build(model(), nlist=4)
+    path = str(tmp_path / "face_model.yml")
+    index.write(path)
+    reread = IVFIndex().read(path)
+    query = index.model.histograms[5]
+    assert reread.search(query, nprobe=2) == index.search(query, nprobe=2)
@@ -0,0 +1,30 @@
+import numpy as np
+
+from face_prototypes import compact, k_medoids, select_prototypes
+from lbph_engine import NumpyLBPH
+
+
+def test_k_medoids_picks_the_center_of_each_cluster():
+    points = np.array([0, 1, 2, 10, 11, 12], dtype=float)
+    dist = np.abs(points[:, None] - points[None, :])
+    assert k_medoids(dist, 2) == [1, 4]
+    assert k_medoids(dist, 10) == list(range(6))
+
+
+def test_prototypes_are_capped_per_label():
+    rng = np.random.default_rng(0)
+    histograms = rng.random((10, 64)).astype(np.float32)
+    labels = np.array([0] * 7 + [1] * 3)
+    kept, kept_labels = select_prototypes(histograms, labels, 2)
+    assert kept_labels.tolist() == [0, 0, 1, 1]
+    # Prototypes are rows of the original histograms, not averages
+    assert all(any(np.array_equal(row, h) for h in histograms) for row in kept)
+
+
+def test_compacted_model_keeps_its_parameters():
+    rng = np.random.default_rng(1)
+    model = NumpyLBPH(grid_x=4, grid_y=4)
+    model.set_histograms(rng.random((6, 16 * 256)).astype(np.float32), np.array([3, 3, 3, 3, 7, 7]))
+    small = compact(model, 1)
+    assert small.labels.tolist() == [3, 7]
+    assert (small.grid_x, small.grid_y) == (4, 4)
@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pytest
+
+from face_shards import ShardSet, build_shards, check_shards, list_shards, shard_path
+from lbph_engine import NumpyLBPH
+
+STUDENTS = {
+    "20240001": {"name": "Ada Lovelace", "course": "CS 101"},
+    "20240002": {"name": "Alan Turing", "course": "cs-101"},
+    "20240003": {"name": "Emmy Noether", "course": "Math"},
+}
+LABEL_MAP = {0: "20240001", 1: "20240002", 2: "20240003", 3: "20240004"}
+
+
+def model():
+    rng = np.random.default_rng(0)
+    histograms = rng.random((8, NumpyLBPH().bins), dtype=np.float32)
+    full = NumpyLBPH()
+    full.set_histograms(histograms, [0, 0, 1, 1, 2, 2, 3, 3])
+    return full
+
+
+def test_one_shard_per_course_with_global_labels(tmp_path):
+    model_dir = str(tmp_path)
+    counts = build_shards(model(), LABEL_MAP, STUDENTS, model_dir)
+    assert counts == {"cs_101": 4, "math": 2, "unassigned": 2}
+    assert list_shards(model_dir) == ["cs_101", "math", "unassigned"]
+    shard = NumpyLBPH().read(shard_path(model_dir, "CS 101"))
+    assert shard.labels.tolist() == [0, 0, 1, 1]
+    assert os.path.exists(shard_path(model_dir, "CS 101").replace(".yml", ".bin"))
+
+
+def test_courses_without_students_are_removed(tmp_path):
+    model_dir = str(tmp_path)
+    build_shards(model(), LABEL_MAP, STUDENTS, model_dir)
+    moved = dict(STUDENTS, **{"20240003": {"name": "Emmy Noether", "course": "CS 101"}})
+    build_shards(model(), LABEL_MAP, moved, model_dir)
+    assert list_shards(model_dir) == ["cs_101", "unassigned"]
+
+
+def test_shards_older_than_the_model_are_refused(tmp_path):
+    model_dir = str(tmp_path)
+    build_shards(model(), LABEL_MAP, STUDENTS, model_dir)
+    path = shard_path(model_dir, "Math")
+    check_shards([path])
+    model().write(os.path.join(model_dir, "face_model.yml"))
+    stamp = os.path.getmtime(path) + 10
+    os.utime(os.path.join(model_dir, "face_model.yml"), (stamp, stamp))
+    with pytest.raises(ValueError):
+        check_shards([path])
+
+
+def test_shard_set_returns_the_best_match():
+    full = model()
+    shards = [NumpyLBPH(threshold=full.threshold), NumpyLBPH(threshold=full.threshold)]
+    shards[0].set_histograms(full.histograms[:4], full.labels[:4])
+    shards[1].set_histograms(full.histograms[4:], full.labels[4:])
+    query = np.zeros((16, 16), dtype=np.uint8)
+    assert ShardSet(shards).predict(query) == full.predict(query)
@@ -0,0 +1,45 @@
+import pytest
+
+from face_tracker import FaceTracker, iou_matrix
+
+
+def test_iou():
+    overlap = iou_matrix([(0, 0, 10, 10)], [(0, 0, 10, 10), (5, 0, 10, 10), (50, 50, 5, 5)])
+    assert overlap[0].tolist() == pytest.approx([1.0, 1 / 3, 0.0])
+
+
+def test_boxes_keep_their_track():
+    tracker = FaceTracker(max_missed=1)
+    first, = tracker.update([(0, 0, 40, 40)])
+    moved, other = tracker.update([(4, 2, 40, 40), (200, 200, 40, 40)])
+    assert moved is first and other is not first
+    tracker.update([])
+    tracker.update([])
+    assert tracker.update([(4, 2, 40, 40)])[0] is not first
+
+
+def test_identity_needs_enough_votes():
+    tracker = FaceTracker(votes=3, vote_window=5, predict_interval=10)
+    track, = tracker.update([(0, 0, 40, 40)])
+    for student_id in ("20240001", None, "20240002", "20240001"):
+        assert tracker.needs_prediction(track)
+        tracker.record(track, student_id, 40.0)
+        assert track.identity is None
+    tracker.record(track, "20240001", 40.0)
+    assert track.identity == "20240001"
+    # Identity settled: predict again only every predict_interval frames
+    assert not tracker.needs_prediction(track)
+    for _ in range(10):
+        tracker.update([(0, 0, 40, 40)])
+    assert tracker.needs_prediction(track)
+
+
+def test_a_new_identity_clears_the_mark():
+    tracker = FaceTracker(votes=2, vote_window=2)
+    track, = tracker.update([(0, 0, 40, 40)])
+    tracker.record(track, "20240001", 40.0)
+    tracker.record(track, "20240001", 40.0)
+    track.marked = True
+    tracker.record(track, "20240002", 40.0)
+    tracker.record(track, "20240002", 40.0)
+    assert track.identity == "20240002" and not track.marked
@@ -0,0 +1,93 @@
+import os
+import pickle
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+import face_train
+from face_shards import shard_path
+from lbph_engine import NumpyLBPH
+
+pytestmark = pytest.mark.skipif(not hasattr(cv2, "face"), reason="needs opencv-contrib-python")
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """Empty smart_attendance/ tree as the working directory"""
+    monkeypatch.chdir(tmp_path)
+    for folder in ("faces", "models", "data"):
+        os.makedirs(os.path.join("smart_attendance", folder))
+    with open(face_train.STUDENTS_CSV, "w") as f:
+        f.write("student_id,name,course,email\n")
+    return tmp_path
+
+
+def add_student(student_id, course, images=3):
+    with open(face_train.STUDENTS_CSV, "a") as f:
+        f.write(f"{student_id},Student {student_id},{course},\n")
+    folder = os.path.join(face_train.DATASET_DIR, student_id)
+    os.makedirs(folder)
+    rng = np.random.default_rng(int(student_id))
+    for i in range(images):
+        face = cv2.GaussianBlur(rng.integers(0, 256, (100, 100), dtype=np.uint8), (5, 5), 0)
+        cv2.imwrite(os.path.join(folder, f"{i}.jpg"), face)
+
+
+def train(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["face_train.py", *args])
+    face_train.main()
+
+
+def shard_labels(course):
+    return NumpyLBPH().read(shard_path(face_train.MODEL_DIR, course)).labels.tolist()
+
+
+def test_incremental_training_rebuilds_existing_shards(project, monkeypatch):
+    add_student("20240001", "CS")
+    train(monkeypatch, "--shards")
+    assert shard_labels("CS") == [0, 0, 0]
+
+    add_student("20240002", "CS")
+    train(monkeypatch)
+    with open(face_train.LABEL_MAP_PATH, "rb") as f:
+        assert pickle.load(f) == {0: "20240001", 1: "20240002"}
+    assert shard_labels("CS") == [0, 0, 0, 1, 1, 1]
+
+
+def model_labels():
+    return NumpyLBPH().read(face_train.MODEL_PATH).labels.tolist()
+
+
+def label_map():
+    with open(face_train.LABEL_MAP_PATH, "rb") as f:
+        return pickle.load(f)
+
+
+def test_new_students_get_new_labels_without_renumbering(project, monkeypatch):
+    add_student("20240005", "CS")
+    train(monkeypatch)
+    assert label_map() == {0: "20240005"}
+
+    # Sorts first, but existing labels keep their numbers
+    add_student("20240001", "CS")
+    train(monkeypatch)
+    assert label_map() == {0: "20240005", 1: "20240001"}
+    assert model_labels() == [0, 0, 0, 1, 1, 1]
+
+    # A removed image forces a full retrain, which numbers students in order
+    os.remove(os.path.join(face_train.DATASET_DIR, "20240005", "2.jpg"))
+    train(monkeypatch)
+    assert label_map() == {0: "20240001", 1: "20240005"}
+    assert model_labels() == [0, 0, 0, 1, 1]
+
+
+def test_prototype_models_are_rebuilt_not_updated(project, monkeypatch):
+    add_student("20240001", "CS")
+    add_student("20240002", "CS")
+    train(monkeypatch, "--prototypes", "1")
+    assert model_labels() == [0, 1]
+    add_student("20240003", "CS")
+    train(monkeypatch, "--prototypes", "1")
+    assert model_labels() == [0, 1, 2]
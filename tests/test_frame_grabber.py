@@ -0,0 +1,52 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from frame_grabber import FrameGrabber
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (32, 32))
+    for i in range(30):
+        out.write(np.full((32, 32, 3), i * 8, dtype=np.uint8))
+    out.release()
+    return path
+
+
+def test_every_frame_without_dropping(video):
+    grabber = FrameGrabber(video, drop=False)
+    frames = 0
+    while grabber.read()[0]:
+        frames += 1
+    grabber.release()
+    assert frames == 30
+    assert grabber.stats() == {"captured": 30, "processed": 30, "dropped": 0}
+
+
+def test_slow_loop_drops_frames(video):
+    grabber = FrameGrabber(video)
+    time.sleep(0.5)
+    frames = 0
+    while grabber.read()[0]:
+        frames += 1
+    grabber.release()
+    stats = grabber.stats()
+    assert stats["captured"] == 30
+    assert stats["dropped"] > 0
+    assert stats["processed"] + stats["dropped"] == 30 == stats["captured"]
+
+
+def test_release_mid_stream_closes_the_source(video):
+    capture = cv2.VideoCapture(video)
+    grabber = FrameGrabber(capture, drop=False)
+    assert grabber.read()[0]
+    grabber.release()
+    assert not grabber.thread.is_alive()
+    assert not capture.isOpened()
+    # Releasing again (e.g. from a finally block) is harmless
+    grabber.release()
+    assert not capture.isOpened()
@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+import pytest
+
+from lbph_engine import NumpyLBPH
+
+pytestmark = pytest.mark.skipif(not hasattr(cv2, "face"), reason="needs opencv-contrib-python")
+
+
+def faces(count, seed):
+    # Smooth random images: closer to face crops than pure noise
+    rng = np.random.default_rng(seed)
+    images = [cv2.GaussianBlur(rng.integers(0, 256, (64, 64), dtype=np.uint8), (5, 5), 0)
+              for _ in range(count)]
+    return images, np.arange(count, dtype=np.int32) % 4
+
+
+@pytest.fixture
+def trained(tmp_path):
+    images, labels = faces(12, seed=1)
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.train(images, labels)
+    path = str(tmp_path / "face_model.yml")
+    recognizer.write(path)
+    return recognizer, path, images, labels
+
+
+def test_predictions_match_opencv(trained):
+    recognizer, path, images, _ = trained
+    model = NumpyLBPH().read(path)
+    queries = faces(6, seed=2)[0] + images[:3]
+    for (label, confidence), image in zip(model.predict_many(queries), queries):
+        expected_label, expected_confidence = recognizer.predict(image)
+        assert label == expected_label
+        assert confidence == pytest.approx(expected_confidence, rel=1e-4, abs=1e-6)
+
+
+def test_training_matches_opencv(trained):
+    recognizer, _, images, labels = trained
+    model = NumpyLBPH().train(images, labels)
+    for image in faces(4, seed=3)[0]:
+        label, confidence = model.predict(image)
+        assert (label, confidence) == pytest.approx(recognizer.predict(image), rel=1e-4)
+
+
+def test_model_round_trips(trained, tmp_path):
+    recognizer, path, _, _ = trained
+    model = NumpyLBPH().read(path)
+    yml = str(tmp_path / "copy.yml")
+    model.write(yml)
+    reread = cv2.face.LBPHFaceRecognizer_create()
+    reread.read(yml)
+    binary_path = str(tmp_path / "face_model.bin")
+    model.write_binary(binary_path)
+    binary = NumpyLBPH().read_binary(binary_path)
+    query = faces(1, seed=4)[0][0]
+    assert reread.predict(query) == pytest.approx(recognizer.predict(query), rel=1e-4)
+    assert binary.predict(query) == pytest.approx(model.predict(query))
+
+
+def test_threshold_and_empty_model():
+    images, labels = faces(4, seed=5)
+    model = NumpyLBPH(threshold=0.0).train(images, labels)
+    assert model.predict(images[0])[0] == -1
+    assert NumpyLBPH().predict_many([images[0]]) == [(-1, float(np.finfo(np.float64).max))]
+    assert NumpyLBPH().predict_many([]) == []
+
+
+def test_batch_distances_match_single_queries(trained):
+    _, path, images, _ = trained
+    model = NumpyLBPH().read(path)
+    queries = np.vstack([model.histogram(image) for image in images[:4]])
+    batch = model.distances(queries)
+    for row, query in enumerate(queries):
+        assert batch[row] == pytest.approx(model.distances_to(query))
+    # A face scored against itself is at distance zero
+    assert batch[0, 0] == pytest.approx(0.0, abs=1e-6)
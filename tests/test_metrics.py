@@ -0,0 +1,73 @@
+import socket
+import time
+import urllib.request
+from types import SimpleNamespace
+
+import pytest
+
+from metrics import Metrics
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def metrics():
+    metrics = Metrics().start(free_port(), "127.0.0.1")
+    yield metrics
+    metrics.close()
+
+
+def scrape(metrics, until):
+    # Events are folded in on the background thread
+    for _ in range(100):
+        text = metrics.render()
+        if until in text:
+            return text
+        time.sleep(0.01)
+    return text
+
+
+def test_disabled_until_started():
+    metrics = Metrics()
+    metrics.observe("detect", 0.01)
+    metrics.mark("QR", True)
+    assert not metrics.enabled
+    assert metrics.events.empty()
+
+
+def test_render_counts_marks_predictions_and_latency(metrics):
+    metrics.observe("detect", 0.003)
+    metrics.observe("detect", 0.2)
+    metrics.prediction(True)
+    metrics.prediction(False)
+    metrics.mark("QR", True)
+    metrics.mark("QR", False)
+    text = scrape(metrics, 'result="duplicate"')
+    assert 'attendance_stage_seconds_bucket{stage="detect",le="0.005"} 1' in text
+    assert 'attendance_stage_seconds_bucket{stage="detect",le="+Inf"} 2' in text
+    assert 'attendance_stage_seconds_count{stage="detect"} 2' in text
+    assert 'attendance_marks_total{method="QR",result="marked"} 1' in text
+    assert 'attendance_marks_total{method="QR",result="duplicate"} 1' in text
+    assert 'attendance_marks_per_minute{method="QR"} 1.0' in text
+    assert "attendance_unknown_face_ratio 0.5" in text
+
+
+def test_frame_counts_survive_detach(metrics):
+    grabber = SimpleNamespace(processed=10, dropped=2)
+    metrics.attach("face", grabber)
+    metrics.detach("face")
+    metrics.attach("face", SimpleNamespace(processed=5, dropped=0))
+    text = metrics.render()
+    assert 'attendance_frames_processed_total{mode="face"} 15' in text
+    assert 'attendance_frames_dropped_total{mode="face"} 2' in text
+
+
+def test_served_over_http(metrics):
+    port = metrics.server.server_address[1]
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+        assert response.headers["Content-Type"].startswith("text/plain")
+        assert "# TYPE attendance_marks_total counter" in response.read().decode()
@@ -0,0 +1,45 @@
+from attendance_compact import COMPACT_FIELDS, to_epoch
+from migrate_attendance import convert_row, migrate
+
+TS = to_epoch("2024-03-01", "09:30:00")
+
+
+def test_script_rows():
+    assert convert_row(["S1", "QR", "2024-03-01", "09:30:00"]) == ["S1", "QR", TS]
+
+
+def test_old_gui_rows_have_a_name_not_a_method():
+    assert convert_row(["S1", "Ada Lovelace", "2024-03-01", "09:30:00"]) == ["S1", "", TS]
+
+
+def test_gui_rows():
+    row = ["S1", "Ada Lovelace", "CS", "ada@example.com", "2024-03-01", "09:30:00"]
+    assert convert_row(row) == ["S1", "", TS]
+
+
+def test_header_decides_the_layout():
+    header = ["student_id", "name", "date", "time"]
+    assert convert_row(["S1", "QR", "2024-03-01", "09:30:00"], header) == ["S1", "", TS]
+    assert convert_row(["S1", "FACE", str(TS)], COMPACT_FIELDS) == ["S1", "FACE", TS]
+
+
+def test_unreadable_rows_are_skipped():
+    assert convert_row([]) is None
+    assert convert_row(["student_id", "method", "ts"]) is None
+    assert convert_row(["S1", "QR", "yesterday"]) is None
+    assert convert_row(["S1", "QR", "2024-13-01", "09:30:00"]) is None
+    assert convert_row(["S1", "QR", "not-a-ts"], COMPACT_FIELDS) is None
+
+
+def test_migrate_counts_and_appends(tmp_path):
+    source = tmp_path / "attendance.csv"
+    source.write_text(
+        "student_id,name,course,email,date,time\n"
+        "S1,Ada Lovelace,CS,ada@example.com,2024-03-01,09:30:00\n"
+        "S2,Alan Turing,Math,alan@example.com,bad,date\n"
+        "\n")
+    dest = tmp_path / "attendance_events.csv"
+    assert migrate(str(source), str(dest)) == (1, 1)
+    assert migrate(str(source), str(dest)) == (1, 1)
+    lines = dest.read_text().splitlines()
+    assert lines == [",".join(COMPACT_FIELDS), f"S1,,{TS}", f"S1,,{TS}"]
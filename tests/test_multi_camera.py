@@ -0,0 +1,37 @@
+import queue
+
+import cv2
+import numpy as np
+
+from multi_camera import parse_source, run_source
+
+
+def qr_video(path, payload, frames=5):
+    code = cv2.QRCodeEncoder.create().encode(payload)
+    code = cv2.resize(code, (code.shape[1] * 8, code.shape[0] * 8), interpolation=cv2.INTER_NEAREST)
+    frame = np.full((400, 400, 3), 255, dtype=np.uint8)
+    frame[50:50 + code.shape[0], 50:50 + code.shape[1]] = code[:, :, None]
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (400, 400))
+    for _ in range(frames):
+        out.write(frame)
+    out.release()
+
+
+def test_parse_source():
+    assert parse_source("0") == 0
+    assert parse_source("rtsp://cam/1") == "rtsp://cam/1"
+
+
+def test_qr_source_sends_each_id_once(tmp_path):
+    path = str(tmp_path / "door.avi")
+    qr_video(path, " 20240001 \n")
+    results = queue.Queue()
+    run_source("door", path, "qr", None, None, None, results)
+    messages = []
+    while not results.empty():
+        messages.append(results.get())
+    marks = [m[2] for m in messages if m[0] == "mark"]
+    assert marks == ["20240001"]
+    assert messages[-1] == ("done", "door", None)
+    stats = [m[2] for m in messages if m[0] == "stats"][-1]
+    assert stats["frames"] == 5 and stats["recognitions"] == 5
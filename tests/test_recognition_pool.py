@@ -0,0 +1,54 @@
+import pickle
+
+import cv2
+import numpy as np
+import pytest
+
+from recognition_pool import ModelLoader, RecognitionPool
+
+pytestmark = pytest.mark.skipif(not hasattr(cv2, "face"), reason="needs opencv-contrib-python")
+
+
+@pytest.fixture
+def model(tmp_path):
+    rng = np.random.default_rng(4)
+    images = [cv2.GaussianBlur(rng.integers(0, 256, (64, 64), dtype=np.uint8), (5, 5), 0)
+              for _ in range(6)]
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.train(images, np.array([0, 1, 2, 0, 1, 2]))
+    model_path = str(tmp_path / "face_model.yml")
+    label_map_path = str(tmp_path / "label_map.pkl")
+    recognizer.write(model_path)
+    with open(label_map_path, "wb") as f:
+        pickle.dump({0: "20240001", 1: "20240002", 2: "20240003"}, f)
+    return model_path, label_map_path, images
+
+
+@pytest.mark.parametrize("backend", ["numpy", "opencv"])
+def test_workers_return_results_in_crop_order(model, backend):
+    model_path, label_map_path, images = model
+    crops = images[::-1] + images
+    expected = ["20240003", "20240002", "20240001"] * 2 + ["20240001", "20240002", "20240003"] * 2
+
+    pool = RecognitionPool(model_path, label_map_path, workers=1, backend=backend)
+    in_process = pool.predict_many(crops)
+    pool.close()
+    assert [student_id for student_id, _ in in_process] == expected
+
+    pool = RecognitionPool(model_path, label_map_path, workers=2, backend=backend)
+    try:
+        pooled = pool.predict_many(crops)
+        assert [student_id for student_id, _ in pooled] == expected
+        assert [c for _, c in pooled] == pytest.approx([c for _, c in in_process])
+        assert pool.predict_many([]) == []
+    finally:
+        pool.close()
+
+
+def test_loader_reports_a_missing_model(tmp_path):
+    loader = ModelLoader(str(tmp_path / "face_model.yml"), str(tmp_path / "label_map.pkl"),
+                         workers=1, backend="numpy")
+    loader.start()
+    with pytest.raises(ValueError):
+        loader.get()
+    loader.close()
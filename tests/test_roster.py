@@ -0,0 +1,37 @@
+import os
+
+from roster import Roster
+
+
+def write(path, text, mode="w"):
+    with open(path, mode) as f:
+        f.write(text)
+    # Make sure the change is seen even within the mtime resolution
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+
+def test_loads_appends_and_reloads(tmp_path):
+    path = str(tmp_path / "students.csv")
+    roster = Roster(path)
+    assert roster.refresh() == {}
+
+    write(path, "student_id,name,course,email\n20240001, Ada Lovelace ,CS,ada@example.com\n")
+    roster.refresh()
+    assert roster.get("20240001") == {"name": "Ada Lovelace", "course": "CS", "email": "ada@example.com"}
+
+    write(path, "20240002,Alan Turing,Math,alan@example.com\n20240003,Grace", mode="a")
+    roster.refresh()
+    assert "20240002" in roster and "20240003" not in roster
+    assert len(roster) == 2
+
+    write(path, "student_id,name\n20240004,Edsger Dijkstra\n")
+    roster.refresh()
+    assert list(roster.students) == ["20240004"]
+
+
+def test_missing_columns(tmp_path, capsys):
+    path = tmp_path / "students.csv"
+    path.write_text("id,full_name\n1,Ada\n")
+    assert Roster(str(path)).refresh() == {}
+    assert "missing required columns" in capsys.readouterr().out
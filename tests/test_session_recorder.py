@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+import pytest
+
+from session_recorder import (FRAME_HEADER, SESSION_HEADER, SESSION_MAGIC, ReplaySource,
+                              open_attendance_store, open_camera)
+
+
+def record(path, count, cut=0):
+    with open(path, "wb") as f:
+        f.write(SESSION_HEADER.pack(SESSION_MAGIC, 1700000000.0))
+        for i in range(count):
+            frame = np.full((8, 8, 3), i * 10, dtype=np.uint8)
+            data = cv2.imencode(".png", frame)[1].tobytes()
+            f.write(FRAME_HEADER.pack(i * 0.01, len(data)))
+            f.write(data[:len(data) - cut] if i == count - 1 else data)
+
+
+def test_replays_every_frame_in_order(tmp_path):
+    path = str(tmp_path / "session.rec")
+    record(path, 5)
+    source = ReplaySource(path)
+    assert source.started == 1700000000.0
+    values = []
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        values.append(int(frame[0, 0, 0]))
+    assert values == [0, 10, 20, 30, 40]
+    assert source.timestamp == pytest.approx(0.04)
+    source.release()
+    assert not source.isOpened() and source.read() == (False, None)
+
+
+def test_truncated_recording_ends_cleanly(tmp_path):
+    path = str(tmp_path / "session.rec")
+    record(path, 3, cut=5)
+    source = ReplaySource(path)
+    assert [source.read()[0] for _ in range(3)] == [True, True, False]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "video.avi"
+    path.write_bytes(b"RIFF....AVI LIST")
+    with pytest.raises(ValueError):
+        ReplaySource(str(path))
+
+
+def test_open_camera_hands_over_every_frame(tmp_path):
+    path = str(tmp_path / "session.rec")
+    record(path, 20)
+    cap = open_camera(replay=path)
+    frames = 0
+    while cap.read()[0]:
+        frames += 1
+    cap.release()
+    assert frames == 20
+
+
+def test_replayed_marks_stay_out_of_the_attendance_log(tmp_path):
+    log = str(tmp_path / "attendance.csv")
+    store = open_attendance_store(log, "session.rec", backend="csv")
+    assert store.path != log
+    assert store.mark("20240001", "QR")
+    assert not (tmp_path / "attendance.csv").exists()
+    assert open_attendance_store(log, backend="csv").path == log
@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+
+from stage_timer import StageTimer
+
+
+class Recorder:
+    def __init__(self):
+        self.observed = []
+
+    def observe(self, stage, seconds):
+        self.observed.append((stage, seconds))
+
+
+def test_percentiles_follow_the_last_window_of_samples():
+    timer = StageTimer(window=4)
+    for ms in (100, 100, 1, 2, 3, 4):
+        timer.record("detect", ms / 1000)
+    p = timer.percentiles()["detect"]
+    # The two slow samples fell out of the window but are still counted
+    assert p["count"] == 6
+    assert p["max"] == 4.0
+    assert p["p50"] == 2.5
+
+
+def test_stage_context_times_a_block_and_feeds_metrics():
+    metrics = Recorder()
+    timer = StageTimer(metrics=metrics)
+    try:
+        with timer.stage("predict"):
+            raise KeyError
+    except KeyError:
+        pass
+    assert timer.percentiles()["predict"]["count"] == 1
+    assert [stage for stage, _ in metrics.observed] == ["predict"]
+
+
+def test_dump_writes_the_summary_with_extra_counters(tmp_path):
+    timer = StageTimer()
+    timer.record("read", 0.002)
+    path = timer.dump(str(tmp_path / "latency.json"), frames={"processed": 3})
+    with open(path) as f:
+        summary = json.load(f)
+    assert summary["stages"]["read"]["p99"] == 2.0
+    assert summary["frames"] == {"processed": 3}
+    # The overlay draws onto the frame in place
+    frame = np.zeros((200, 400, 3), dtype=np.uint8)
+    timer.overlay(frame)
+    assert frame.any()